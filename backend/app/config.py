@@ -13,6 +13,52 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     MEDIA_FILES_BASE_DIR: str = os.getenv("MEDIA_FILES_BASE_DIR", "/app/media_files_data")
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
+    # pool HTTP spojení zdieľaného AsyncOpenAI klienta
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+    # limity na strane klienta (0 = bez limitu), retry a circuit breaker
+    OPENAI_REQUESTS_PER_MINUTE: int = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+    OPENAI_TOKENS_PER_MINUTE: int = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+    OPENAI_MAX_QUEUE_SECONDS: float = float(os.getenv("OPENAI_MAX_QUEUE_SECONDS", "30"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+    OPENAI_BACKOFF_BASE_SECONDS: float = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", "0.5"))
+    OPENAI_BACKOFF_MAX_SECONDS: float = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", "20"))
+    OPENAI_CIRCUIT_FAILURES: int = int(os.getenv("OPENAI_CIRCUIT_FAILURES", "5"))
+    OPENAI_CIRCUIT_RESET_SECONDS: float = float(os.getenv("OPENAI_CIRCUIT_RESET_SECONDS", "30"))
+    # cache odpovedí LLM: LRU v procese + tabuľka llm_response_cache (TTL, limit veľkosti)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "512"))
+    LLM_CACHE_TTL_HOURS: int = int(os.getenv("LLM_CACHE_TTL_HOURS", str(30 * 24)))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # strop vstupných tokenov jedného requestu (aj keď model zvládne viac)
+    LLM_PROMPT_MAX_TOKENS: int = int(os.getenv("LLM_PROMPT_MAX_TOKENS", "6000"))
+    EXTRACTION_WORKERS: int = int(os.getenv("EXTRACTION_WORKERS", "2"))
+    # PROCESSING job starší ako toto sa považuje za opustený (worker spadol) a môže sa prevziať
+    EXTRACTION_STALE_MINUTES: int = int(os.getenv("EXTRACTION_STALE_MINUTES", "30"))
+    UPLOAD_CHUNK_MAX_BYTES: int = int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(16 * 1024 * 1024)))
+    # chunked upload bez nového chunku dlhšie ako toto sa zahodí (aj s .part súborom)
+    UPLOAD_SESSION_TTL_HOURS: int = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+    MAX_UPLOAD_BYTES: int = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+    USER_STORAGE_QUOTA_BYTES: int = int(os.getenv("USER_STORAGE_QUOTA_BYTES", str(1024 * 1024 * 1024)))
+    BATCH_UPLOAD_MAX_FILES: int = int(os.getenv("BATCH_UPLOAD_MAX_FILES", "50"))
+    # 0 = periodický sweeper vypnutý (dá sa spustiť ručne, pozri storage_reconciliation)
+    STORAGE_SWEEP_INTERVAL_MINUTES: int = int(os.getenv("STORAGE_SWEEP_INTERVAL_MINUTES", "0"))
+    STORAGE_SWEEP_DELETE: bool = os.getenv("STORAGE_SWEEP_DELETE", "false").lower() == "true"
+    # úložisko súborov: "local" (MEDIA_FILES_BASE_DIR) alebo "s3" (AWS S3, MinIO …)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    S3_BUCKET: Optional[str] = os.getenv("S3_BUCKET")
+    S3_PREFIX: str = os.getenv("S3_PREFIX", "")
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL")
+    S3_REGION: Optional[str] = os.getenv("S3_REGION")
+    S3_ACCESS_KEY_ID: Optional[str] = os.getenv("S3_ACCESS_KEY_ID")
+    S3_SECRET_ACCESS_KEY: Optional[str] = os.getenv("S3_SECRET_ACCESS_KEY")
+    # platnosť presigned URL na stiahnutie (sekundy)
+    STORAGE_PRESIGN_EXPIRES: int = int(os.getenv("STORAGE_PRESIGN_EXPIRES", "300"))
+    # sťahovanie lokálnych súborov cez reverse proxy: "" (vypnuté, FileResponse),
+    # "x-accel-redirect" (nginx) alebo "x-sendfile" (Apache mod_xsendfile, lighttpd)
+    DOWNLOAD_OFFLOAD: str = os.getenv("DOWNLOAD_OFFLOAD", "").lower()
+    # nginx: `internal` location namapovaná na MEDIA_FILES_BASE_DIR
+    DOWNLOAD_OFFLOAD_PREFIX: str = os.getenv("DOWNLOAD_OFFLOAD_PREFIX", "/protected-media/")
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
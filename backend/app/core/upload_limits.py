@@ -0,0 +1,80 @@
+# backend/app/core/upload_limits.py
+"""
+Obmedzenie veľkosti multipart uploadov ešte pred parsovaním tela.
+
+FastAPI/Starlette načíta celé multipart telo (do SpooledTemporaryFile)
+skôr, než sa zavolá endpoint, takže kontrola v route by prišla neskoro.
+Middleware odmietne request podľa Content-Length hneď, a pri tele bez
+Content-Length (chunked) ho utne, keď prečítané bajty prekročia limit.
+"""
+
+from __future__ import annotations
+
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+# réžia multipart hlavičiek a ostatných polí formulára
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+def upload_body_limit(path: str) -> int:
+    """Limit pre celé telo requestu – pri batch uploade pre všetky súbory spolu."""
+    if path.rstrip("/").endswith("/materials/batch"):
+        return settings.MAX_UPLOAD_BYTES * settings.BATCH_UPLOAD_MAX_FILES + MULTIPART_OVERHEAD_BYTES
+    return settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES
+
+
+class MaxUploadSizeMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = upload_body_limit(scope["path"])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            # odpoveď aplikácie (400 z parsovania tela) nahradíme 413
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        if exceeded:
+            await self._reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, limit: int) -> None:
+        response = PlainTextResponse(f"Upload too large (limit {limit} bytes).", status_code=413)
+        await response(scope, receive, send)
@@ -1,6 +1,6 @@
 # backend/app/crud/init.py
 from .crud_user import get_user, get_user_by_email, create_user
-from .crud_subject import get_subject, get_subjects_by_owner, create_subject, update_subject, delete_subject
+from .crud_subject import get_subject, subject_belongs_to_owner, get_subject_name, get_subjects_by_owner, create_subject, update_subject, delete_subject
 from .crud_topic import get_topic, get_topics_by_subject, create_topic, update_topic, delete_topic
 from .crud_study_plan import (
 get_study_plan, get_active_study_plan_for_subject,
@@ -8,8 +8,23 @@ create_study_plan_with_blocks, update_study_plan,
 get_study_block, update_study_block
 )
 from .crud_study_material import (
-    create_study_material, get_study_material, get_study_materials_for_subject, 
-    update_study_material, delete_study_material,update_material_tags,_deserialize_tags
+    create_study_material, get_study_material, get_study_materials_for_subject, get_material_files_for_subject,
+    update_study_material, delete_study_material,update_material_tags, save_ai_analysis,
+    get_extraction_job, backfill_extraction_jobs, create_study_material_from_tmp_file,
+    StagedUpload, stage_upload, create_study_materials_batch, DuplicateMaterialError,
+)
+from .crud_material_tag import parse_tags, split_tags, set_material_tags, get_tag_cloud, backfill_material_tags
+from .crud_search import search_materials
+from .crud_storage_usage import (
+    StorageQuotaExceeded, get_storage_usage, get_quota_bytes, has_room_for, rebuild_storage_usage,
+    backfill_storage_usage,
+)
+from .crud_material_page import (
+    get_material_pages, count_material_pages, backfill_material_pages, backfill_material_stats,
+)
+from .crud_upload_session import (
+    get_upload_session, create_upload_session, set_received_bytes, delete_upload_session,
+    pending_upload_bytes, purge_expired_upload_sessions,
 )
 from .crud_achievement import(
     get_all_defined_achievements,get_user_achievements
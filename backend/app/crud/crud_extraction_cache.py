@@ -0,0 +1,136 @@
+"""
+CRUD pre ExtractionCacheEntry – perzistentná cache extrakcie textu.
+
+Kľúč je (SHA-256 obsahu, verzia extraktora), hodnota sú strany textu
+oddelené znakom \\f a komprimované zlib-om. Kompresia aj dekompresia
+bežia prúdovo, takže naraz sa v pamäti drží len jedna strana textu.
+"""
+
+from __future__ import annotations
+
+import codecs
+import logging
+import zlib
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.crud import crud_material_page
+from app.db.enums import ExtractionStatus
+from app.db.models.extraction_cache import ExtractionCacheEntry
+from app.db.models.extraction_job import ExtractionJob
+from app.db.models.study_material import StudyMaterial
+from app.services.text_extraction import EXTRACTOR_VERSION, TextStats
+
+logger = logging.getLogger(__name__)
+
+PAGE_SEPARATOR = "\f"
+DECOMPRESS_CHUNK = 64 * 1024
+
+
+class CompressedPagesWriter:
+    """Postupne komprimuje strany do formátu cache."""
+
+    def __init__(self) -> None:
+        self._compressor = zlib.compressobj(6)
+        self._parts: list[bytes] = []
+        self.page_count = 0
+        self.char_count = 0
+
+    def add(self, text: str) -> None:
+        text = text.replace(PAGE_SEPARATOR, "\n")
+        prefix = PAGE_SEPARATOR if self.page_count else ""
+        self._parts.append(self._compressor.compress((prefix + text).encode("utf-8")))
+        self.page_count += 1
+        self.char_count += len(text)
+
+    def finish(self) -> bytes:
+        self._parts.append(self._compressor.flush())
+        return b"".join(self._parts)
+
+
+def iter_cached_pages(entry: ExtractionCacheEntry) -> Iterator[str]:
+    """Prúdovo dekomprimuje strany zo záznamu cache."""
+    if not entry.page_count:
+        return
+    decompressor = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    data = entry.pages_zlib
+    pending = ""
+    for offset in range(0, len(data), DECOMPRESS_CHUNK):
+        pending += decoder.decode(decompressor.decompress(data[offset:offset + DECOMPRESS_CHUNK]))
+        *complete, pending = pending.split(PAGE_SEPARATOR)
+        yield from complete
+    pending += decoder.decode(decompressor.flush(), final=True)
+    yield from pending.split(PAGE_SEPARATOR)
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def get_cache_entry(db: Session, sha256: str, extractor_version: str = EXTRACTOR_VERSION) -> Optional[ExtractionCacheEntry]:
+    return (
+        db.query(ExtractionCacheEntry)
+        .filter(
+            ExtractionCacheEntry.sha256 == sha256,
+            ExtractionCacheEntry.extractor_version == extractor_version,
+        )
+        .first()
+    )
+
+# --------------------------------------------------------------------------- #
+# WRITE                                                                       #
+# --------------------------------------------------------------------------- #
+def store_cache_entry(db: Session, sha256: str, writer: CompressedPagesWriter) -> None:
+    """Uloží výsledok extrakcie; ak ho medzitým uložil iný worker, nič nerobí. Commituje."""
+    if get_cache_entry(db, sha256):
+        return
+    try:
+        db.add(ExtractionCacheEntry(
+            sha256=sha256,
+            extractor_version=EXTRACTOR_VERSION,
+            pages_zlib=writer.finish(),
+            page_count=writer.page_count,
+            char_count=writer.char_count,
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def restore_from_cache(db: Session, material: StudyMaterial, job: ExtractionJob, batch_size: int = 20) -> bool:
+    """
+    Ak je obsah materiálu v cache, naplní z nej `material_pages`,
+    `extracted_text`, štatistiky textu a označí job ako hotový. Necommituje.
+    """
+    if not material.blob_sha256:
+        return False
+    entry = get_cache_entry(db, material.blob_sha256)
+    if not entry:
+        return False
+
+    crud_material_page.delete_material_pages(db, material.id)
+    stats = TextStats()
+    batch: list[dict] = []
+    for page_no, text in enumerate(iter_cached_pages(entry), start=1):
+        stats.add(text)
+        batch.append({"material_id": material.id, "page_no": page_no, "text": text, "char_count": len(text)})
+        if len(batch) >= batch_size:
+            crud_material_page.insert_material_pages(db, batch)
+            batch = []
+    crud_material_page.insert_material_pages(db, batch)
+    crud_material_page.concat_pages_into_extracted_text(db, material.id)
+    stats.apply_to(material)
+
+    now = datetime.utcnow()
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = now
+    job.status = ExtractionStatus.COMPLETED
+    job.pages_done = entry.page_count
+    job.pages_total = entry.page_count
+    job.error = None
+    job.started_at = job.started_at or now
+    job.finished_at = now
+    logger.info("Extraction cache hit for material %s (%s)", material.id, material.blob_sha256)
+    return True
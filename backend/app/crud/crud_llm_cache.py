@@ -0,0 +1,93 @@
+"""
+CRUD pre LlmCacheEntry – perzistentná vrstva cache odpovedí LLM.
+
+Záznamy staršie ako TTL sa ignorujú (a mažú pri eviction); keď súčet
+veľkostí prekročí limit, mažú sa najdlhšie nepoužité (LRU).
+Funkcie commitujú – volá ich cache vo vlastnej session.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.db.models.llm_cache import LlmCacheEntry
+
+logger = logging.getLogger(__name__)
+
+EVICT_BATCH_SIZE = 500
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def get_cached_response(db: Session, key: str, ttl: Optional[timedelta]) -> Optional[str]:
+    """Odpoveď pre kľúč, ak nie je staršia ako `ttl` (None = aj staršia); zapíše použitie."""
+    now = datetime.utcnow()
+    q = db.query(LlmCacheEntry).filter(LlmCacheEntry.key == key)
+    if ttl is not None:
+        q = q.filter(LlmCacheEntry.created_at >= now - ttl)
+    entry = q.first()
+    if not entry:
+        return None
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = now
+    response = entry.response
+    db.commit()
+    return response
+
+# --------------------------------------------------------------------------- #
+# WRITE                                                                       #
+# --------------------------------------------------------------------------- #
+def store_response(db: Session, key: str, model: str, response: str) -> None:
+    """Uloží odpoveď (starší záznam s rovnakým kľúčom prepíše)."""
+    now = datetime.utcnow()
+    size = len(response.encode("utf-8"))
+    try:
+        db.query(LlmCacheEntry).filter(LlmCacheEntry.key == key).delete(synchronize_session=False)
+        db.add(LlmCacheEntry(
+            key=key, model=model, response=response, size_bytes=size,
+            created_at=now, last_used_at=now,
+        ))
+        db.commit()
+    except IntegrityError:
+        # rovnakú odpoveď medzitým uložil iný request
+        db.rollback()
+
+
+def evict(db: Session, ttl: timedelta, max_bytes: int) -> int:
+    """Zmaže expirované záznamy a najstaršie nad limit `max_bytes`. Vráti počet zmazaných."""
+    try:
+        removed = (
+            db.query(LlmCacheEntry)
+            .filter(LlmCacheEntry.created_at < datetime.utcnow() - ttl)
+            .delete(synchronize_session=False)
+        )
+        total = db.query(func.coalesce(func.sum(LlmCacheEntry.size_bytes), 0)).scalar()
+        while total > max_bytes:
+            rows = (
+                db.query(LlmCacheEntry.key, LlmCacheEntry.size_bytes)
+                .order_by(LlmCacheEntry.last_used_at)
+                .limit(EVICT_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if total <= max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            db.query(LlmCacheEntry).filter(LlmCacheEntry.key.in_(victims)).delete(synchronize_session=False)
+            removed += len(victims)
+        db.commit()
+        return removed
+    except SQLAlchemyError as exc:
+        logger.exception("LLM cache eviction failed: %s", exc)
+        db.rollback()
+        return 0
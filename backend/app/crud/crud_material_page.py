@@ -0,0 +1,207 @@
+"""
+CRUD pre MaterialPage (text materiálu po stranách).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.db.models.material_page import MaterialPage
+from app.db.models.study_material import StudyMaterial
+from app.services.text_extraction import TextStats
+
+logger = logging.getLogger(__name__)
+
+# koľko strán vrátime najviac v jednom requeste
+MAX_PAGES_PER_REQUEST = 50
+# po koľkých materiáloch backfill štatistík a strán commituje
+STATS_BACKFILL_BATCH_SIZE = 100
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def count_material_pages(db: Session, material_id: int) -> int:
+    return (
+        db.query(func.count(MaterialPage.id))
+        .filter(MaterialPage.material_id == material_id)
+        .scalar()
+        or 0
+    )
+
+
+def get_material_pages(
+    db: Session,
+    material_id: int,
+    owner_id: int,
+    from_page: int = 1,
+    to_page: Optional[int] = None,
+) -> Optional[List[MaterialPage]]:
+    """Strany <from_page, to_page> (vrátane); None ak materiál neexistuje."""
+    owned = (
+        db.query(StudyMaterial.id)
+        .filter(StudyMaterial.id == material_id, StudyMaterial.owner_id == owner_id)
+        .first()
+    )
+    if not owned:
+        return None
+
+    last = from_page + MAX_PAGES_PER_REQUEST - 1
+    if to_page is not None:
+        last = min(last, to_page)
+
+    return (
+        db.query(MaterialPage)
+        .filter(
+            MaterialPage.material_id == material_id,
+            MaterialPage.page_no >= from_page,
+            MaterialPage.page_no <= last,
+        )
+        .order_by(MaterialPage.page_no)
+        .all()
+    )
+
+# --------------------------------------------------------------------------- #
+# WRITE (extraction worker)                                                   #
+# --------------------------------------------------------------------------- #
+def delete_material_pages(db: Session, material_id: int) -> None:
+    db.execute(delete(MaterialPage).where(MaterialPage.material_id == material_id))
+
+
+def insert_material_pages(db: Session, rows: List[dict]) -> None:
+    """Hromadný insert dávky strán (dicty s material_id, page_no, text, char_count)."""
+    if rows:
+        db.execute(insert(MaterialPage), rows)
+
+
+def concat_pages_into_extracted_text(db: Session, material_id: int) -> None:
+    """
+    Poskladá `StudyMaterial.extracted_text` zo strán priamo v DB,
+    aby celý text nemusel prejsť cez Python.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        joined = (
+            select(func.string_agg(aggregate_order_by(MaterialPage.text, MaterialPage.page_no), "\n"))
+            .where(MaterialPage.material_id == material_id, MaterialPage.char_count > 0)
+            .scalar_subquery()
+        )
+    else:
+        ordered = (
+            select(MaterialPage.text)
+            .where(MaterialPage.material_id == material_id, MaterialPage.char_count > 0)
+            .order_by(MaterialPage.page_no)
+            .subquery()
+        )
+        joined = select(func.group_concat(ordered.c.text, "\n")).scalar_subquery()
+
+    db.execute(
+        update(StudyMaterial)
+        .where(StudyMaterial.id == material_id)
+        .values(extracted_text=joined)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def backfill_material_pages(db: Session) -> int:
+    """
+    Materiály extrahované pred zavedením material_pages majú len
+    `extracted_text` – dostanú ho ako jednu stranu, aby ich vrátil aj
+    endpoint so stranami. Text sa kopíruje priamo v DB (INSERT … SELECT).
+    """
+    filled = 0
+    last_id = 0
+    has_pages = select(MaterialPage.id).where(MaterialPage.material_id == StudyMaterial.id).exists()
+    while True:
+        ids = [
+            material_id
+            for (material_id,) in db.query(StudyMaterial.id)
+            .filter(
+                StudyMaterial.id > last_id,
+                StudyMaterial.extracted_text.isnot(None),
+                ~has_pages,
+            )
+            .order_by(StudyMaterial.id)
+            .limit(STATS_BACKFILL_BATCH_SIZE)
+        ]
+        if not ids:
+            break
+        db.execute(
+            insert(MaterialPage).from_select(
+                ["material_id", "page_no", "text", "char_count"],
+                select(
+                    StudyMaterial.id,
+                    literal(1),
+                    StudyMaterial.extracted_text,
+                    func.length(StudyMaterial.extracted_text),
+                ).where(StudyMaterial.id.in_(ids)),
+            )
+        )
+        db.commit()
+        filled += len(ids)
+        last_id = ids[-1]
+    if filled:
+        logger.info("Backfilled pages for %d materials", filled)
+    return filled
+
+
+def _stats_from_pages(db: Session, material_id: int) -> Optional[TextStats]:
+    stats = TextStats()
+    pages = (
+        db.query(MaterialPage.text)
+        .filter(MaterialPage.material_id == material_id)
+        .order_by(MaterialPage.page_no)
+        .yield_per(MAX_PAGES_PER_REQUEST)
+    )
+    for (text,) in pages:
+        stats.add(text or "")
+    return stats if stats.page_count else None
+
+
+def backfill_material_stats(db: Session) -> int:
+    """
+    Doplní page/word/char count a čas čítania materiálom extrahovaným pred
+    zavedením týchto stĺpcov – zo strán, inak z `extracted_text` (ako jedna
+    strana). Materiály bez textu ostanú NULL. Commituje po dávkach.
+    """
+    filled = 0
+    last_id = 0
+    while True:
+        ids = [
+            material_id
+            for (material_id,) in db.query(StudyMaterial.id)
+            .filter(
+                StudyMaterial.id > last_id,
+                StudyMaterial.word_count.is_(None),
+                StudyMaterial.extracted_text.isnot(None),
+            )
+            .order_by(StudyMaterial.id)
+            .limit(STATS_BACKFILL_BATCH_SIZE)
+        ]
+        if not ids:
+            break
+        for material_id in ids:
+            stats = _stats_from_pages(db, material_id)
+            if stats is None:
+                text = db.query(StudyMaterial.extracted_text).filter(StudyMaterial.id == material_id).scalar()
+                stats = TextStats()
+                stats.add(text or "")
+            db.query(StudyMaterial).filter(StudyMaterial.id == material_id).update(
+                {
+                    StudyMaterial.page_count: stats.page_count,
+                    StudyMaterial.word_count: stats.word_count,
+                    StudyMaterial.char_count: stats.char_count,
+                    StudyMaterial.reading_time_minutes: stats.reading_time_minutes,
+                },
+                synchronize_session=False,
+            )
+        db.commit()
+        filled += len(ids)
+        last_id = ids[-1]
+    if filled:
+        logger.info("Backfilled text statistics for %d materials", filled)
+    return filled
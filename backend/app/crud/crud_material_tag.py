@@ -0,0 +1,124 @@
+"""
+CRUD pre MaterialTag – normalizovaný index tagov materiálov.
+
+`StudyMaterial.tags` (JSON reťazec) a riadky v `material_tags` sa menia
+vždy spolu cez `set_material_tags`; filtre a tag-cloud čítajú len index.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.models.material_tag import MaterialTag
+from app.db.models.study_material import StudyMaterial
+
+logger = logging.getLogger(__name__)
+
+MAX_TAG_LENGTH = 100
+
+
+def parse_tags(raw: str | None) -> List[str]:
+    """
+    JSON list (nový formát) alebo reťazec oddelený čiarkami (starý formát).
+    Starý reťazec môže byť náhodou platný JSON skalár (`2024`, `true`) –
+    taký sa berie ako text, nie ako prázdny zoznam.
+    """
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, list):
+        return normalize_tags(parsed)
+    if isinstance(parsed, str):
+        return split_tags(parsed)
+    return split_tags(raw)
+
+
+def split_tags(raw: str) -> List[str]:
+    """Tagy oddelené čiarkami (query parameter, starý formát stĺpca) – bez JSON."""
+    return normalize_tags(raw.split(","))
+
+
+def normalize_tags(tags: Iterable) -> List[str]:
+    """Oreže medzery a `#`, zahodí prázdne a duplicitné tagy (poradie ostáva)."""
+    out: List[str] = []
+    for t in tags:
+        tag = str(t).strip().lstrip("#").strip()[:MAX_TAG_LENGTH]
+        if tag and tag not in out:
+            out.append(tag)
+    return out
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def material_ids_with_all_tags(owner_id: int, tags: List[str]):
+    """
+    Subquery s ID materiálov, ktoré majú všetky `tags` (AND).
+    Ide len cez index (owner_id, tag, material_id).
+    """
+    tags = normalize_tags(tags)
+    return (
+        select(MaterialTag.material_id)
+        .where(MaterialTag.owner_id == owner_id, MaterialTag.tag.in_(tags))
+        .group_by(MaterialTag.material_id)
+        .having(func.count(MaterialTag.tag) == len(tags))
+    )
+
+
+def get_tag_cloud(db: Session, owner_id: int, subject_id: Optional[int] = None) -> List[Tuple[str, int]]:
+    """Počet materiálov pre každý tag používateľa – jeden GROUP BY dotaz."""
+    count = func.count(MaterialTag.material_id).label("count")
+    query = db.query(MaterialTag.tag, count).filter(MaterialTag.owner_id == owner_id)
+    if subject_id is not None:
+        query = query.filter(MaterialTag.subject_id == subject_id)
+    return query.group_by(MaterialTag.tag).order_by(count.desc(), MaterialTag.tag).all()
+
+# --------------------------------------------------------------------------- #
+# WRITE                                                                       #
+# --------------------------------------------------------------------------- #
+def set_material_tags(db: Session, material: StudyMaterial, tags: Iterable) -> List[str]:
+    """Prepíše tagy materiálu v JSON stĺpci aj v indexe. Necommituje."""
+    tags = normalize_tags(tags)
+    material.tags = json.dumps(tags, ensure_ascii=False)
+    db.execute(delete(MaterialTag).where(MaterialTag.material_id == material.id))
+    if tags:
+        db.execute(insert(MaterialTag), [
+            {
+                "material_id": material.id,
+                "tag": tag,
+                "owner_id": material.owner_id,
+                "subject_id": material.subject_id,
+            }
+            for tag in tags
+        ])
+    return tags
+
+
+def backfill_material_tags(db: Session) -> int:
+    """
+    Doplní index pre materiály, ktoré majú tagy len v JSON stĺpci
+    (dáta spred zavedenia `material_tags`). Commituje.
+    """
+    indexed = select(MaterialTag.material_id).where(MaterialTag.material_id == StudyMaterial.id)
+    missing = (
+        db.query(StudyMaterial)
+        .filter(
+            StudyMaterial.tags.isnot(None),
+            StudyMaterial.tags.notin_(["", "[]"]),
+            ~indexed.exists(),
+        )
+        .all()
+    )
+    for material in missing:
+        set_material_tags(db, material, parse_tags(material.tags))
+    db.commit()
+    if missing:
+        logger.info("Backfilled material_tags for %d materials", len(missing))
+    return len(missing)
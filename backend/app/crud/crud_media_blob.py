@@ -0,0 +1,117 @@
+"""
+CRUD pre MediaBlob – obsahovo adresované úložisko s počítaním referencií.
+
+Funkcie necommitujú; bežia v transakcii volajúceho (vytvorenie / zmazanie
+materiálu), aby počet referencií sedel so záznamami v `study_materials`.
+Výnimkou je `delete_unreferenced_objects` – volá sa až po commite a súbor
+zmaže len vtedy, ak naň medzitým nezačal ukazovať súbežný upload.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import file_utils
+from app.db.models.media_blob import MediaBlob
+from app.db.models.study_material import StudyMaterial
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+def get_blob(db: Session, sha256: str) -> Optional[MediaBlob]:
+    return db.query(MediaBlob).filter(MediaBlob.sha256 == sha256).first()
+
+
+def get_ref_count(db: Session, sha256: str) -> int:
+    return db.query(MediaBlob.ref_count).filter(MediaBlob.sha256 == sha256).scalar() or 0
+
+
+def is_object_referenced(db: Session, key: str) -> bool:
+    """Ukazuje na objekt `key` v úložisku nejaký blob alebo materiál?"""
+    if db.query(MediaBlob.sha256).filter(MediaBlob.file_path == key).first() is not None:
+        return True
+    return db.query(StudyMaterial.id).filter(StudyMaterial.file_path == key).first() is not None
+
+
+def acquire_blob(db: Session, sha256: str, size: int) -> MediaBlob:
+    """
+    Pridá referenciu na blob; ak ešte neexistuje, vytvorí jeho záznam.
+    Prvý upload rovnakého obsahu môže bežať súbežne – preto jeden príkaz
+    INSERT … ON CONFLICT DO UPDATE (SQLite, PostgreSQL), inak INSERT
+    v savepointe a pri kolízii UPDATE.
+    """
+    values = {
+        "sha256": sha256,
+        "file_path": str(file_utils.get_blob_relative_path(sha256)),
+        "size": size,
+        "ref_count": 1,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = (postgresql if dialect == "postgresql" else sqlite).insert(MediaBlob)
+        db.execute(
+            insert.values(**values).on_conflict_do_update(
+                index_elements=[MediaBlob.sha256],
+                set_={"ref_count": MediaBlob.ref_count + 1},
+            )
+        )
+    else:
+        updated = (
+            db.query(MediaBlob)
+            .filter(MediaBlob.sha256 == sha256)
+            .update({MediaBlob.ref_count: MediaBlob.ref_count + 1}, synchronize_session=False)
+        )
+        if not updated:
+            try:
+                with db.begin_nested():
+                    db.add(MediaBlob(**values))
+            except IntegrityError:
+                # záznam medzitým vložil súbežný upload
+                db.query(MediaBlob).filter(MediaBlob.sha256 == sha256).update(
+                    {MediaBlob.ref_count: MediaBlob.ref_count + 1}, synchronize_session=False
+                )
+    return get_blob(db, sha256)
+
+
+def release_blob(db: Session, sha256: str) -> Optional[str]:
+    """
+    Odoberie referenciu. Ak klesne na nulu, zmaže záznam a vráti kľúč
+    objektu v úložisku – ten má volajúci zmazať až po úspešnom commite.
+    """
+    blobs = db.query(MediaBlob).filter(MediaBlob.sha256 == sha256)
+    blobs.update({MediaBlob.ref_count: MediaBlob.ref_count - 1}, synchronize_session=False)
+    row = db.query(MediaBlob.ref_count, MediaBlob.file_path).filter(MediaBlob.sha256 == sha256).first()
+    if not row or row.ref_count > 0:
+        return None
+    blobs.delete(synchronize_session=False)
+    return row.file_path
+
+
+def delete_unreferenced_objects(db: Session, keys: Iterable[Optional[str]]) -> int:
+    """
+    Zmaže objekty z úložiska po commite zmazania. Pred každým znovu overí
+    (v novej transakcii), že naň neukazuje záznam, ktorý medzitým vytvoril
+    upload rovnakého obsahu. Pri chybe DB objekt radšej nechá – prípadnú
+    sirotu nájde sweeper. Vráti počet zmazaných.
+    """
+    storage = get_storage()
+    deleted = 0
+    for key in filter(None, keys):
+        try:
+            db.rollback()   # čerstvý snapshot
+            referenced = is_object_referenced(db, key)
+        except SQLAlchemyError as exc:
+            logger.warning("Could not verify references of %s, keeping it: %s", key, exc)
+            continue
+        if referenced:
+            logger.info("Storage object %s was reused by a concurrent upload, keeping it", key)
+            continue
+        if storage.delete(key):
+            deleted += 1
+    return deleted
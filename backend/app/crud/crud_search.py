@@ -0,0 +1,24 @@
+"""
+Fulltextové vyhľadávanie materiálov – tenká vrstva nad `app.database.search_backend`.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import search_backend
+from app.search import SearchHit
+
+
+def search_materials(
+    db: Session,
+    owner_id: int,
+    q: str,
+    subject_id: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[SearchHit]:
+    """Materiály vlastníka zoradené podľa relevancie (najlepšie prvé)."""
+    return search_backend.search(db, owner_id, q, subject_id=subject_id, limit=limit, offset=offset)
@@ -0,0 +1,189 @@
+"""
+CRUD pre UserStorageUsage – kvóta a počítadlo obsadeného miesta.
+
+Zmeny počítadla sú atomické UPDATE-y bez čítania (O(1)) a necommitujú;
+bežia v transakcii volajúceho spolu so vznikom / zmazaním materiálu.
+Materiál sa počíta plnou veľkosťou, aj keď jeho blob zdieľa s iným.
+Používateľ bez riadku (materiály spred zavedenia počítadla) ho dostane
+zo súčtu svojich materiálov – pri štarte (`backfill_storage_usage`), inak
+najneskôr pri ďalšom uploade.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.models.study_material import StudyMaterial
+from app.db.models.user_storage_usage import UserStorageUsage
+
+logger = logging.getLogger(__name__)
+
+
+class StorageQuotaExceeded(Exception):
+    """Upload by prekročil kvótu používateľa."""
+
+
+def _quota_expr():
+    return func.coalesce(UserStorageUsage.quota_bytes, settings.USER_STORAGE_QUOTA_BYTES)
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def get_storage_usage(db: Session, user_id: int) -> Optional[UserStorageUsage]:
+    return db.query(UserStorageUsage).filter(UserStorageUsage.user_id == user_id).first()
+
+
+def get_quota_bytes(usage: Optional[UserStorageUsage]) -> int:
+    if usage is not None and usage.quota_bytes is not None:
+        return usage.quota_bytes
+    return settings.USER_STORAGE_QUOTA_BYTES
+
+
+def _material_totals(db: Session, user_id: int) -> Tuple[int, int]:
+    """(súčet file_size, počet) materiálov používateľa – priamo zo `study_materials`."""
+    bytes_used, material_count = (
+        db.query(func.coalesce(func.sum(StudyMaterial.file_size), 0), func.count(StudyMaterial.id))
+        .filter(StudyMaterial.owner_id == user_id)
+        .one()
+    )
+    return int(bytes_used), int(material_count)
+
+
+def has_room_for(db: Session, user_id: int, size: int) -> bool:
+    """Rýchla kontrola pred uploadom (bez rezervácie)."""
+    usage = get_storage_usage(db, user_id)
+    used = usage.bytes_used if usage else _material_totals(db, user_id)[0]
+    return used + size <= get_quota_bytes(usage)
+
+# --------------------------------------------------------------------------- #
+# WRITE                                                                       #
+# --------------------------------------------------------------------------- #
+def _seed_storage_usage(db: Session, user_id: int) -> None:
+    """Vytvorí chýbajúci riadok zo súčtu existujúcich materiálov."""
+    bytes_used, material_count = _material_totals(db, user_id)
+    try:
+        with db.begin_nested():
+            db.add(UserStorageUsage(user_id=user_id, bytes_used=bytes_used, material_count=material_count))
+    except IntegrityError:
+        pass    # medzitým ho vytvoril súbežný upload
+
+
+def _try_reserve(db: Session, user_id: int, size: int) -> bool:
+    updated = (
+        db.query(UserStorageUsage)
+        .filter(
+            UserStorageUsage.user_id == user_id,
+            UserStorageUsage.bytes_used + size <= _quota_expr(),
+        )
+        .update(
+            {
+                UserStorageUsage.bytes_used: UserStorageUsage.bytes_used + size,
+                UserStorageUsage.material_count: UserStorageUsage.material_count + 1,
+                UserStorageUsage.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    return bool(updated)
+
+
+def reserve_storage(db: Session, user_id: int, size: int) -> None:
+    """
+    Pripočíta materiál k počítadlu, ak sa zmestí do kvóty; inak vyhodí
+    StorageQuotaExceeded. Podmienka je priamo v UPDATE, takže dva súbežné
+    uploady kvótu neprekročia.
+    """
+    if _try_reserve(db, user_id, size):
+        return
+    row_exists = db.query(UserStorageUsage.user_id).filter(UserStorageUsage.user_id == user_id).first()
+    if row_exists is None:
+        # riadok ešte neexistuje – založíme ho aj s už nahratými materiálmi
+        _seed_storage_usage(db, user_id)
+        if _try_reserve(db, user_id, size):
+            return
+    raise StorageQuotaExceeded(f"user {user_id}: {size} bytes over quota")
+
+
+def release_storage(db: Session, user_id: int, size: int, count: int = 1) -> None:
+    """Odpočíta zmazané materiály (nikdy pod nulu)."""
+    db.query(UserStorageUsage).filter(UserStorageUsage.user_id == user_id).update(
+        {
+            UserStorageUsage.bytes_used: case(
+                (UserStorageUsage.bytes_used > size, UserStorageUsage.bytes_used - size), else_=0
+            ),
+            UserStorageUsage.material_count: case(
+                (UserStorageUsage.material_count > count, UserStorageUsage.material_count - count), else_=0
+            ),
+            UserStorageUsage.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+
+
+def backfill_storage_usage(db: Session) -> int:
+    """
+    Založí chýbajúce riadky používateľom, ktorí majú materiály (dáta spred
+    zavedenia počítadla). Existujúce riadky nemení. Commituje.
+    """
+    has_row = select(UserStorageUsage.user_id).where(UserStorageUsage.user_id == StudyMaterial.owner_id)
+    totals = (
+        db.query(
+            StudyMaterial.owner_id,
+            func.coalesce(func.sum(StudyMaterial.file_size), 0),
+            func.count(StudyMaterial.id),
+        )
+        .filter(~has_row.exists())
+        .group_by(StudyMaterial.owner_id)
+        .all()
+    )
+    for owner_id, bytes_used, material_count in totals:
+        db.add(UserStorageUsage(user_id=owner_id, bytes_used=bytes_used, material_count=material_count))
+    try:
+        db.commit()
+    except IntegrityError:
+        # iný worker ich založil súčasne
+        db.rollback()
+        return 0
+    if totals:
+        logger.info("Backfilled storage usage for %d users", len(totals))
+    return len(totals)
+
+
+def rebuild_storage_usage(db: Session) -> int:
+    """
+    Prepočíta všetky počítadlá z `study_materials` jedným GROUP BY dotazom
+    (nastavené kvóty ostanú). Commituje, vráti počet používateľov s materiálmi.
+    """
+    totals = (
+        db.query(
+            StudyMaterial.owner_id,
+            func.coalesce(func.sum(StudyMaterial.file_size), 0),
+            func.count(StudyMaterial.id),
+        )
+        .group_by(StudyMaterial.owner_id)
+        .all()
+    )
+    now = datetime.utcnow()
+    db.query(UserStorageUsage).update(
+        {UserStorageUsage.bytes_used: 0, UserStorageUsage.material_count: 0, UserStorageUsage.updated_at: now},
+        synchronize_session=False,
+    )
+    existing = {row.user_id for row in db.query(UserStorageUsage.user_id)}
+    for owner_id, bytes_used, material_count in totals:
+        if owner_id in existing:
+            db.query(UserStorageUsage).filter(UserStorageUsage.user_id == owner_id).update(
+                {UserStorageUsage.bytes_used: bytes_used, UserStorageUsage.material_count: material_count},
+                synchronize_session=False,
+            )
+        else:
+            db.add(UserStorageUsage(user_id=owner_id, bytes_used=bytes_used, material_count=material_count))
+    db.commit()
+    logger.info("Rebuilt storage usage for %d users", len(totals))
+    return len(totals)
@@ -2,53 +2,71 @@
 import json
 import logging # Pridaj logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Tuple
 
 from fastapi import UploadFile
+from sqlalchemy import func, insert, literal, select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
-import PyPDF2 # Import PyPDF2
-import shutil # Pre shutil.copyfileobj
+from sqlalchemy.orm import Session, undefer_group
 
+from app.db.enums import ExtractionStatus
+from app.db.models.extraction_job import ExtractionJob
+from app.db.models.material_page import MaterialPage
 from app.db.models.study_material import StudyMaterial
 from app.schemas.study_material import StudyMaterialCreate, StudyMaterialUpdate
-from app.crud.crud_subject import get_subject # Predpokladáme správnu cestu
+from app.crud.crud_subject import subject_belongs_to_owner
+from app.crud import crud_extraction_cache, crud_material_tag, crud_media_blob, crud_storage_usage
 from app import file_utils
+from app.config import settings
 from app.db import models
 
 logger = logging.getLogger(__name__)
 
-def _extract_text_from_pdf(file_path_on_disk: Path) -> Optional[str]:
-    """Extrahuj text z PDF súboru."""
-    try:
-        text = ""
-        with file_path_on_disk.open("rb") as pdf_file_obj:
-            pdf_reader = PyPDF2.PdfReader(pdf_file_obj)
-            for page_num in range(len(pdf_reader.pages)):
-                page_obj = pdf_reader.pages[page_num]
-                page_text = page_obj.extract_text()
-                if page_text: # extract_text môže vrátiť None
-                    text += page_text + "\n" 
-        logger.info("Successfully extracted text from PDF: %s", file_path_on_disk.name)
-        return text.strip() if text.strip() else None
-    except Exception as e:
-        logger.error("Error extracting text from PDF %s: %s", file_path_on_disk.name, e, exc_info=True)
-        return None
+# --------------------------------------------------------------------------- #
+# CREATE                                                                      #
+# --------------------------------------------------------------------------- #
+class DuplicateMaterialError(Exception):
+    """Rovnaký obsah už v predmete je ako materiál `existing_id`."""
+
+    def __init__(self, existing_id: int):
+        super().__init__(f"Material {existing_id} has the same content")
+        self.existing_id = existing_id
+
+
+class StagedUpload(NamedTuple):
+    """Súbor uložený do dočasného súboru a zahashovaný, ešte bez záznamu v DB."""
+    tmp_file_path: Path
+    sha256: str
+    file_size: int
+    file_name: str
+    file_type: Optional[str]
 
-def _extract_text_from_txt(file_path_on_disk: Path) -> Optional[str]:
-    """Extrahuj text z TXT súboru."""
+
+def stage_upload(upload_file: UploadFile) -> Optional[StagedUpload]:
+    """
+    Jedným prechodom uloží upload do dočasného súboru, spočíta SHA-256,
+    veľkosť a podľa magic bytes určí typ súboru (nie podľa klienta).
+    Blokujúce – z async kódu volať cez threadpool. Pri chybe vráti None,
+    pri prekročení `MAX_UPLOAD_BYTES` vyhodí `file_utils.FileTooLargeError`.
+    """
+    tmp_file_path = file_utils.get_tmp_upload_path()
     try:
-        with file_path_on_disk.open("r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
-        logger.info("Successfully extracted text from TXT: %s", file_path_on_disk.name)
-        return text.strip() if text.strip() else None
-    except Exception as e:
-        logger.error("Error extracting text from TXT %s: %s", file_path_on_disk.name, e, exc_info=True)
+        saved = file_utils.save_upload_file_hashed(upload_file, tmp_file_path, settings.MAX_UPLOAD_BYTES)
+    except file_utils.FileTooLargeError:
+        tmp_file_path.unlink(missing_ok=True)
+        raise
+    except Exception as exc:
+        logger.exception("Saving upload failed: %s", exc)
+        tmp_file_path.unlink(missing_ok=True)
         return None
+    finally:
+        # Uisti sa, že stream súboru je zatvorený, aj keď save_upload_file to už robí
+        if not upload_file.file.closed:
+            upload_file.file.close()
+    file_type = file_utils.detect_file_type(saved.head, upload_file.filename, upload_file.content_type)
+    return StagedUpload(tmp_file_path, saved.sha256, saved.size, upload_file.filename, file_type)
+
 
-# --------------------------------------------------------------------------- #
-# CREATE                                                                      #
-# --------------------------------------------------------------------------- #
 def create_study_material(
     db: Session,
     material_meta: StudyMaterialCreate,
@@ -57,69 +75,255 @@ def create_study_material(
     owner_id: int,
 ) -> Optional[StudyMaterial]:
     """
-    • Uloží upload na disk (tmp → final).
-    • Vloží záznam do DB.
-    • Ak existuje duplicitná cesta, vráti None.
+    • Uloží upload do dočasného súboru a počas kopírovania spočíta SHA-256
+      (`stage_upload`; príliš veľký súbor → FileTooLargeError).
+    • Zvyšok rieši `create_study_material_from_tmp_file`.
+    Blokujúce – z async kódu volať cez threadpool.
     """
-    subject = get_subject(db, subject_id, owner_id)
-    if not subject:
+    if not subject_belongs_to_owner(db, subject_id, owner_id):
         return None
 
-    rel_path = str(file_utils.get_relative_file_path(owner_id, subject_id, upload_file.filename))
-    full_path: Path = file_utils.get_full_path_on_disk(rel_path)
+    staged = stage_upload(upload_file)
+    if staged is None:
+        return None
+
+    return create_study_material_from_tmp_file(
+        db,
+        material_meta,
+        tmp_file_path=staged.tmp_file_path,
+        sha256=staged.sha256,
+        file_size=staged.file_size,
+        file_name=staged.file_name,
+        file_type=staged.file_type,
+        subject_id=subject_id,
+        owner_id=owner_id,
+    )
+
 
-    duplicate = (
-        db.query(StudyMaterial)
+def _existing_hashes_in_subject(db: Session, subject_id: int, owner_id: int, hashes: List[str]) -> set[str]:
+    rows = (
+        db.query(StudyMaterial.blob_sha256)
         .filter(
             StudyMaterial.subject_id == subject_id,
             StudyMaterial.owner_id == owner_id,
-            StudyMaterial.file_path == rel_path,
+            StudyMaterial.blob_sha256.in_(hashes),
         )
-        .first()
+        .all()
     )
-    if duplicate:
-        logger.warning("Material duplicate: %s", rel_path)
-        return None
+    return {row.blob_sha256 for row in rows}
+
+
+def _add_material_for_staged(
+    db: Session,
+    material_meta: StudyMaterialCreate,
+    staged: StagedUpload,
+    subject_id: int,
+    owner_id: int,
+    created_blob_files: List[str],
+) -> StudyMaterial:
+    """
+    Započíta súbor do kvóty (StorageQuotaExceeded, ak sa nezmestí), presunie
+    ho do blob úložiska a pridá (neflushnutý) materiál s PENDING jobom.
+    """
+    crud_storage_usage.reserve_storage(db, owner_id, staged.file_size)
+    blob = crud_media_blob.acquire_blob(db, staged.sha256, staged.file_size)
+    if file_utils.promote_tmp_to_blob(staged.tmp_file_path, staged.sha256):
+        created_blob_files.append(staged.sha256)
+
+    obj = StudyMaterial(
+        title=material_meta.title,
+        description=material_meta.description,
+        material_type=material_meta.material_type,
+        file_name=staged.file_name,
+        file_path=blob.file_path,
+        blob_sha256=staged.sha256,
+        file_type=staged.file_type,
+        file_size=staged.file_size,
+        subject_id=subject_id,
+        owner_id=owner_id,
+    )
+    obj.extraction_job = ExtractionJob(status=ExtractionStatus.PENDING)
+    db.add(obj)
+    return obj
 
-    tmp = full_path.with_suffix(full_path.suffix + ".tmp")
 
+def _cleanup_failed_create(db: Session, staged: List[StagedUpload], created_blob_files: List[str]) -> None:
+    """Volá sa po rollbacku. Blob zmaže, len ak naň neodkazuje iná (súbežná) transakcia."""
+    for item in staged:
+        item.tmp_file_path.unlink(missing_ok=True)
+    crud_media_blob.delete_unreferenced_objects(
+        db, [file_utils.get_blob_relative_path(sha256).as_posix() for sha256 in created_blob_files]
+    )
+
+
+def create_study_material_from_tmp_file(
+    db: Session,
+    material_meta: StudyMaterialCreate,
+    *,
+    tmp_file_path: Path,
+    sha256: str,
+    file_size: int,
+    file_name: str,
+    file_type: Optional[str],
+    subject_id: int,
+    owner_id: int,
+) -> Optional[StudyMaterial]:
+    """
+    • Presunie už uložený dočasný súbor do obsahovo adresovaného úložiska.
+    • Rovnaký obsah je na disku len raz – materiál iba zvýši ref_count blobu.
+    • Vloží záznam do DB spolu s `ExtractionJob`; ak je obsah v extraction
+      cache, text prevezme z nej, inak ostane job PENDING pre worker.
+    • Ak je rovnaký obsah už v tom istom predmete, vyhodí DuplicateMaterialError.
+    • Ak by súbor prekročil kvótu používateľa, vyhodí StorageQuotaExceeded.
+    Dočasný súbor po sebe vždy uprace. Vlastníctvo predmetu overuje volajúci.
+    """
+    staged = StagedUpload(tmp_file_path, sha256, file_size, file_name, file_type)
+    created_blob_files: List[str] = []
     try:
-        file_utils.save_upload_file(upload_file, tmp)
-        size = tmp.stat().st_size or (upload_file.size or 0)
-        tmp.rename(full_path)
-
-        obj = StudyMaterial(
-            title=material_meta.title,
-            description=material_meta.description,
-            material_type=material_meta.material_type,
-            file_name=upload_file.filename,
-            file_path=rel_path,
-            file_type=upload_file.content_type,
-            file_size=size,
-            subject_id=subject_id,
-            owner_id=owner_id,
+        existing_id = (
+            db.query(StudyMaterial.id)
+            .filter(
+                StudyMaterial.subject_id == subject_id,
+                StudyMaterial.owner_id == owner_id,
+                StudyMaterial.blob_sha256 == sha256,
+            )
+            .scalar()
         )
-        db.add(obj)
+        if existing_id is not None:
+            logger.info("Material duplicate in subject %s: %s (material %s)", subject_id, sha256, existing_id)
+            tmp_file_path.unlink(missing_ok=True)
+            raise DuplicateMaterialError(existing_id)
+
+        obj = _add_material_for_staged(db, material_meta, staged, subject_id, owner_id, created_blob_files)
+        db.flush()
+        crud_extraction_cache.restore_from_cache(db, obj, obj.extraction_job)
         db.commit()
         db.refresh(obj)
         return obj
-    except Exception as exc:  # pylint: disable=broad-except
+    except DuplicateMaterialError:
+        raise
+    except crud_storage_usage.StorageQuotaExceeded:
+        db.rollback()
+        _cleanup_failed_create(db, [staged], created_blob_files)
+        raise
+    except Exception as exc:
         logger.exception("Create material failed: %s", exc)
-        file_utils.remove_file_from_disk(tmp)
         db.rollback()
+        _cleanup_failed_create(db, [staged], created_blob_files)
         return None
 
-# --------------------------------------------------------------------------- #
-# READ                                                                        #
-# --------------------------------------------------------------------------- #
-def get_study_material(db: Session, material_id: int, owner_id: int) -> Optional[StudyMaterial]:
+
+def create_study_materials_batch(
+    db: Session,
+    material_meta: StudyMaterialCreate,
+    staged: List[StagedUpload],
+    subject_id: int,
+    owner_id: int,
+) -> Optional[Tuple[List[StudyMaterial], List[Tuple[str, str]]]]:
+    """
+    Vytvorí materiály pre viac už uložených súborov v jednej transakcii.
+    Vráti (vytvorené, preskočené[(file_name, dôvod)]); pri chybe DB None
+    a nevytvorí sa nič. Duplicity (v predmete aj v rámci dávky) a súbory
+    nad kvótu sa preskočia.
+    Vlastníctvo predmetu overuje volajúci.
+    """
+    created_blob_files: List[str] = []
+    skipped: List[Tuple[str, str]] = []
+    try:
+        existing = _existing_hashes_in_subject(db, subject_id, owner_id, [s.sha256 for s in staged])
+        created: List[StudyMaterial] = []
+        for item in staged:
+            if item.sha256 in existing:
+                item.tmp_file_path.unlink(missing_ok=True)
+                skipped.append((item.file_name, "duplicate"))
+                continue
+            try:
+                created.append(
+                    _add_material_for_staged(db, material_meta, item, subject_id, owner_id, created_blob_files)
+                )
+            except crud_storage_usage.StorageQuotaExceeded:
+                item.tmp_file_path.unlink(missing_ok=True)
+                skipped.append((item.file_name, "quota exceeded"))
+                continue
+            existing.add(item.sha256)
+
+        db.flush()
+        for obj in created:
+            crud_extraction_cache.restore_from_cache(db, obj, obj.extraction_job)
+        db.commit()
+        for obj in created:
+            db.refresh(obj)
+        return created, skipped
+    except Exception as exc:
+        logger.exception("Batch create of materials failed: %s", exc)
+        db.rollback()
+        _cleanup_failed_create(db, staged, created_blob_files)
+        return None
+
+
+def get_extraction_job(db: Session, material_id: int, owner_id: int) -> Optional[ExtractionJob]:
     return (
-        db.query(StudyMaterial)
+        db.query(ExtractionJob)
+        .join(StudyMaterial, ExtractionJob.material_id == StudyMaterial.id)
         .filter(StudyMaterial.id == material_id, StudyMaterial.owner_id == owner_id)
         .first()
     )
 
 
+def backfill_extraction_jobs(db: Session) -> int:
+    """
+    Materiály spred zavedenia extraction_jobs sa extrahovali pri uploade,
+    takže dostanú COMPLETED job (bez textu = nepodporovaný typ, ako u workera).
+    Priebeh = počet strán; preto volať po backfille strán.
+    """
+    page_count = (
+        select(func.count(MaterialPage.id))
+        .where(MaterialPage.material_id == StudyMaterial.id)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        insert(ExtractionJob).from_select(
+            ["material_id", "status", "pages_done", "pages_total", "attempts", "created_at", "finished_at"],
+            select(
+                StudyMaterial.id,
+                literal(ExtractionStatus.COMPLETED, ExtractionJob.status.type),
+                page_count,
+                page_count,
+                literal(1),
+                StudyMaterial.uploaded_at,
+                StudyMaterial.uploaded_at,
+            ).where(~select(ExtractionJob.id).where(ExtractionJob.material_id == StudyMaterial.id).exists()),
+        )
+    )
+    db.commit()
+    if result.rowcount:
+        logger.info("Backfilled extraction jobs for %d materials", result.rowcount)
+    return result.rowcount
+
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def get_study_material(
+    db: Session,
+    material_id: int,
+    owner_id: int,
+    *,
+    with_text: bool = False,
+    with_ai: bool = False,
+) -> Optional[StudyMaterial]:
+    """
+    Bez flagov načíta len „ľahké“ stĺpce; `with_text` / `with_ai` pribalia
+    deferred skupiny (extracted_text, resp. ai_summary*) do toho istého dotazu.
+    """
+    query = db.query(StudyMaterial).filter(StudyMaterial.id == material_id, StudyMaterial.owner_id == owner_id)
+    if with_text:
+        query = query.options(undefer_group("text"))
+    if with_ai:
+        query = query.options(undefer_group("ai"))
+    return query.first()
+
+
 def get_study_materials_for_subject(
     db: Session,
     subject_id: int,
@@ -128,18 +332,35 @@ def get_study_materials_for_subject(
 ) -> list[StudyMaterial]:
     """
     Ak `tags` nie je None, vráti len materiály, ktoré obsahujú všetky tieto tagy.
-    (SQLite: jednoduché LIKE na JSON‐reťazec)
+    (filter ide cez index `material_tags`, nie cez JSON stĺpec)
     """
     query = db.query(StudyMaterial).filter(
         StudyMaterial.subject_id == subject_id,
         StudyMaterial.owner_id == owner_id,
     )
     if tags:
-        for tag in tags:
-            # v JSON uložené ako ["foo","bar"], takže hľadáme '"tag"'
-            query = query.filter(StudyMaterial.tags.like(f'%"{tag}"%'))
+        query = query.filter(
+            StudyMaterial.id.in_(crud_material_tag.material_ids_with_all_tags(owner_id, tags))
+        )
     return query.order_by(StudyMaterial.uploaded_at.desc()).all()
 
+
+def get_material_files_for_subject(db: Session, subject_id: int, owner_id: int) -> list:
+    """Len stĺpce potrebné na export súborov (bez načítania celých materiálov)."""
+    return (
+        db.query(
+            StudyMaterial.id,
+            StudyMaterial.file_name,
+            StudyMaterial.file_path,
+            StudyMaterial.file_type,
+            StudyMaterial.file_size,
+            StudyMaterial.uploaded_at,
+        )
+        .filter(StudyMaterial.subject_id == subject_id, StudyMaterial.owner_id == owner_id)
+        .order_by(StudyMaterial.uploaded_at, StudyMaterial.id)
+        .all()
+    )
+
 # --------------------------------------------------------------------------- #
 # UPDATE                                                                      #
 # --------------------------------------------------------------------------- #
@@ -150,7 +371,10 @@ def update_study_material(
     if not obj:
         return None
 
-    for k, v in material_update.model_dump(exclude_unset=True).items():
+    data = material_update.model_dump(exclude_unset=True)
+    if "tags" in data:
+        crud_material_tag.set_material_tags(db, obj, data.pop("tags") or [])
+    for k, v in data.items():
         setattr(obj, k, v)
 
     try:
@@ -171,9 +395,16 @@ def delete_study_material(db: Session, material_id: int, owner_id: int) -> Optio
         return None
 
     try:
-        file_utils.remove_file_from_disk(file_utils.get_full_path_on_disk(obj.file_path))
         db.delete(obj)
+        db.flush()
+        crud_storage_usage.release_storage(db, obj.owner_id, obj.file_size or 0)
+        if obj.blob_sha256:
+            # blob zmažeme až keď naň neukazuje žiadny materiál
+            orphan_key = crud_media_blob.release_blob(db, obj.blob_sha256)
+        else:
+            orphan_key = obj.file_path
         db.commit()
+        crud_media_blob.delete_unreferenced_objects(db, [orphan_key])
         return obj
     except SQLAlchemyError as exc:
         logger.exception("Delete material failed: %s", exc)
@@ -181,108 +412,46 @@ def delete_study_material(db: Session, material_id: int, owner_id: int) -> Optio
         return None
 
 
-def extract_text_content_from_file(file_path_on_disk: Path, mime_type: Optional[str]) -> Optional[str]:
-    """Zvolí správnu metódu extrakcie na základe MIME typu alebo koncovky."""
-    effective_mime_type = mime_type
-    if not effective_mime_type:
-        suffix = file_path_on_disk.suffix.lower()
-        if suffix == ".pdf": effective_mime_type = "application/pdf"
-        elif suffix == ".txt": effective_mime_type = "text/plain"
-        # elif suffix == ".docx": effective_mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        else:
-            logger.warning("Unsupported file extension for text extraction: %s", suffix)
-            return None
-    
-    if "pdf" in effective_mime_type:
-        return _extract_text_from_pdf(file_path_on_disk)
-    elif "text/plain" in effective_mime_type:
-        return _extract_text_from_txt(file_path_on_disk)
-    # elif "vnd.openxmlformats-officedocument.wordprocessingml.document" in effective_mime_type:
-    #     return _extract_text_from_docx(file_path_on_disk)
-    else:
-        logger.warning("Unsupported MIME type for text extraction: %s", effective_mime_type)
-        return None
-
-def create_study_material(
+def save_ai_analysis(
     db: Session,
-    material_meta: StudyMaterialCreate,
-    upload_file: UploadFile,
-    subject_id: int,
-    owner_id: int,
-) -> Optional[StudyMaterial]:
-    subject = get_subject(db, subject_id, owner_id)
-    if not subject:
-        return None
-
-    rel_path_str = str(file_utils.get_relative_file_path(owner_id, subject_id, upload_file.filename))
-    full_path_on_disk: Path = file_utils.get_full_path_on_disk(rel_path_str)
-
-    duplicate = db.query(StudyMaterial).filter(StudyMaterial.file_path == rel_path_str).first()
-    if duplicate:
-        logger.warning("Material duplicate at path: %s", rel_path_str)
-        return None
-
-    tmp_file_path = full_path_on_disk.with_suffix(full_path_on_disk.suffix + ".tmp")
-    file_size = 0
-    extracted_text: Optional[str] = None
-
+    material_id: int,
+    *,
+    summary: Optional[str],
+    error: Optional[str],
+    key_concepts: Optional[list[str]] = None,
+    tags: Optional[list[str]] = None,
+) -> bool:
+    """
+    Rozdelí výsledok `analyze_material_with_openai` do stĺpcov materiálu:
+    ai_summary / ai_summary_error, ai_key_concepts a (ak nie sú None) tagy.
+    """
+    obj = db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
+    if not obj:
+        return False
     try:
-        file_utils.save_upload_file(upload_file, tmp_file_path)
-        file_size = tmp_file_path.stat().st_size
-
-        # Extrahuj text po uložení do dočasného súboru
-        extracted_text = extract_text_content_from_file(tmp_file_path, upload_file.content_type)
-        
-        tmp_file_path.rename(full_path_on_disk) # Až po úspešnej extrakcii premenuj
-
-        obj = StudyMaterial(
-            title=material_meta.title,
-            description=material_meta.description,
-            material_type=material_meta.material_type,
-            file_name=upload_file.filename,
-            file_path=rel_path_str,
-            file_type=upload_file.content_type,
-            file_size=file_size,
-            extracted_text=extracted_text, # <<<< ULOŽENIE EXTRAHOVANÉHO TEXTU
-            subject_id=subject_id,
-            owner_id=owner_id,
-        )
-        db.add(obj)
+        obj.ai_summary = summary
+        obj.ai_summary_error = error
+        if key_concepts is not None:
+            obj.ai_key_concepts = json.dumps(key_concepts, ensure_ascii=False)
+        if tags is not None:
+            crud_material_tag.set_material_tags(db, obj, tags)
         db.commit()
-        db.refresh(obj)
-        return obj
-    except Exception as exc:
-        logger.exception("Create material or text extraction failed: %s", exc)
-        if tmp_file_path.exists(): file_utils.remove_file_from_disk(tmp_file_path)
-        if full_path_on_disk.exists() and not Path(rel_path_str).name == tmp_file_path.name : # Ak sa stihol premenovať pred chybou
-             file_utils.remove_file_from_disk(full_path_on_disk)
+        return True
+    except SQLAlchemyError as exc:
+        logger.exception("Saving AI analysis failed: %s", exc)
         db.rollback()
-        return None
-    finally:
-        # Uisti sa, že stream súboru je zatvorený, aj keď save_upload_file to už robí
-        if not upload_file.file.closed:
-            upload_file.file.close()
-
+        return False
 
-def _deserialize_tags(raw: str | None) -> list[str]:
-    if raw is None:
-        return []
-    try:
-        return json.loads(raw) if raw.startswith("[") else [t.strip() for t in raw.split(",") if t.strip()]
-    except Exception:
-        return []
 
 def update_material_tags(db: Session, material_id: int, tags: list[str]) -> bool:
     obj = db.query(StudyMaterial).filter(StudyMaterial.id == material_id).first()
     if not obj:
         return False
     try:
-        obj.tags = json.dumps(tags, ensure_ascii=False)
-        db.add(obj)
+        crud_material_tag.set_material_tags(db, obj, tags)
         db.commit()
         return True
     except SQLAlchemyError as exc:
         logger.exception("Saving tags failed: %s", exc)
         db.rollback()
         return False
-
@@ -11,6 +11,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, selectinload
 
 from app.db import models
+from app.crud import crud_media_blob, crud_storage_usage
 from app.crud.crud_user import get_user
 from app.services.achievement_service import check_and_grant_achievements
 
@@ -28,6 +29,26 @@ def get_subject(db: Session, subject_id: int, owner_id: int) -> Optional[models.
     )
 
 
+def subject_belongs_to_owner(db: Session, subject_id: int, owner_id: int) -> bool:
+    """Lacná kontrola vlastníctva – bez načítania tém a materiálov."""
+    return (
+        db.query(models.Subject.id)
+        .filter(models.Subject.id == subject_id, models.Subject.owner_id == owner_id)
+        .first()
+        is not None
+    )
+
+
+def get_subject_name(db: Session, subject_id: int, owner_id: int) -> Optional[str]:
+    """Názov predmetu; None ak neexistuje alebo nepatrí používateľovi."""
+    row = (
+        db.query(models.Subject.name)
+        .filter(models.Subject.id == subject_id, models.Subject.owner_id == owner_id)
+        .first()
+    )
+    return row.name if row else None
+
+
 def get_subjects_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100) -> List[models.Subject]:
     return (
         db.query(models.Subject)
@@ -84,8 +105,18 @@ def delete_subject(db: Session, subject_id: int, owner_id: int) -> Optional[mode
     if not obj:
         return None
     try:
+        # spolu s predmetom sa zmažú aj materiály – uvoľníme ich bloby / súbory
+        blob_hashes = [m.blob_sha256 for m in obj.materials if m.blob_sha256]
+        orphan_keys = [m.file_path for m in obj.materials if not m.blob_sha256]
+        freed_bytes = sum(m.file_size or 0 for m in obj.materials)
+        material_count = len(obj.materials)
         db.delete(obj)
+        db.flush()
+        if material_count:
+            crud_storage_usage.release_storage(db, owner_id, freed_bytes, material_count)
+        orphan_keys += [crud_media_blob.release_blob(db, sha) for sha in blob_hashes]
         db.commit()
+        crud_media_blob.delete_unreferenced_objects(db, orphan_keys)
         return obj
     except SQLAlchemyError as exc:
         logger.exception("Delete subject failed: %s", exc)
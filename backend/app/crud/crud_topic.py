@@ -6,14 +6,15 @@ Zachované funkcie:
     • get_topics_by_subject
     • create_topic
     • update_topic
-    • analyze_topic_and_save_estimates
+    • save_topic_ai_analysis   (samotné volanie OpenAI je async – v routeri)
+    • save_topics_ai_analysis  (všetky témy predmetu v jednej transakcii)
     • delete_topic
 """
 
 from __future__ import annotations
 
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, selectinload
@@ -21,7 +22,7 @@ from sqlalchemy.orm import Session, selectinload
 from app.db import models
 from app.db.enums import TopicStatus
 from app.db.models.subject import Subject as SubjectModel
-from app.services.ai_service.topic_analyzer import update_topic_with_ai_analysis
+from app.services.ai_service.topic_analyzer import apply_ai_analysis
 from app.crud.crud_subject import get_subject
 
 logger = logging.getLogger(__name__)
@@ -98,14 +99,14 @@ def update_topic(db: Session, topic_id: int, topic_update, owner_id: int) -> Opt
 # --------------------------------------------------------------------------- #
 # AI ANALÝZA                                                                  #
 # --------------------------------------------------------------------------- #
-def analyze_topic_and_save_estimates(db: Session, topic_id: int, owner_id: int) -> Optional[models.Topic]:
-    obj = get_topic(db, topic_id, owner_id, load_subject_with_materials=True)
+def save_topic_ai_analysis(db: Session, topic_id: int, owner_id: int, ai: dict) -> Optional[models.Topic]:
+    """Uloží výsledok `topic_analyzer.analyze_topic_with_openai` do témy."""
+    obj = get_topic(db, topic_id, owner_id)
     if not obj:
         return None
 
     try:
-        mats = obj.subject.materials if obj.subject else []
-        update_topic_with_ai_analysis(obj, db_materials=mats)
+        apply_ai_analysis(obj, ai)
         db.commit()
         db.refresh(obj)
         return obj
@@ -114,6 +115,31 @@ def analyze_topic_and_save_estimates(db: Session, topic_id: int, owner_id: int)
         db.rollback()
         return None
 
+
+def save_topics_ai_analysis(
+    db: Session, subject_id: int, owner_id: int, results: Dict[int, dict]
+) -> Optional[List[models.Topic]]:
+    """
+    Uloží výsledky analýzy viacerých tém predmetu (`topic_id -> ai`) jedným
+    commitom – buď sa zapíšu všetky, alebo žiadny. Témy, ktoré medzitým
+    zmizli, preskočí. Vráti témy predmetu zoradené podľa názvu.
+    """
+    subj = get_subject(db, subject_id, owner_id)
+    if not subj:
+        return None
+
+    try:
+        for topic in subj.topics:
+            ai = results.get(topic.id)
+            if ai is not None:
+                apply_ai_analysis(topic, ai)
+        db.commit()
+        return sorted(subj.topics, key=lambda t: t.name)
+    except SQLAlchemyError as exc:
+        logger.exception("AI analyze subject topics failed: %s", exc)
+        db.rollback()
+        return None
+
 # --------------------------------------------------------------------------- #
 # DELETE                                                                      #
 # --------------------------------------------------------------------------- #
@@ -0,0 +1,123 @@
+"""
+CRUD pre UploadSession (resumable chunked upload).
+
+Session bez nového chunku dlhšie ako `UPLOAD_SESSION_TTL_HOURS` (podľa
+`updated_at`) je expirovaná: API ju už nevidí a `purge_expired_upload_sessions`
+ju zmaže aj s rozpracovaným súborom.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import file_utils
+from app.config import settings
+from app.db.models.upload_session import UploadSession
+
+logger = logging.getLogger(__name__)
+
+
+def expiry_cutoff() -> datetime:
+    """Session s `updated_at` pred týmto časom je expirovaná."""
+    return datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+
+# --------------------------------------------------------------------------- #
+# READ                                                                        #
+# --------------------------------------------------------------------------- #
+def get_upload_session(db: Session, upload_id: str, subject_id: int, owner_id: int) -> Optional[UploadSession]:
+    return (
+        db.query(UploadSession)
+        .filter(
+            UploadSession.id == upload_id,
+            UploadSession.subject_id == subject_id,
+            UploadSession.owner_id == owner_id,
+            UploadSession.updated_at >= expiry_cutoff(),
+        )
+        .first()
+    )
+
+
+def pending_upload_bytes(db: Session, owner_id: int) -> int:
+    """Súčet veľkostí rozpracovaných (neexpirovaných) uploadov používateľa."""
+    return int(
+        db.query(func.coalesce(func.sum(UploadSession.total_size), 0))
+        .filter(UploadSession.owner_id == owner_id, UploadSession.updated_at >= expiry_cutoff())
+        .scalar()
+    )
+
+# --------------------------------------------------------------------------- #
+# CREATE                                                                      #
+# --------------------------------------------------------------------------- #
+def create_upload_session(db: Session, payload, subject_id: int, owner_id: int) -> Optional[UploadSession]:
+    obj = UploadSession(
+        id=uuid.uuid4().hex,
+        owner_id=owner_id,
+        subject_id=subject_id,
+        file_name=payload.file_name,
+        file_type=payload.file_type,
+        total_size=payload.total_size,
+        received_bytes=0,
+        title=payload.title,
+        description=payload.description,
+        material_type=payload.material_type,
+    )
+    try:
+        db.add(obj)
+        db.commit()
+        db.refresh(obj)
+        return obj
+    except SQLAlchemyError as exc:
+        logger.exception("Create upload session failed: %s", exc)
+        db.rollback()
+        return None
+
+# --------------------------------------------------------------------------- #
+# UPDATE                                                                      #
+# --------------------------------------------------------------------------- #
+def set_received_bytes(db: Session, obj: UploadSession, received_bytes: int) -> UploadSession:
+    obj.received_bytes = received_bytes
+    obj.updated_at = datetime.utcnow()     # aj pri rovnakej hodnote – session žije
+    db.commit()
+    db.refresh(obj)
+    return obj
+
+# --------------------------------------------------------------------------- #
+# DELETE                                                                      #
+# --------------------------------------------------------------------------- #
+def delete_upload_session(db: Session, obj: UploadSession) -> None:
+    """Zmaže session aj jej rozpracovaný súbor."""
+    file_utils.get_chunked_upload_path(obj.id).unlink(missing_ok=True)
+    try:
+        db.delete(obj)
+        db.commit()
+    except SQLAlchemyError as exc:
+        logger.exception("Delete upload session failed: %s", exc)
+        db.rollback()
+
+
+def purge_expired_upload_sessions(db: Session, owner_id: Optional[int] = None) -> int:
+    """Zmaže expirované session (voliteľne len jedného používateľa) aj ich súbory."""
+    q = db.query(UploadSession.id).filter(UploadSession.updated_at < expiry_cutoff())
+    if owner_id is not None:
+        q = q.filter(UploadSession.owner_id == owner_id)
+    expired = [upload_id for (upload_id,) in q.all()]
+    if not expired:
+        return 0
+    try:
+        db.query(UploadSession).filter(UploadSession.id.in_(expired)).delete(synchronize_session=False)
+        db.commit()
+    except SQLAlchemyError as exc:
+        logger.exception("Purge of expired upload sessions failed: %s", exc)
+        db.rollback()
+        return 0
+    for upload_id in expired:
+        file_utils.get_chunked_upload_path(upload_id).unlink(missing_ok=True)
+    logger.info("Purged %d expired upload sessions", len(expired))
+    return len(expired)
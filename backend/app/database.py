@@ -3,6 +3,7 @@ from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
 from app.config import settings # Import settings
+from app.search import get_search_backend
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
@@ -24,6 +25,9 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Fulltext: SQLite → FTS5, PostgreSQL → tsvector + GIN (pozri app/search)
+search_backend = get_search_backend(engine.dialect.name)
+
 def get_db():
     db = SessionLocal()
     if db.bind and db.bind.dialect.name == "sqlite":
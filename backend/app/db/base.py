@@ -14,9 +14,25 @@ def init_db(engine): # Prijme engine ako argument
     from .models.topic import Topic
     from .models.study_plan import StudyPlan, StudyBlock
     from .models.study_material import StudyMaterial
+    from .models.extraction_job import ExtractionJob
+    from .models.material_page import MaterialPage
+    from .models.media_blob import MediaBlob
+    from .models.extraction_cache import ExtractionCacheEntry
+    from .models.upload_session import UploadSession
+    from .models.material_tag import MaterialTag
+    from .models.user_storage_usage import UserStorageUsage
+    from .models.llm_cache import LlmCacheEntry
     # Ak máš __init__.py v app.db.models, ktorý importuje všetky modely, stačilo by:
     # from . import models # a potom by si sa uistil, že __init__.py v models ich naozaj má
 
     print("[DB INIT - base.py] Attempting to create database tables...")
     Base.metadata.create_all(bind=engine)
-    print("[DB INIT - base.py] Database tables process finished.")
\ No newline at end of file
+    print("[DB INIT - base.py] Database tables process finished.")
+
+    # create_all nemení existujúce tabuľky – chýbajúce stĺpce/indexy doplníme
+    from app.db.migrations import upgrade_schema
+    upgrade_schema(engine)
+
+    # fulltextový index (FTS5 / tsvector) nie je súčasť metadata
+    from app.database import search_backend
+    search_backend.ensure_schema(engine)
\ No newline at end of file
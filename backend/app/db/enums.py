@@ -48,4 +48,11 @@ class AchievementCriteriaType(str, enum.Enum):
     TOPICS_CREATED_PER_SUBJECT = "topics_created_per_subject"
     PLANS_GENERATED_OR_UPDATED = "plans_generated_or_updated"
     # BLOCKS_COMPLETED_ON_TIME = "blocks_completed_on_time" # Zatiaľ vynecháme
-    TOTAL_MATERIALS_UPLOADED = "total_materials_uploaded"
\ No newline at end of file
+    TOTAL_MATERIALS_UPLOADED = "total_materials_uploaded"
+
+# Stav úlohy extrakcie textu z nahraného materiálu
+class ExtractionStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -0,0 +1,121 @@
+# backend/app/db/migrations.py
+"""
+Doplnenie schémy existujúcej databázy (volá `init_db` po `create_all`).
+
+`create_all` vytvorí len chýbajúce tabuľky – do existujúcich nepridá stĺpce
+ani nezmení obmedzenia. Tu sa preto idempotentne:
+  • pridajú chýbajúce stĺpce modelov (musia byť nullable) aj s FK,
+  • vytvoria chýbajúce indexy,
+  • odstráni pôvodné UNIQUE(file_path) zo `study_materials` – materiály
+    teraz zdieľajú bloby, takže rovnaká cesta môže byť viackrát.
+SQLite nevie zrušiť obmedzenie cez ALTER, tabuľka sa preto prebuduje
+(kópia riadkov s rovnakými id – FTS index podľa rowid ostáva platný,
+triggre znovu vytvorí `search_backend.ensure_schema`).
+Na čerstvej DB nerobí nič.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List
+
+from sqlalchemy import Column, Table, inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from app.db.base import Base
+
+logger = logging.getLogger(__name__)
+
+# (tabuľka, stĺpce) UNIQUE obmedzení, ktoré nové modely už nemajú
+DROPPED_UNIQUE_CONSTRAINTS = [("study_materials", ["file_path"])]
+
+
+def upgrade_schema(engine: Engine) -> None:
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            _add_missing_columns(conn, table, {c["name"] for c in inspector.get_columns(table.name)})
+
+    for table_name, columns in DROPPED_UNIQUE_CONSTRAINTS:
+        if table_name in existing_tables:
+            _drop_unique_constraint(engine, Base.metadata.tables[table_name], columns)
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def _column_ddl(conn: Connection, column: Column) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+    for fk in column.foreign_keys:
+        ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+        if fk.ondelete:
+            ddl += f" ON DELETE {fk.ondelete}"
+    return ddl
+
+
+def _add_missing_columns(conn: Connection, table: Table, existing: set) -> None:
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        if not column.nullable:
+            logger.error("Cannot add NOT NULL column %s.%s automatically", table.name, column.name)
+            continue
+        conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(conn, column)}")
+        logger.info("Added column %s.%s", table.name, column.name)
+
+
+def _drop_unique_constraint(engine: Engine, table: Table, columns: List[str]) -> None:
+    inspector = inspect(engine)
+    matching = [
+        uc for uc in inspector.get_unique_constraints(table.name) if uc["column_names"] == columns
+    ]
+    if not matching:
+        return
+
+    if engine.dialect.name == "sqlite":
+        _rebuild_sqlite_table(engine, table)
+    else:
+        with engine.begin() as conn:
+            for uc in matching:
+                if engine.dialect.name == "mysql":
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} DROP INDEX {uc['name']}")
+                else:
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} DROP CONSTRAINT {uc['name']}")
+    logger.info("Dropped UNIQUE(%s) from %s", ", ".join(columns), table.name)
+
+
+def _rebuild_sqlite_table(engine: Engine, table: Table) -> None:
+    """Postup z dokumentácie SQLite: nová tabuľka, kópia, drop, rename."""
+    tmp_name = f"_{table.name}_rebuild"
+    create_sql = str(CreateTable(table).compile(dialect=engine.dialect)).replace(
+        f"CREATE TABLE {table.name} ", f"CREATE TABLE {tmp_name} ", 1
+    )
+    with engine.connect() as conn:
+        # foreign_keys sa dá prepnúť len mimo transakcie (pysqlite BEGIN
+        # pošle až pred prvým DML, takže PRAGMA v autobegin ešte platí)
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.commit()
+        try:
+            with conn.begin():
+                existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+                columns = ", ".join(c.name for c in table.columns if c.name in existing)
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {tmp_name}")   # zvyšok po prerušenom behu
+                conn.exec_driver_sql(create_sql)
+                conn.exec_driver_sql(
+                    f"INSERT INTO {tmp_name} ({columns}) SELECT {columns} FROM {table.name}"
+                )
+                conn.exec_driver_sql(f"DROP TABLE {table.name}")
+                conn.exec_driver_sql(f"ALTER TABLE {tmp_name} RENAME TO {table.name}")
+                problems = conn.exec_driver_sql("PRAGMA foreign_key_check").fetchall()
+                if problems:
+                    raise RuntimeError(f"Foreign key check failed after rebuilding {table.name}: {problems[:5]}")
+        finally:
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+            conn.commit()
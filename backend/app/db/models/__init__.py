@@ -18,6 +18,14 @@ from .subject import Subject
 from .topic import Topic
 from .study_plan import StudyPlan, StudyBlock
 from .study_material import StudyMaterial
+from .extraction_job import ExtractionJob
+from .material_page import MaterialPage
+from .media_blob import MediaBlob
+from .extraction_cache import ExtractionCacheEntry
+from .upload_session import UploadSession
+from .material_tag import MaterialTag
+from .user_storage_usage import UserStorageUsage
+from .llm_cache import LlmCacheEntry
 
 from .achievement import Achievement
 from .user_achievement import UserAchievement
\ No newline at end of file
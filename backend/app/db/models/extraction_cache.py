@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+
+from ..base import Base
+
+
+class ExtractionCacheEntry(Base):
+    """Výsledok extrakcie pre daný obsah (SHA-256) a verziu extraktora, zlib-komprimovaný."""
+
+    __tablename__ = "extraction_cache"
+
+    sha256            = Column(String(64), primary_key=True)
+    extractor_version = Column(String(32), primary_key=True)
+
+    # strany oddelené znakom \f, komprimované zlib-om
+    pages_zlib = Column(LargeBinary, nullable=False)
+    page_count = Column(Integer, nullable=False, default=0)
+    char_count = Column(Integer, nullable=False, default=0)
+
+    hit_count    = Column(Integer, nullable=False, default=0)
+    created_at   = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, Text, DateTime,
+    Enum as SQLAlchemyEnum, ForeignKey,
+)
+from sqlalchemy.orm import relationship
+
+from ..base import Base
+from app.db.enums import ExtractionStatus
+
+
+class ExtractionJob(Base):
+    """Záznam o extrakcii textu – jeden na materiál, spracúva ho process pool."""
+
+    __tablename__ = "extraction_jobs"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    material_id = Column(
+        Integer, ForeignKey("study_materials.id", ondelete="CASCADE"),
+        nullable=False, unique=True, index=True,
+    )
+    status = Column(
+        SQLAlchemyEnum(ExtractionStatus, name="extraction_status_enum"),
+        default=ExtractionStatus.PENDING, nullable=False, index=True,
+    )
+
+    # priebeh (pri PDF po stranách)
+    pages_done  = Column(Integer, default=0, nullable=False)
+    pages_total = Column(Integer, nullable=True)
+    attempts    = Column(Integer, default=0, nullable=False)
+    error       = Column(Text, nullable=True)
+
+    created_at  = Column(DateTime, default=datetime.utcnow)
+    started_at  = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    material = relationship("StudyMaterial", back_populates="extraction_job")
@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+
+from ..base import Base
+
+
+class LlmCacheEntry(Base):
+    """Odpoveď LLM pre daný (model, teplota, normalizovaný prompt) – pozri `services.ai_service.llm_cache`."""
+
+    __tablename__ = "llm_response_cache"
+
+    key   = Column(String(64), primary_key=True)   # SHA-256 kľúča
+    model = Column(String(100), nullable=False)
+
+    response   = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+
+    hit_count    = Column(Integer, nullable=False, default=0)
+    created_at   = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+    # eviction podľa LRU
+    __table_args__ = (Index("ix_llm_response_cache_last_used", "last_used_at"),)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from ..base import Base
+
+
+class MaterialPage(Base):
+    """Text jednej strany (pri TXT jedného úseku) extrahovaného materiálu."""
+
+    __tablename__ = "material_pages"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    material_id = Column(Integer, ForeignKey("study_materials.id", ondelete="CASCADE"), nullable=False)
+    page_no     = Column(Integer, nullable=False)  # od 1
+    text        = Column(Text, nullable=False, default="")
+    char_count  = Column(Integer, nullable=False, default=0)
+
+    material = relationship("StudyMaterial", back_populates="pages")
+
+    __table_args__ = (UniqueConstraint("material_id", "page_no", name="_material_page_uc"),)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from ..base import Base
+
+
+class MaterialTag(Base):
+    """
+    Normalizovaný tag materiálu (jeden riadok = jeden tag jedného materiálu).
+    `StudyMaterial.tags` (JSON) ostáva na výstup, filtrovanie ide cez túto tabuľku.
+    """
+
+    __tablename__ = "material_tags"
+
+    material_id = Column(Integer, ForeignKey("study_materials.id", ondelete="CASCADE"), primary_key=True)
+    tag         = Column(String(100), primary_key=True)
+    # denormalizované z materiálu, aby filtre a tag-cloud nemuseli joinovať
+    owner_id    = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject_id  = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+
+    material = relationship("StudyMaterial", back_populates="tag_rows")
+
+    __table_args__ = (
+        Index("ix_material_tags_owner_tag", "owner_id", "tag", "material_id"),
+    )
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from ..base import Base
+
+
+class MediaBlob(Base):
+    """Obsahovo adresovaný súbor (SHA-256) zdieľaný materiálmi s rovnakým obsahom."""
+
+    __tablename__ = "media_blobs"
+
+    sha256     = Column(String(64), primary_key=True)
+    file_path  = Column(String, nullable=False, unique=True)  # kľúč v úložisku (app.storage)
+    size       = Column(Integer, nullable=False)
+    ref_count  = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -3,7 +3,7 @@ from sqlalchemy import (
     Column, Integer, String, Text, DateTime,
     Enum as SQLAlchemyEnum, ForeignKey,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from ..base import Base
 from app.db.enums import MaterialTypeEnum
@@ -14,7 +14,9 @@ class StudyMaterial(Base):
 
     id          = Column(Integer, primary_key=True, index=True)
     file_name   = Column(String,  nullable=False)
-    file_path   = Column(String,  nullable=False, unique=True)
+    # pri obsahovo adresovaných súboroch je to cesta k blobu (zdieľaná)
+    file_path   = Column(String,  nullable=False, index=True)
+    blob_sha256 = Column(String(64), ForeignKey("media_blobs.sha256"), nullable=True, index=True)
     file_type   = Column(String,  nullable=True)
     file_size   = Column(Integer, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -27,13 +29,39 @@ class StudyMaterial(Base):
     subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
     owner_id   = Column(Integer, ForeignKey("users.id",    ondelete="CASCADE"), nullable=False)
 
-    extracted_text    = Column(Text, nullable=True)
-    ai_summary        = Column(Text, nullable=True)
-    ai_summary_error  = Column(Text, nullable=True)
+    # veľké textové stĺpce sa načítajú až pri prístupe (skupiny "text" a "ai"),
+    # zoznamy a kontroly vlastníctva ich tak nikdy nečítajú
+    extracted_text    = deferred(Column(Text, nullable=True), group="text")
+    ai_summary        = deferred(Column(Text, nullable=True), group="ai")
+    ai_summary_error  = deferred(Column(Text, nullable=True), group="ai")
+    ai_key_concepts   = deferred(Column(Text, nullable=True), group="ai")   # JSON list
+
+    # štatistiky textu – počíta ich extrakcia (NULL kým nedobehne)
+    page_count           = Column(Integer, nullable=True)
+    word_count           = Column(Integer, nullable=True)
+    char_count           = Column(Integer, nullable=True)
+    reading_time_minutes = Column(Integer, nullable=True)
 
     # ⬇️  JSON-serializovaný list; SQLite nemá ARRAY
+    # (filtrovanie ide cez tabuľku material_tags, drží ju crud_material_tag)
     tags = Column(Text, default="[]")
 
     # vzťahy
     subject = relationship("Subject", back_populates="materials")
     owner   = relationship("User",    back_populates="study_materials_uploaded")
+    extraction_job = relationship(
+        "ExtractionJob", back_populates="material", uselist=False,
+        cascade="all, delete-orphan", passive_deletes=True, lazy="selectin",
+    )
+    pages = relationship(
+        "MaterialPage", back_populates="material", order_by="MaterialPage.page_no",
+        cascade="all, delete-orphan", passive_deletes=True, lazy="noload",
+    )
+    tag_rows = relationship(
+        "MaterialTag", back_populates="material",
+        cascade="all, delete-orphan", passive_deletes=True, lazy="noload",
+    )
+
+    @property
+    def extraction_status(self):
+        return self.extraction_job.status if self.extraction_job else None
@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, Text, DateTime,
+    Enum as SQLAlchemyEnum, ForeignKey,
+)
+
+from ..base import Base
+from app.db.enums import MaterialTypeEnum
+
+
+class UploadSession(Base):
+    """Rozpracovaný chunked upload; StudyMaterial vznikne až pri dokončení, potom sa záznam zmaže."""
+
+    __tablename__ = "upload_sessions"
+
+    id         = Column(String(32), primary_key=True)  # uuid4 hex
+    owner_id   = Column(Integer, ForeignKey("users.id",    ondelete="CASCADE"), nullable=False, index=True)
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+
+    file_name      = Column(String, nullable=False)
+    file_type      = Column(String, nullable=True)
+    total_size     = Column(BigInteger, nullable=False)
+    received_bytes = Column(BigInteger, nullable=False, default=0)
+
+    # meta-info budúceho materiálu
+    title         = Column(String, nullable=True)
+    description   = Column(Text, nullable=True)
+    material_type = Column(SQLAlchemyEnum(MaterialTypeEnum, name="material_type_enum"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
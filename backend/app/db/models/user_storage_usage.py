@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+
+from ..base import Base
+
+
+class UserStorageUsage(Base):
+    """
+    Počítadlo obsadeného miesta používateľa (súčet `file_size` jeho materiálov).
+    Mení sa v tej istej transakcii ako vytvorenie / zmazanie materiálu.
+    """
+
+    __tablename__ = "user_storage_usage"
+
+    user_id        = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    bytes_used     = Column(BigInteger, nullable=False, default=0)
+    material_count = Column(Integer, nullable=False, default=0)
+    # NULL = settings.USER_STORAGE_QUOTA_BYTES
+    quota_bytes    = Column(BigInteger, nullable=True)
+    updated_at     = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
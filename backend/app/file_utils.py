@@ -1,10 +1,87 @@
-import os
+import codecs
+import hashlib
+import logging
 import shutil
+import uuid
 from pathlib import Path
+from typing import NamedTuple, Optional
 from fastapi import UploadFile
 from app.config import settings
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
 
 MEDIA_ROOT = Path(settings.MEDIA_FILES_BASE_DIR)
+BLOBS_DIR = "blobs"
+TMP_DIR = "tmp"
+CHUNKED_UPLOADS_DIR = "uploads"   # v TMP_DIR
+COPY_CHUNK_SIZE = 1024 * 1024
+# koľko úvodných bajtov stačí na rozpoznanie typu súboru
+SNIFF_BYTES = 2048
+
+# magic bytes → MIME typ (poradie je dôležité)
+_MAGIC_NUMBERS = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),  # starý .doc/.ppt
+    (b"PK\x03\x04", "application/zip"),
+]
+# ZIP kontajnery, ktoré vieme rozlíšiť len podľa koncovky
+_ZIP_BASED_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".odt": "application/vnd.oasis.opendocument.text",
+}
+
+
+class FileTooLargeError(Exception):
+    """Upload prekročil `settings.MAX_UPLOAD_BYTES`."""
+
+
+class SavedFile(NamedTuple):
+    sha256: str
+    size: int
+    head: bytes     # prvých SNIFF_BYTES bajtov (na rozpoznanie typu)
+
+
+def sniff_mime_type(head: bytes, file_name: Optional[str] = None) -> Optional[str]:
+    """MIME typ podľa magic bytes; None ak sa nedá určiť (napr. prázdny súbor)."""
+    if not head:
+        return None
+    for magic, mime_type in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            if mime_type == "application/zip" and file_name:
+                return _ZIP_BASED_TYPES.get(Path(file_name).suffix.lower(), mime_type)
+            return mime_type
+    if b"\x00" not in head:
+        try:
+            # posledný znak môže byť v hlavičke useknutý – final=False
+            codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+            return "text/plain"
+        except UnicodeDecodeError:
+            pass
+    return "application/octet-stream"
+
+
+def detect_file_type(head: bytes, file_name: Optional[str], claimed: Optional[str]) -> Optional[str]:
+    """
+    Typ súboru podľa obsahu; typ od klienta sa použije len ak obsah nič
+    nepovie, alebo ako spresnenie textu (text/markdown, text/csv …).
+    Neznámy binárny obsah (application/octet-stream) typu od klienta
+    neodporuje – video/mp4 ostane video/mp4 – okrem tvrdenia, že ide o text.
+    """
+    sniffed = sniff_mime_type(head, file_name)
+    if sniffed is None:
+        return claimed
+    if sniffed == "application/octet-stream" and claimed and not claimed.startswith("text/"):
+        return claimed
+    if sniffed == "text/plain" and claimed and claimed.startswith("text/"):
+        return claimed
+    return sniffed
 
 def save_upload_file(upload_file: UploadFile, destination_on_disk: Path) -> None:
     try:
@@ -14,29 +91,95 @@ def save_upload_file(upload_file: UploadFile, destination_on_disk: Path) -> None
     finally:
         upload_file.file.close()
 
+def save_upload_file_hashed(
+    upload_file: UploadFile,
+    destination_on_disk: Path,
+    max_bytes: Optional[int] = None,
+) -> SavedFile:
+    """
+    Uloží upload a počas kopírovania spočíta SHA-256, veľkosť a odloží
+    si hlavičku na rozpoznanie typu (jeden prechod, bez ďalšieho čítania).
+    Ak súbor presiahne `max_bytes`, zápis hneď preruší (FileTooLargeError);
+    nedokončený súbor zmaže volajúci.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        destination_on_disk.parent.mkdir(parents=True, exist_ok=True)
+        with destination_on_disk.open("wb") as buffer:
+            while chunk := upload_file.file.read(COPY_CHUNK_SIZE):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise FileTooLargeError(f"{upload_file.filename}: more than {max_bytes} bytes")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                buffer.write(chunk)
+    finally:
+        upload_file.file.close()
+    return SavedFile(digest.hexdigest(), size, head)
+
+def hash_file(file_path_on_disk: Path) -> SavedFile:
+    """SHA-256, veľkosť a hlavička súboru na disku (číta po blokoch)."""
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    with file_path_on_disk.open("rb") as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            if not size:
+                head = chunk[:SNIFF_BYTES]
+            digest.update(chunk)
+            size += len(chunk)
+    return SavedFile(digest.hexdigest(), size, head)
+
 def get_relative_file_path(user_id: int, subject_id: int, original_filename: str) -> Path:
     safe_filename = Path(original_filename).name
     return Path(f"user_{user_id}") / f"subject_{subject_id}" / safe_filename
 
+def get_blob_relative_path(sha256: str) -> Path:
+    return Path(BLOBS_DIR) / sha256[:2] / sha256[2:4] / sha256
+
+def get_tmp_upload_path() -> Path:
+    return MEDIA_ROOT / TMP_DIR / f"{uuid.uuid4().hex}.tmp"
+
+def get_chunked_upload_path(upload_id: str) -> Path:
+    return MEDIA_ROOT / TMP_DIR / CHUNKED_UPLOADS_DIR / f"{upload_id}.part"
+
+def promote_tmp_to_blob(tmp_path: Path, sha256: str) -> bool:
+    """
+    Presunie dočasný súbor do úložiska ako blob (existujúci blob s rovnakým
+    obsahom prepíše). Vráti True, ak blob predtým neexistoval.
+    """
+    return get_storage().put_file(tmp_path, get_blob_relative_path(sha256).as_posix())
+
 def get_full_path_on_disk(relative_file_path: str | Path) -> Path:
     return MEDIA_ROOT / Path(relative_file_path)
 
 def remove_file_from_disk(file_path_on_disk: Path) -> bool:
+    """
+    Zmaže súbor a prázdne nadradené priečinky (najviac 2 úrovne, nikdy nie
+    MEDIA_ROOT). Chybu zaloguje a vráti False – súbor potom nájde sweeper
+    (`app.services.storage_reconciliation`).
+    """
     try:
-        if file_path_on_disk.exists() and file_path_on_disk.is_file():
-            file_path_on_disk.unlink()
-            try:
-                subject_dir = file_path_on_disk.parent
-                if not any(subject_dir.iterdir()):
-                    subject_dir.rmdir()
-                    user_dir = subject_dir.parent
-                    if not any(user_dir.iterdir()):
-                        user_dir.rmdir()
-            except OSError:
-                pass 
-            return True
-        elif not file_path_on_disk.exists():
-            return True
-    except Exception:
-        pass # Log error if needed
-    return False
\ No newline at end of file
+        file_path_on_disk.unlink()
+    except FileNotFoundError:
+        return True
+    except OSError as exc:
+        logger.warning("Could not remove %s: %s", file_path_on_disk, exc)
+        return False
+    prune_empty_dirs(file_path_on_disk.parent, levels=2)
+    return True
+
+def prune_empty_dirs(directory: Path, levels: int) -> None:
+    """Zmaže `directory` a jeho rodičov, kým sú prázdne (max `levels`, nie MEDIA_ROOT)."""
+    media_root = MEDIA_ROOT.resolve()
+    for _ in range(levels):
+        try:
+            if directory.resolve() == media_root or media_root not in directory.resolve().parents:
+                return
+            directory.rmdir()   # zlyhá, ak nie je prázdny
+        except OSError:
+            return
+        directory = directory.parent
@@ -1,9 +1,13 @@
 # backend/app/main.py
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import engine  # Importuj engine pre init_db
+from app.core.upload_limits import MaxUploadSizeMiddleware
+from app import crud
+from app.database import SessionLocal, engine  # Importuj engine pre init_db
+from app.dependencies import get_current_active_user
 from app.db.base import init_db  # Importuj init_db z app.db.base
 
 # Importuj všetky moduly routerov
@@ -15,6 +19,11 @@ from app.routers import study_plans
 from app.routers import study_materials
 from app.routers import achievements
 from app.routers import user_stats
+from app.services import extraction_service, storage_reconciliation
+from app.services.ai_service import materials_summary, openai_service, prompt_budget, topic_analyzer
+from app.services.ai_service.llm_cache import llm_cache
+from app.services.ai_service.prompt_budget import prompt_metrics
+from app.services.ai_service.resilience import openai_guard
 
 # Zavolaj init_db na začiatku, aby sa vytvorili tabuľky (ak neexistujú)
 # Toto sa vykoná len raz pri štarte aplikácie.
@@ -55,6 +64,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# veľké uploady odmietneme skôr, než ich Starlette uloží do dočasného súboru
+app.add_middleware(MaxUploadSizeMiddleware)
+
+@app.on_event("startup")
+def backfill_pages():
+    # materiály extrahované pred zavedením strán; pred obnovou jobov,
+    # aby sa backfill nestretol s workerom, ktorý strany práve zapisuje
+    db = SessionLocal()
+    try:
+        crud.backfill_material_pages(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def backfill_job_status():
+    # materiály extrahované pri uploade (pred extraction_jobs) – po stranách,
+    # aby job niesol ich počet
+    db = SessionLocal()
+    try:
+        crud.backfill_extraction_jobs(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def resume_extraction_jobs():
+    # Joby, ktoré nedobehli pred reštartom, znovu zaradíme do poolu
+    extraction_service.resume_pending_jobs()
+
+@app.on_event("startup")
+def backfill_tag_index():
+    # materiály s tagmi spred zavedenia material_tags dostanú záznamy v indexe
+    db = SessionLocal()
+    try:
+        crud.backfill_material_tags(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def backfill_text_stats():
+    # materiály extrahované pred zavedením štatistík (počet slov, strán …)
+    db = SessionLocal()
+    try:
+        crud.backfill_material_stats(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def backfill_storage_counters():
+    # používatelia s materiálmi spred zavedenia kvót dostanú počítadlo
+    db = SessionLocal()
+    try:
+        crud.backfill_storage_usage(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def purge_stale_uploads():
+    # chunked uploady opustené pred reštartom (aj s .part súbormi)
+    db = SessionLocal()
+    try:
+        crud.purge_expired_upload_sessions(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def load_tokenizer():
+    # tiktoken pri prvom použití sťahuje kódovanie – nie počas requestu na event loope
+    await run_in_threadpool(
+        prompt_budget.warm_up, [materials_summary.SUMMARY_MODEL, topic_analyzer.OPENAI_MODEL_NAME]
+    )
+
+@app.on_event("startup")
+def start_storage_sweeper():
+    # zapína sa cez STORAGE_SWEEP_INTERVAL_MINUTES
+    storage_reconciliation.start_sweeper()
+
+@app.on_event("shutdown")
+def stop_extraction_pool():
+    extraction_service.shutdown()
+    storage_reconciliation.stop_sweeper()
+
+@app.on_event("shutdown")
+async def close_openai_client():
+    await openai_service.close_client()
+
 @app.get("/", tags=["Root"])
 async def read_root():
     """
@@ -62,6 +156,29 @@ async def read_root():
     """
     return {"message": "Vitaj v API Personalizovaného Tutora! Dokumentácia je na /docs"}
 
+@app.get("/ai/cache-stats", tags=["Root"], dependencies=[Depends(get_current_active_user)])
+async def read_llm_cache_stats():
+    """
+    Počítadlá cache odpovedí LLM (hity v pamäti / v DB, missy) pre tento proces.
+    """
+    return llm_cache.stats()
+
+@app.get("/ai/prompt-stats", tags=["Root"], dependencies=[Depends(get_current_active_user)])
+async def read_prompt_stats():
+    """
+    Veľkosť odoslaných promptov v tokenoch podľa účelu (počet, priemer, maximum,
+    skrátené/vynechané časti) pre tento proces.
+    """
+    return prompt_metrics.stats()
+
+@app.get("/ai/openai-stats", tags=["Root"], dependencies=[Depends(get_current_active_user)])
+async def read_openai_guard_stats():
+    """
+    Stav ochrany volaní OpenAI: circuit breaker, retry a využitie limitov
+    (requesty a tokeny za minútu) pre tento proces.
+    """
+    return openai_guard.stats()
+
 # Zahrnutie (registrácia) routerov do FastAPI aplikácie
 app.include_router(auth.router) # Prefix a tagy sú definované v auth.py
 app.include_router(users.router) # Prefix a tagy sú definované v users.py
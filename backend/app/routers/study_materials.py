@@ -1,34 +1,43 @@
 # backend/app/routers/study_materials.py
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import os
 from pathlib import Path
 from typing import List, Optional
+from urllib.parse import quote
 
 from fastapi import (
     APIRouter,
     Depends,
     File,
     Form,
+    Header,
     HTTPException,
     Query,
+    Request,
     UploadFile,
     status,
 )
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud, file_utils
+from app.config import settings
 from app.database import get_db
-from app.db.enums import AchievementCriteriaType, MaterialTypeEnum
+from app.db.enums import AchievementCriteriaType, ExtractionStatus, MaterialTypeEnum
 from app.db.models.user import User as UserModel
 from app.dependencies import get_current_active_user
 from app.schemas import study_material as sm_schema
+from app.services import extraction_service, material_archive
 from app.services.achievement_service import check_and_grant_achievements
 from app.services.ai_service.materials_summary import (
-    extract_tags_from_text,
-    summarize_text_with_openai,
+    analyze_material_with_openai,
 )
+from app.services.ai_service.resilience import openai_guard
+from app.storage import get_storage
 
 # --------------------------------------------------------------------------- #
 # Routers                                                                     #
@@ -51,7 +60,7 @@ material_router = APIRouter(
 # --------------------------------------------------------------------------- #
 
 
-@router.post("/", response_model=sm_schema.StudyMaterial, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=sm_schema.StudyMaterialListItem, status_code=status.HTTP_202_ACCEPTED)
 async def upload_material_to_subject(
     subject_id: int,
     title: Optional[str] = Form(None),
@@ -61,31 +70,277 @@ async def upload_material_to_subject(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    """POST /subjects/{id}/materials – uloží súbor + meta a vráti záznam."""
+    """
+    POST /subjects/{id}/materials – uloží súbor + meta a vráti záznam
+    s `extraction_status=pending`; text sa extrahuje na pozadí.
+    """
+    if file.size is not None and not await run_in_threadpool(crud.has_room_for, db, current_user.id, file.size):
+        raise HTTPException(413, "Storage quota exceeded.")
+
     meta = sm_schema.StudyMaterialCreate(title=title, description=description, material_type=material_type)
-    obj = crud.create_study_material(
-        db=db,
-        material_meta=meta,
-        upload_file=file,
-        subject_id=subject_id,
-        owner_id=current_user.id,
-    )
+    try:
+        # zápis na disk + hash + DB mimo event loopu
+        obj = await run_in_threadpool(
+            crud.create_study_material,
+            db=db,
+            material_meta=meta,
+            upload_file=file,
+            subject_id=subject_id,
+            owner_id=current_user.id,
+        )
+    except file_utils.FileTooLargeError:
+        raise HTTPException(413, f"File too large (max {settings.MAX_UPLOAD_BYTES} bytes).")
+    except crud.StorageQuotaExceeded:
+        raise HTTPException(413, "Storage quota exceeded.")
+    except crud.DuplicateMaterialError as exc:
+        raise HTTPException(409, _duplicate_detail(exc))
     if not obj:
         raise HTTPException(400, "Failed to upload material.")
 
-    # achievementy
+    await run_in_threadpool(_after_material_created, db, current_user, obj)
+    return obj
+
+
+def _duplicate_detail(exc) -> str:
+    return f"This file is already in the subject as material {exc.existing_id}."
+
+
+def _after_material_created(db: Session, current_user: UserModel, *objs) -> None:
+    """Spoločné kroky po vzniku materiálov – extrakcia na pozadí + achievementy (raz)."""
+    for obj in objs:
+        if obj.extraction_status == ExtractionStatus.PENDING:
+            extraction_service.submit_extraction_job(obj.id)
+
     check_and_grant_achievements(db, current_user, AchievementCriteriaType.STUDY_MATERIALS_UPLOADED_PER_SUBJECT)
     check_and_grant_achievements(db, current_user, AchievementCriteriaType.TOTAL_MATERIALS_UPLOADED)
 
+
+def _stage_for_batch(upload_file: UploadFile):
+    """(StagedUpload, None) alebo (None, dôvod) – chyba jedného súboru nezruší dávku."""
+    try:
+        staged = crud.stage_upload(upload_file)
+    except file_utils.FileTooLargeError:
+        return None, "too large"
+    return (staged, None) if staged else (None, "write failed")
+
+
+@router.post("/batch", response_model=sm_schema.BatchUploadResult, status_code=status.HTTP_202_ACCEPTED)
+async def upload_materials_batch(
+    subject_id: int,
+    files: List[UploadFile] = File(...),
+    material_type: Optional[MaterialTypeEnum] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    POST /subjects/{id}/materials/batch – viac súborov naraz.
+    Súbory sa zapisujú na disk paralelne, všetky záznamy vzniknú v jednej
+    transakcii a achievementy sa vyhodnotia raz za celú dávku.
+    Duplicitný obsah sa preskočí (`skipped`), zvyšok sa nahrá.
+    """
+    if len(files) > settings.BATCH_UPLOAD_MAX_FILES:
+        raise HTTPException(400, f"Too many files (max {settings.BATCH_UPLOAD_MAX_FILES}).")
+    if not await run_in_threadpool(crud.subject_belongs_to_owner, db, subject_id, current_user.id):
+        raise HTTPException(404, "Subject not found")
+
+    results = await asyncio.gather(*(run_in_threadpool(_stage_for_batch, f) for f in files))
+    staged = [r for r, _ in results if r is not None]
+    skipped = [
+        sm_schema.BatchUploadSkipped(file_name=f.filename, reason=reason)
+        for f, (r, reason) in zip(files, results) if r is None
+    ]
+
+    meta = sm_schema.StudyMaterialCreate(material_type=material_type)
+    outcome = await run_in_threadpool(
+        crud.create_study_materials_batch, db, meta, staged, subject_id, current_user.id
+    )
+    if outcome is None:
+        raise HTTPException(400, "Failed to upload materials.")
+    created, duplicates = outcome
+    skipped += [sm_schema.BatchUploadSkipped(file_name=name, reason=reason) for name, reason in duplicates]
+
+    if created:
+        await run_in_threadpool(_after_material_created, db, current_user, *created)
+    return sm_schema.BatchUploadResult(created=created, skipped=skipped)
+
+
+# --------------------------------------------------------------------------- #
+# Chunked (resumable) upload                                                  #
+# --------------------------------------------------------------------------- #
+
+
+def _upload_session_out(sess) -> sm_schema.UploadSession:
+    out = sm_schema.UploadSession.model_validate(sess)
+    out.max_chunk_size = settings.UPLOAD_CHUNK_MAX_BYTES
+    return out
+
+
+def _open_part_at(path: Path, offset: int):
+    """Otvorí rozpracovaný súbor, zahodí všetko za `offset` a nastaví sa naň."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = path.open("r+b" if path.exists() else "w+b")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def _get_upload_session_or_404(db: Session, upload_id: str, subject_id: int, owner_id: int):
+    sess = crud.get_upload_session(db, upload_id, subject_id, owner_id)
+    if not sess:
+        raise HTTPException(404, "Upload session not found")
+    return sess
+
+
+@router.post("/uploads", response_model=sm_schema.UploadSession, status_code=status.HTTP_201_CREATED)
+def init_chunked_upload(
+    subject_id: int,
+    payload: sm_schema.UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """Začne chunked upload; StudyMaterial vznikne až pri /complete."""
+    if not crud.subject_belongs_to_owner(db, subject_id, current_user.id):
+        raise HTTPException(404, "Subject not found")
+    if payload.total_size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(413, f"File too large (max {settings.MAX_UPLOAD_BYTES} bytes).")
+    crud.purge_expired_upload_sessions(db, current_user.id)
+    # rozpracované uploady sa do kvóty počítajú tiež (rezervuje sa až pri /complete)
+    pending = crud.pending_upload_bytes(db, current_user.id)
+    if not crud.has_room_for(db, current_user.id, pending + payload.total_size):
+        raise HTTPException(413, "Storage quota exceeded.")
+    sess = crud.create_upload_session(db, payload, subject_id, current_user.id)
+    if not sess:
+        raise HTTPException(500, "Failed to start upload.")
+    return _upload_session_out(sess)
+
+
+@router.get("/uploads/{upload_id}", response_model=sm_schema.UploadSession)
+def get_chunked_upload(
+    subject_id: int,
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """Stav uploadu – `received_bytes` je offset, od ktorého má klient pokračovať."""
+    return _upload_session_out(_get_upload_session_or_404(db, upload_id, subject_id, current_user.id))
+
+
+@router.put("/uploads/{upload_id}", response_model=sm_schema.UploadSession)
+async def upload_chunk(
+    subject_id: int,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    x_chunk_sha256: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    PUT ?offset=N s telom = surové bajty chunku (bez multipartu).
+    Telo sa zapisuje na disk prúdovo; voliteľná hlavička X-Chunk-SHA256
+    overí integritu. Chunk s offsetom menším ako `received_bytes` prepíše
+    koniec súboru (opakované odoslanie po výpadku).
+    """
+    sess = await run_in_threadpool(_get_upload_session_or_404, db, upload_id, subject_id, current_user.id)
+    if offset > sess.received_bytes:
+        raise HTTPException(409, f"Unexpected offset, expected {sess.received_bytes}")
+    if offset < sess.received_bytes:
+        await run_in_threadpool(crud.set_received_bytes, db, sess, offset)
+
+    part_path = file_utils.get_chunked_upload_path(sess.id)
+    digest = hashlib.sha256()
+    written = 0
+    f = await run_in_threadpool(_open_part_at, part_path, offset)
+    try:
+        async for data in request.stream():
+            written += len(data)
+            if written > settings.UPLOAD_CHUNK_MAX_BYTES or offset + written > sess.total_size:
+                await run_in_threadpool(f.truncate, offset)
+                raise HTTPException(413, "Chunk too large")
+            digest.update(data)
+            await run_in_threadpool(f.write, data)
+        if x_chunk_sha256 and digest.hexdigest() != x_chunk_sha256.lower():
+            await run_in_threadpool(f.truncate, offset)
+            raise HTTPException(400, "Chunk checksum mismatch")
+    finally:
+        await run_in_threadpool(f.close)
+
+    sess = await run_in_threadpool(crud.set_received_bytes, db, sess, offset + written)
+    return _upload_session_out(sess)
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=sm_schema.StudyMaterialListItem,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def complete_chunked_upload(
+    subject_id: int,
+    upload_id: str,
+    payload: sm_schema.UploadSessionComplete | None = None,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """Poskladaný súbor presunie do úložiska a vytvorí StudyMaterial."""
+    sess = await run_in_threadpool(_get_upload_session_or_404, db, upload_id, subject_id, current_user.id)
+    if sess.received_bytes != sess.total_size:
+        raise HTTPException(409, f"Upload incomplete: {sess.received_bytes}/{sess.total_size} bytes")
+    if not await run_in_threadpool(crud.subject_belongs_to_owner, db, subject_id, current_user.id):
+        raise HTTPException(404, "Subject not found")
+
+    part_path = file_utils.get_chunked_upload_path(sess.id)
+    sha256, size, head = await run_in_threadpool(file_utils.hash_file, part_path)
+    if size != sess.total_size or (payload and payload.sha256 and payload.sha256.lower() != sha256):
+        raise HTTPException(400, "Assembled file checksum mismatch")
+
+    meta = sm_schema.StudyMaterialCreate(
+        title=sess.title, description=sess.description, material_type=sess.material_type
+    )
+    try:
+        # presun do blob úložiska + DB mimo event loopu
+        obj = await run_in_threadpool(
+            crud.create_study_material_from_tmp_file,
+            db,
+            meta,
+            tmp_file_path=part_path,
+            sha256=sha256,
+            file_size=size,
+            file_name=sess.file_name,
+            file_type=file_utils.detect_file_type(head, sess.file_name, sess.file_type),
+            subject_id=subject_id,
+            owner_id=current_user.id,
+        )
+    except crud.StorageQuotaExceeded:
+        await run_in_threadpool(crud.delete_upload_session, db, sess)
+        raise HTTPException(413, "Storage quota exceeded.")
+    except crud.DuplicateMaterialError as exc:
+        await run_in_threadpool(crud.delete_upload_session, db, sess)
+        raise HTTPException(409, _duplicate_detail(exc))
+    await run_in_threadpool(crud.delete_upload_session, db, sess)
+    if not obj:
+        raise HTTPException(400, "Failed to upload material.")
+
+    await run_in_threadpool(_after_material_created, db, current_user, obj)
     return obj
 
 
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_chunked_upload(
+    subject_id: int,
+    upload_id: str,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    sess = _get_upload_session_or_404(db, upload_id, subject_id, current_user.id)
+    crud.delete_upload_session(db, sess)
+
+
 # --------------------------------------------------------------------------- #
 # List / Detail                                                               #
 # --------------------------------------------------------------------------- #
 
 
-@router.get("/", response_model=List[sm_schema.StudyMaterial])
+@router.get("/", response_model=List[sm_schema.StudyMaterialListItem])
 def get_materials_for_subject(
     subject_id: int,
     db: Session = Depends(get_db),
@@ -95,45 +350,214 @@ def get_materials_for_subject(
         description="Zoznam tagov oddelený čiarkou (bez #), napr. 'dejiny,biológia'"
     ),
 ):
-    tag_list = [t.trim() for t in tags.split(",") if t.trim()] if tags else None
+    tag_list = crud.split_tags(tags) if tags else None
     mats = crud.get_study_materials_for_subject(db, subject_id, current_user.id, tag_list)
     if mats is None:
         raise HTTPException(404, "Subject not found or no materials.")
     return mats
 
 
+@router.get("/archive")
+def download_subject_archive(
+    subject_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Všetky súbory predmetu ako ZIP, streamovaný za behu (bez dočasného
+    súboru, pamäť nezávisí od veľkosti archívu).
+    """
+    subject_name = crud.get_subject_name(db, subject_id, current_user.id)
+    if subject_name is None:
+        raise HTTPException(404, "Subject not found")
+    # riadky načítame hneď – DB session sa zatvorí skôr, než sa začne streamovať
+    files = crud.get_material_files_for_subject(db, subject_id, current_user.id)
+    return StreamingResponse(
+        material_archive.iter_subject_archive(files),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": _content_disposition(subject_name.replace("/", "-") + ".zip"),
+            "Cache-Control": REVALIDATE_CACHE_CONTROL,
+        },
+    )
+
+
+# "/search" a "/tags" musia byť pred "/{material_id}", inak padnú na validácii int
+@material_router.get("/search", response_model=List[sm_schema.MaterialSearchHit])
+def search_materials(
+    q: str = Query(..., min_length=1, max_length=200, description="Hľadaný text; `foto*` hľadá prefix posledného slova"),
+    subject_id: Optional[int] = Query(None, description="Len materiály daného predmetu"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    hits = crud.search_materials(db, current_user.id, q, subject_id, limit, offset)
+    return [sm_schema.MaterialSearchHit(**hit._asdict()) for hit in hits]
+
+
+@material_router.get("/tags", response_model=List[sm_schema.TagCount])
+def get_tag_cloud(
+    subject_id: Optional[int] = Query(None, description="Len tagy materiálov daného predmetu"),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    return [
+        sm_schema.TagCount(tag=tag, count=count)
+        for tag, count in crud.get_tag_cloud(db, current_user.id, subject_id)
+    ]
+
+
 @material_router.get("/{material_id}", response_model=sm_schema.StudyMaterial)
 def get_material_details(
     material_id: int,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    mat = crud.get_study_material(db, material_id, current_user.id)
+    mat = crud.get_study_material(db, material_id, current_user.id, with_ai=True)
     if not mat:
         raise HTTPException(404, "Material not found")
     return mat
 
 
+@material_router.get("/{material_id}/extraction", response_model=sm_schema.ExtractionJob)
+def get_material_extraction_status(
+    material_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    job = crud.get_extraction_job(db, material_id, current_user.id)
+    if not job:
+        raise HTTPException(404, "Material not found")
+    return job
+
+
+@material_router.get("/{material_id}/pages", response_model=sm_schema.MaterialPagesResponse)
+def get_material_pages_route(
+    material_id: int,
+    from_page: int = Query(1, alias="from", ge=1),
+    to_page: Optional[int] = Query(None, alias="to", ge=1),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """Extrahovaný text po stranách (najviac 50 strán na request)."""
+    pages = crud.get_material_pages(db, material_id, current_user.id, from_page, to_page)
+    if pages is None:
+        raise HTTPException(404, "Material not found")
+    return sm_schema.MaterialPagesResponse(
+        material_id=material_id,
+        total_pages=crud.count_material_pages(db, material_id),
+        pages=pages,
+    )
+
+
 # --------------------------------------------------------------------------- #
 # Download                                                                    #
 # --------------------------------------------------------------------------- #
 
 
-@material_router.get("/{material_id}/download")
+# content-addressed bloby sa pod rovnakým materiálom nikdy nemenia
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _material_etag(mat, stat_result: os.stat_result) -> str:
+    """Silný ETag – hash obsahu, pri starých súboroch mtime+veľkosť."""
+    if mat.blob_sha256:
+        return f'"{mat.blob_sha256}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def _content_disposition(file_name: str) -> str:
+    # rovnaký tvar ako FileResponse (RFC 6266, filename* pre ne-ASCII názvy)
+    quoted = quote(file_name)
+    if quoted != file_name:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{file_name}"'
+
+
+def _offload_headers(fp: Path, key: str) -> Optional[dict]:
+    """
+    Hlavička pre reverse proxy, ktorá súbor pošle sama (sendfile);
+    None ak je offload vypnutý.
+    """
+    mode = settings.DOWNLOAD_OFFLOAD
+    if mode == "x-accel-redirect":
+        prefix = settings.DOWNLOAD_OFFLOAD_PREFIX.rstrip("/")
+        return {"X-Accel-Redirect": quote(f"{prefix}/{Path(key).as_posix()}")}
+    if mode == "x-sendfile":
+        return {"X-Sendfile": str(fp.resolve())}
+    return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match používa slabé porovnanie (W/ prefix ignorujeme)
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+@material_router.api_route("/{material_id}/download", methods=["GET", "HEAD"])
 def download_material(
     material_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
+    """
+    Stiahnutie súboru so silným ETagom, `If-None-Match` → 304 a podporou
+    `Range`/`If-Range` (206) – tú rieši priamo `FileResponse`, pri
+    `DOWNLOAD_OFFLOAD` reverse proxy (aplikácia vráti len hlavičku).
+    Pri objektovom úložisku (S3) vráti 307 na krátkodobú presigned URL,
+    takže bajty netečú cez aplikačný server.
+    """
     mat = crud.get_study_material(db, material_id, current_user.id)
     if not mat:
         raise HTTPException(404, "Material not found")
 
-    fp: Path = file_utils.MEDIA_ROOT / Path(mat.file_path)
-    if not fp.is_file():
+    storage = get_storage()
+    fp: Optional[Path] = storage.local_path(mat.file_path)
+    if fp is None:
+        url = storage.presigned_url(
+            mat.file_path,
+            filename=mat.file_name,
+            content_type=mat.file_type or "application/octet-stream",
+        )
+        # URL expiruje – presmerovanie sa nesmie cachovať
+        return RedirectResponse(
+            url,
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"Cache-Control": "private, no-store"},
+        )
+
+    try:
+        stat_result = fp.stat()
+    except FileNotFoundError:
         raise HTTPException(404, "File not found on server")
 
-    return FileResponse(str(fp), filename=mat.file_name, media_type=mat.file_type or "application/octet-stream")
+    etag = _material_etag(mat, stat_result)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if mat.blob_sha256 else REVALIDATE_CACHE_CONTROL,
+    }
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    offload = _offload_headers(fp, mat.file_path)
+    if offload:
+        # Content-Length a telo doplní proxy; Range vybaví tiež ona
+        headers.update(offload)
+        headers["Content-Disposition"] = _content_disposition(mat.file_name)
+        return Response(media_type=mat.file_type or "application/octet-stream", headers=headers)
+
+    return FileResponse(
+        str(fp),
+        filename=mat.file_name,
+        media_type=mat.file_type or "application/octet-stream",
+        headers=headers,
+        stat_result=stat_result,
+    )
 
 
 # --------------------------------------------------------------------------- #
@@ -154,7 +578,7 @@ def update_material_metadata(
     return updated
 
 
-@material_router.delete("/{material_id}", response_model=sm_schema.StudyMaterial)
+@material_router.delete("/{material_id}", response_model=sm_schema.StudyMaterialListItem)
 def delete_material(
     material_id: int,
     db: Session = Depends(get_db),
@@ -175,17 +599,21 @@ def delete_material(
 
 
 @material_router.get("/{material_id}/summary", response_model=sm_schema.MaterialSummaryResponse)
-def get_material_summary_route(
+async def get_material_summary_route(
     material_id: int,
     force: bool | None = False,  # ?force=true => vynútime refresh
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    mat = crud.get_study_material(db, material_id, current_user.id)
+    # DB kroky bežia v threadpoole, na OpenAI sa čaká bez blokovania vlákna
+    mat = await run_in_threadpool(crud.get_study_material, db, material_id, current_user.id, with_ai=True)
     if not mat:
         raise HTTPException(404, "Material not found")
 
-    word_count = len(mat.extracted_text.split()) if mat.extracted_text else 0
+    word_count = mat.word_count or 0
+    file_name = mat.file_name
+    has_tags = bool(crud.parse_tags(mat.tags))
+    stored_summary, stored_concepts = mat.ai_summary, mat.ai_key_concepts
 
     # 1) už uložené → vráť (ak force == False)
     if (mat.ai_summary or mat.ai_summary_error) and not force:
@@ -195,10 +623,20 @@ def get_material_summary_route(
             summary=mat.ai_summary,
             ai_error=mat.ai_summary_error,
             word_count=word_count,
+            key_concepts=mat.ai_key_concepts,
         )
 
-    # 2) bez textu nevieme generovať
-    if not mat.extracted_text:
+    # 2) bez textu nevieme generovať (extracted_text sa dotiahne lazy až teraz)
+    text, extraction_status = await run_in_threadpool(lambda: (mat.extracted_text, mat.extraction_status))
+    if not text and extraction_status in (ExtractionStatus.PENDING, ExtractionStatus.PROCESSING):
+        return sm_schema.MaterialSummaryResponse(
+            material_id=mat.id,
+            file_name=mat.file_name,
+            summary=None,
+            ai_error="Text extraction is still in progress.",
+            word_count=0,
+        )
+    if not text:
         return sm_schema.MaterialSummaryResponse(
             material_id=mat.id,
             file_name=mat.file_name,
@@ -207,38 +645,45 @@ def get_material_summary_route(
             word_count=0,
         )
 
-    # 3) OpenAI
-    ai = summarize_text_with_openai(mat.extracted_text)
+    # 3) OpenAI (jedno volanie: sumarizácia + tagy + pojmy) – DB spojenie
+    #    počas čakania vrátime do poolu
+    await run_in_threadpool(db.close)
+    ai = await analyze_material_with_openai(text)
 
-    # 4) uložíme do DB
-    mat.ai_summary = ai.get("summary")
-    mat.ai_summary_error = ai.get("error")
-    db.add(mat)
-    db.commit()
-    db.refresh(mat)
+    # OpenAI dočasne nedostupné: nič neukladáme (inak by chyba ostala v DB),
+    # vrátime doterajšiu sumarizáciu alebo lokálny výťah z textu
+    if ai["retryable"]:
+        return sm_schema.MaterialSummaryResponse(
+            material_id=material_id,
+            file_name=file_name,
+            summary=stored_summary or ai["summary"],
+            ai_error=ai["error"],
+            word_count=word_count,
+            key_concepts=stored_concepts if stored_summary else [],
+        )
+
+    # 4) uložíme do DB; tagy len ak ich materiál ešte nemá (neprepíšeme ručné)
+    await run_in_threadpool(
+        crud.save_ai_analysis, db, material_id,
+        summary=ai["summary"],
+        error=ai["error"],
+        key_concepts=ai["key_concepts"] if not ai["error"] else None,
+        tags=ai["tags"] if ai["tags"] and not has_tags else None,
+    )
 
     return sm_schema.MaterialSummaryResponse(
-        material_id=mat.id,
-        file_name=mat.file_name,
-        summary=mat.ai_summary,
-        ai_error=mat.ai_summary_error,
+        material_id=material_id,
+        file_name=file_name,
+        summary=ai["summary"],
+        ai_error=ai["error"],
         word_count=word_count,
+        key_concepts=ai["key_concepts"],
     )
 
 # --------------------------------------------------------------------------- #
 # AI - TAGS (POST)                                                            #
 # --------------------------------------------------------------------------- #
 
-# pomocná funkcia na JSON→list
-def _deserialize_tags(raw: str | None) -> list[str]:
-    if not raw:
-        return []
-    try:
-        return json.loads(raw)
-    except Exception:
-        return [t.strip() for t in raw.split(",") if t.strip()]
-
-
 @material_router.get("/{material_id}/tags", response_model=list[str])
 def fetch_material_tags(
     material_id: int,
@@ -248,34 +693,54 @@ def fetch_material_tags(
     mat = crud.get_study_material(db, material_id, current_user.id)
     if not mat:
         raise HTTPException(404, "Material not found")
-    return _deserialize_tags(mat.tags)
+    return crud.parse_tags(mat.tags)
 
 
 @material_router.post("/{material_id}/generate-tags", response_model=list[str])
-def generate_tags_for_material(
+async def generate_tags_for_material(
     material_id: int,
     force: bool | None = False,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    mat = crud.get_study_material(db, material_id, current_user.id)
+    mat = await run_in_threadpool(
+        crud.get_study_material, db, material_id, current_user.id, with_text=True, with_ai=True
+    )
     if not mat:
         raise HTTPException(404, "Material not found")
     if not mat.extracted_text:
         raise HTTPException(400, "No extracted text for tagging.")
 
     # 1) už existujú
-    existing = _deserialize_tags(mat.tags)
+    existing = crud.parse_tags(mat.tags)
     if existing and not force:
         return existing
 
-    # 2) OpenAI
-    tags = extract_tags_from_text(mat.extracted_text)
+    # 2) OpenAI – rovnaká analýza ako pri sumarizácii (pri rovnakom texte ide z cache)
+    text = mat.extracted_text
+    has_summary = bool(mat.ai_summary)
+    await run_in_threadpool(db.close)   # spojenie do poolu počas čakania na OpenAI
+    ai = await analyze_material_with_openai(text)
+    if ai["retryable"] and not existing:
+        raise HTTPException(
+            503,
+            "AI tagging is temporarily unavailable, try again later",
+            headers={"Retry-After": str(openai_guard.retry_after_seconds())},
+        )
+    if ai["error"]:
+        return existing
 
-    # 3) uloženie
-    if not crud.update_material_tags(db, material_id, tags):
+    # 3) uloženie; chýbajúcu sumarizáciu a pojmy doplníme z toho istého volania
+    if has_summary:
+        saved = await run_in_threadpool(crud.update_material_tags, db, material_id, ai["tags"])
+    else:
+        saved = await run_in_threadpool(
+            crud.save_ai_analysis, db, material_id,
+            summary=ai["summary"], error=None, key_concepts=ai["key_concepts"], tags=ai["tags"],
+        )
+    if not saved:
         raise HTTPException(500, "Failed to save tags.")
-    return tags
+    return ai["tags"]
 
 
 @material_router.patch(
@@ -289,14 +754,14 @@ def patch_material(
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    mat = crud.get_study_material(db, material_id, current_user.id)
+    mat = crud.get_study_material(db, material_id, current_user.id, with_ai=True)
     if not mat:
         raise HTTPException(status_code=404, detail="Material not found")
 
     data = patch.model_dump(by_alias=True, exclude_unset=True)
-    # handle tags JSON
+    # tags: JSON stĺpec + index material_tags
     if "tags" in data:
-        mat.tags = json.dumps(data.pop("tags"), ensure_ascii=False)
+        crud.set_material_tags(db, mat, data.pop("tags") or [])
     # handle ai_summary
     if "ai_summary" in data:
         mat.ai_summary = data.pop("ai_summary")
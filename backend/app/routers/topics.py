@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, selectinload
 
 from app.database import get_db
@@ -8,6 +9,8 @@ from app.db.models.subject import Subject as SubjectModel
 from app.schemas import topic as topic_schema
 from app.crud import crud_topic, crud_subject
 from app.services.achievement_service import check_and_grant_achievements
+from app.services.ai_service import topic_analyzer
+from app.services.ai_service.resilience import openai_guard
 from app.db.enums import AchievementCriteriaType, TopicStatus
 
 router = APIRouter()
@@ -17,6 +20,14 @@ TOPIC_OPERATIONS_PREFIX = "/topics"
 SUBJECT_TOPICS_PREFIX = "/subjects/{subject_id}/topics"
 
 
+def _ai_unavailable() -> HTTPException:
+    return HTTPException(
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "AI analysis is temporarily unavailable, try again later",
+        headers={"Retry-After": str(openai_guard.retry_after_seconds())},
+    )
+
+
 # --------------------------------------------------------------------------- #
 #  CRUD ROUTES – create / update / delete / list
 # --------------------------------------------------------------------------- #
@@ -122,13 +133,71 @@ def read_topic_route(
 #  NEW: Trigger AI analysis on-demand
 # --------------------------------------------------------------------------- #
 @router.post(TOPIC_OPERATIONS_PREFIX + "/{topic_id}/analyze-ai", response_model=topic_schema.Topic)
-def trigger_topic_ai_analysis_route(
+async def trigger_topic_ai_analysis_route(
     topic_id: int,
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    updated = crud_topic.analyze_topic_and_save_estimates(db, topic_id, current_user.id)
+    # DB kroky bežia v threadpoole, čakanie na OpenAI nedrží žiadne vlákno
+    topic = await run_in_threadpool(
+        crud_topic.get_topic, db, topic_id, current_user.id, load_subject_with_materials=True
+    )
+    if not topic:
+        raise HTTPException(404, "Topic not found or AI analysis failed")
+    ai_input = await run_in_threadpool(
+        topic_analyzer.topic_analysis_input, topic, topic.subject.materials if topic.subject else []
+    )
+    await run_in_threadpool(db.close)   # spojenie do poolu počas čakania na OpenAI
+    ai = await topic_analyzer.analyze_topic_with_openai(**ai_input)
+    if ai["retryable"]:
+        raise _ai_unavailable()     # dočasnú chybu neukladáme – téma si nechá doterajší odhad
+    updated = await run_in_threadpool(crud_topic.save_topic_ai_analysis, db, topic_id, current_user.id, ai)
     if not updated:
         raise HTTPException(404, "Topic not found or AI analysis failed")
     # (prípadný achievement za použitie AI)
     return updated
+
+
+@router.post(SUBJECT_TOPICS_PREFIX + "/analyze-ai", response_model=list[topic_schema.Topic])
+async def trigger_subject_topics_ai_analysis_route(
+    subject_id: int,
+    topics_per_prompt: int = Query(
+        1, ge=1, le=topic_analyzer.MAX_TOPICS_PER_PROMPT,
+        description="Koľko tém poslať v jednom prompte (1 = každá téma zvlášť)",
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    AI analýza všetkých tém predmetu: texty materiálov sa pripravia raz,
+    volania bežia súbežne a výsledky sa uložia v jednej transakcii.
+    """
+
+    def load_inputs():
+        subject = crud_subject.get_subject(db, subject_id, current_user.id)
+        if not subject:
+            return None
+        material_texts = topic_analyzer.material_texts_for(subject.materials)
+        return {
+            topic.id: topic_analyzer.topic_analysis_input(topic, material_texts=material_texts)
+            for topic in subject.topics
+        }
+
+    inputs = await run_in_threadpool(load_inputs)
+    if inputs is None:
+        raise HTTPException(404, "Subject not found or not owned by user")
+    await run_in_threadpool(db.close)   # spojenie do poolu počas čakania na OpenAI
+
+    results = await topic_analyzer.analyze_topics_with_openai(
+        list(inputs.values()), topics_per_prompt=topics_per_prompt
+    )
+    # témy, pri ktorých bolo OpenAI nedostupné, si nechajú doterajší odhad
+    to_save = {topic_id: ai for topic_id, ai in zip(inputs, results) if not ai["retryable"]}
+    if inputs and not to_save:
+        raise _ai_unavailable()
+    updated = await run_in_threadpool(
+        crud_topic.save_topics_ai_analysis, db, subject_id, current_user.id, to_save
+    )
+    if updated is None:
+        raise HTTPException(404, "Subject not found or AI analysis failed")
+    return updated
@@ -50,12 +50,12 @@ def get_my_stats(
         .scalar()
         or 0
     )
-    texts = (
-        db.query(SMModel.extracted_text)
-        .filter(SMModel.owner_id == uid, SMModel.extracted_text.isnot(None))
-        .all()
+    total_words = (
+        db.query(func.coalesce(func.sum(SMModel.word_count), 0))
+        .filter(SMModel.owner_id == uid)
+        .scalar()
+        or 0
     )
-    total_words = sum(len(t[0].split()) for t in texts)
 
     # 2) Predmety a témy
     total_subjects = (
@@ -9,7 +9,7 @@ from app.database import get_db
 from app.dependencies import get_current_active_user
 from app.db.models.user import User as UserModel
 from app.schemas import user as user_schema
-from app.crud import crud_user
+from app.crud import crud_storage_usage, crud_user
 from app.core.email import send_password_reset_email
 from app.schemas.study_material import StudyMaterial
 
@@ -51,6 +51,22 @@ def update_current_user_profile_info(
     )
     return updated_user
 
+@router.get("/me/storage", response_model=user_schema.StorageUsage, dependencies=[Depends(get_current_active_user)])
+def read_my_storage_usage(
+    db: Session = Depends(get_db),
+    current_user_orm: UserModel = Depends(get_current_active_user)
+):
+    # číta len počítadlo, nič nesčítava
+    usage = crud_storage_usage.get_storage_usage(db, current_user_orm.id)
+    quota = crud_storage_usage.get_quota_bytes(usage)
+    used = usage.bytes_used if usage else 0
+    return user_schema.StorageUsage(
+        bytes_used=used,
+        material_count=usage.material_count if usage else 0,
+        quota_bytes=quota,
+        bytes_remaining=max(quota - used, 0),
+    )
+
 @router.get("/{user_id}", response_model=user_schema.User, dependencies=[Depends(get_current_active_user)])
 def read_user_by_id(
     user_id: int,
@@ -4,6 +4,6 @@ from .topic import Topic, TopicCreate, TopicUpdate, TopicBase
 from .study_plan import StudyPlan, StudyPlanCreate, StudyPlanUpdate, StudyPlanBase, StudyBlock, StudyBlockCreate, StudyBlockUpdate, StudyBlockBase 
 from .token import Token, TokenData
 # ... (existujúce importy)
-from .study_material import StudyMaterial, StudyMaterialCreate, StudyMaterialUpdate # PRIDANÉ
+from .study_material import StudyMaterial, StudyMaterialListItem, StudyMaterialCreate, StudyMaterialUpdate # PRIDANÉ
 
 from .achievement import Achievement, AchievementCreate, UserAchievement, UserAchievementCreate # PRIDANÉ
\ No newline at end of file
@@ -5,7 +5,7 @@ import json
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
-from app.db.enums import MaterialTypeEnum
+from app.db.enums import ExtractionStatus, MaterialTypeEnum
 
 class StudyMaterialBase(BaseModel):
     title: Optional[str] = Field(None, max_length=255)
@@ -23,14 +23,31 @@ class StudyMaterialUpdate(StudyMaterialBase):
         from_attributes = True
         extra = "ignore"   # ignore any other fields
 
+def _deserialize_str_list(v) -> List[str]:
+    if v in (None, ""):
+        return []
+    if isinstance(v, list):
+        return v
+    try:
+        return json.loads(v)
+    except Exception:
+        return [t.strip() for t in str(v).split(",") if t.strip()]
+
 class MaterialSummaryResponse(BaseModel):
     material_id: int
     file_name:   str
     summary:     Optional[str] = None
     ai_error:    Optional[str] = None
     word_count: Optional[int]   = None
+    key_concepts: List[str]     = []
+
+    @field_validator("key_concepts", mode="before")
+    @classmethod
+    def _deserialize_key_concepts(cls, v):
+        return _deserialize_str_list(v)
 
-class StudyMaterial(StudyMaterialBase):
+class StudyMaterialListItem(StudyMaterialBase):
+    """Zoznamy / predmety – bez veľkých textových polí (tie sú v DB deferred)."""
     id:          int
     file_name:   str
     file_type:   Optional[str]
@@ -39,18 +56,102 @@ class StudyMaterial(StudyMaterialBase):
     subject_id:  int
     owner_id:    int
     tags:        List[str] = []
+    extraction_status: Optional[ExtractionStatus] = None
+    page_count:           Optional[int] = None
+    word_count:           Optional[int] = None
+    char_count:           Optional[int] = None
+    reading_time_minutes: Optional[int] = None
 
     @field_validator("tags", mode="before")
     @classmethod
     def _deserialize_tags(cls, v):
-        if v in (None, ""):
-            return []
-        if isinstance(v, list):
-            return v
-        try:
-            return json.loads(v)
-        except Exception:
-            return [t.strip() for t in str(v).split(",") if t.strip()]
+        return _deserialize_str_list(v)
+
+    class Config:
+        from_attributes = True
+
+class StudyMaterial(StudyMaterialListItem):
+    """Detail materiálu – navyše AI sumarizácia a kľúčové pojmy."""
+    ai_summary:       Optional[str] = None
+    ai_summary_error: Optional[str] = None
+    ai_key_concepts:  List[str] = []
+
+    @field_validator("ai_key_concepts", mode="before")
+    @classmethod
+    def _deserialize_key_concepts(cls, v):
+        return _deserialize_str_list(v)
+
+class TagCount(BaseModel):
+    tag:   str
+    count: int
+
+    class Config:
+        from_attributes = True
+
+class MaterialSearchHit(BaseModel):
+    material_id: int
+    subject_id:  int
+    title:       Optional[str] = None
+    file_name:   str
+    score:       float
+    snippet:     Optional[str] = None
+
+class ExtractionJob(BaseModel):
+    material_id: int
+    status:      ExtractionStatus
+    pages_done:  int = 0
+    pages_total: Optional[int] = None
+    attempts:    int = 0
+    error:       Optional[str] = None
+    created_at:  Optional[datetime] = None
+    started_at:  Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class MaterialPage(BaseModel):
+    page_no:    int
+    text:       str
+    char_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class MaterialPagesResponse(BaseModel):
+    material_id: int
+    total_pages: int
+    pages:       List[MaterialPage] = []
+
+
+class BatchUploadSkipped(BaseModel):
+    file_name: str
+    reason:    str
+
+class BatchUploadResult(BaseModel):
+    created: List[StudyMaterialListItem] = []
+    skipped: List[BatchUploadSkipped] = []
+
+class UploadSessionCreate(StudyMaterialBase):
+    file_name:  str = Field(..., min_length=1, max_length=255)
+    file_type:  Optional[str] = None
+    total_size: int = Field(..., gt=0)
+
+
+class UploadSession(BaseModel):
+    id:             str
+    subject_id:     int
+    file_name:      str
+    file_type:      Optional[str] = None
+    total_size:     int
+    received_bytes: int
+    max_chunk_size: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UploadSessionComplete(BaseModel):
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64)
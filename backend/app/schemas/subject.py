@@ -12,13 +12,13 @@ class SubjectUpdate(BaseModel):
       name: Optional[str] = Field(None, min_length=1, max_length=100)
       description: Optional[str] = None
 
-from .study_material import StudyMaterial # Import novej schémy
+from .study_material import StudyMaterialListItem # Import novej schémy
 
 class Subject(SubjectBase): # Uprav existujúcu Subject schému
     id: int
     owner_id: int
     topics: List[Topic] = []
-    materials: List[StudyMaterial] = [] # PRIDANÉ
+    materials: List[StudyMaterialListItem] = [] # PRIDANÉ
 
     class Config:
         from_attributes = True
\ No newline at end of file
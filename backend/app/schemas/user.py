@@ -22,6 +22,12 @@ class PasswordReset(BaseModel):
     token: str
     new_password: str
     
+class StorageUsage(BaseModel):
+      bytes_used: int
+      material_count: int
+      quota_bytes: int
+      bytes_remaining: int
+
 class User(UserBase):
       id: int
       is_active: bool
@@ -0,0 +1,28 @@
+# backend/app/search/__init__.py
+"""
+Fulltextové vyhľadávanie v materiáloch (názov, popis, extrahovaný text).
+
+Backend sa volí podľa dialektu DB (`app.database.search_backend`):
+  • SQLite     – FTS5 tabuľka s externým obsahom, udržiavaná triggermi
+  • PostgreSQL – generovaný `tsvector` stĺpec s GIN indexom
+  • ostatné    – záloha cez LIKE bez indexu (`app.search.like`)
+Indexy SQLite a PostgreSQL sa aktualizujú priamo v DB pri INSERT/UPDATE/DELETE `study_materials`,
+takže index je vždy v súlade aj pri hromadných UPDATE (napr. poskladanie
+`extracted_text` zo strán) a kaskádových mazaniach.
+"""
+
+from app.search.base import SearchBackend, SearchHit
+
+
+def get_search_backend(dialect_name: str) -> SearchBackend:
+    if dialect_name == "sqlite":
+        from app.search.sqlite_fts5 import SqliteFts5Backend
+        return SqliteFts5Backend()
+    if dialect_name == "postgresql":
+        from app.search.postgres_tsvector import PostgresTsvectorBackend
+        return PostgresTsvectorBackend()
+    from app.search.like import LikeSearchBackend
+    return LikeSearchBackend()
+
+
+__all__ = ["SearchBackend", "SearchHit", "get_search_backend"]
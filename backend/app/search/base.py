@@ -0,0 +1,60 @@
+# backend/app/search/base.py
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# slová dotazu; všetko ostatné (úvodzovky, operátory …) sa zahodí,
+# aby používateľský vstup nemohol rozbiť syntax MATCH / tsquery
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MAX_QUERY_TOKENS = 16
+
+
+class SearchHit(NamedTuple):
+    material_id: int
+    subject_id:  int
+    title:       Optional[str]
+    file_name:   str
+    score:       float          # vyššie = relevantnejšie
+    snippet:     Optional[str]  # úryvok so zvýraznením <b>…</b>
+
+
+def tokenize_query(q: str) -> List[str]:
+    return _TOKEN_RE.findall(q)[:MAX_QUERY_TOKENS]
+
+
+def wants_prefix(q: str) -> bool:
+    """`foto*` – posledné slovo hľadať ako prefix. Len na požiadanie, lebo
+    krátky prefix sa rozvinie na veľa termov a ranking je potom rádovo pomalší."""
+    return q.rstrip().endswith("*")
+
+
+class SearchBackend(ABC):
+    """Spoločné rozhranie backendov (pozri `app.search`)."""
+
+    name = "base"
+
+    @abstractmethod
+    def ensure_schema(self, engine: Engine) -> None:
+        """Idempotentne vytvorí index (a naplní ho, ak je nový)."""
+
+    @abstractmethod
+    def rebuild(self, engine: Engine) -> None:
+        """Prebuduje celý index z `study_materials`."""
+
+    @abstractmethod
+    def search(
+        self,
+        db: Session,
+        owner_id: int,
+        q: str,
+        *,
+        subject_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[SearchHit]:
+        """Výsledky zoradené od najrelevantnejšieho."""
@@ -0,0 +1,104 @@
+# backend/app/search/like.py
+"""
+Záložný backend pre dialekty bez podporovaného fulltextu (MySQL, MSSQL …).
+
+Nepotrebuje žiadny index ani schému – každé slovo dotazu musí byť v názve,
+popise alebo texte (`ILIKE '%slovo%'`, takže aj ako časť slova). Dotaz
+prechádza celú tabuľku materiálov používateľa, preto je vhodný len pre
+menšie inštalácie. Poradie: váhy polí podobné BM25 váham SQLite backendu.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.models.study_material import StudyMaterial
+from app.search.base import SearchBackend, SearchHit, tokenize_query
+
+logger = logging.getLogger(__name__)
+
+# váhy polí: title, description, extracted_text
+FIELD_WEIGHTS = (10.0, 4.0, 1.0)
+# úryvok sa hľadá len v začiatku textu, aby sa nenačítaval celý
+SNIPPET_SCAN_CHARS = 100_000
+SNIPPET_CONTEXT_CHARS = 60
+
+
+def _escape_like(token: str) -> str:
+    return token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _snippet(text: Optional[str], tokens: List[str]) -> Optional[str]:
+    """Okolie prvého nájdeného slova so zvýraznením <b>…</b>."""
+    if not text:
+        return None
+    pattern = re.compile("|".join(re.escape(t) for t in tokens), re.IGNORECASE)
+    match = pattern.search(text)
+    if not match:
+        return None
+    start = max(0, match.start() - SNIPPET_CONTEXT_CHARS)
+    end = min(len(text), match.end() + SNIPPET_CONTEXT_CHARS)
+    fragment = pattern.sub(lambda m: f"<b>{m.group()}</b>", " ".join(text[start:end].split()))
+    return ("…" if start else "") + fragment + ("…" if end < len(text) else "")
+
+
+class LikeSearchBackend(SearchBackend):
+    name = "like"
+
+    def ensure_schema(self, engine: Engine) -> None:
+        logger.warning(
+            "No full-text index for dialect '%s' – material search falls back to LIKE", engine.dialect.name
+        )
+
+    def rebuild(self, engine: Engine) -> None:
+        """Nie je čo prebudovať."""
+
+    def search(
+        self,
+        db: Session,
+        owner_id: int,
+        q: str,
+        *,
+        subject_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[SearchHit]:
+        tokens = tokenize_query(q)
+        if not tokens:
+            return []
+        fields = (StudyMaterial.title, StudyMaterial.description, StudyMaterial.extracted_text)
+
+        conditions = []
+        score = 0.0
+        for token in tokens:
+            pattern = f"%{_escape_like(token)}%"
+            matches = [field.ilike(pattern, escape="\\") for field in fields]
+            conditions.append(or_(*matches))
+            for match, weight in zip(matches, FIELD_WEIGHTS):
+                score = score + case((match, weight), else_=0.0)
+
+        query = db.query(
+            StudyMaterial.id,
+            StudyMaterial.subject_id,
+            StudyMaterial.title,
+            StudyMaterial.file_name,
+            score.label("score"),
+            func.substr(
+                func.coalesce(StudyMaterial.extracted_text, StudyMaterial.description, ""), 1, SNIPPET_SCAN_CHARS
+            ).label("snippet_source"),
+        ).filter(StudyMaterial.owner_id == owner_id, and_(*conditions))
+        if subject_id is not None:
+            query = query.filter(StudyMaterial.subject_id == subject_id)
+        rows = query.order_by(score.desc(), StudyMaterial.id.desc()).limit(limit).offset(offset).all()
+
+        return [
+            SearchHit(row.id, row.subject_id, row.title, row.file_name, float(row.score),
+                      _snippet(row.snippet_source, tokens))
+            for row in rows
+        ]
@@ -0,0 +1,103 @@
+# backend/app/search/postgres_tsvector.py
+"""
+PostgreSQL backend – generovaný stĺpec `study_materials.search_tsv` s GIN indexom.
+
+Stĺpec je `GENERATED ALWAYS … STORED`, takže ho Postgres prepočíta pri
+každom INSERT / UPDATE riadku; mazanie nepotrebuje nič navyše.
+Postgres nemá vstavané BM25 – poradie dáva `ts_rank_cd` (cover density)
+s váhami A/B/C pre názov/popis/text, čo je najbližší natívny ekvivalent.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.search.base import SearchBackend, SearchHit, tokenize_query, wants_prefix
+
+logger = logging.getLogger(__name__)
+
+TS_CONFIG = "simple"   # slovenčina nemá vstavanú konfiguráciu
+# tsvector má limit 1 MB – z extrahovaného textu indexujeme len začiatok
+MAX_INDEXED_CHARS = 500_000
+# ts_headline je drahé, počítame ho len pre stranu výsledkov
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=24, MinWords=8, MaxFragments=1"
+
+_DDL = [
+    f"""
+    ALTER TABLE study_materials ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('{TS_CONFIG}', left(coalesce(extracted_text, ''), {MAX_INDEXED_CHARS})), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_study_materials_search_tsv ON study_materials USING GIN (search_tsv)",
+]
+
+
+def build_tsquery(q: str) -> Optional[str]:
+    """Slová spojené `&` (`foto*` → prefix posledného slova, `:*`)."""
+    tokens = tokenize_query(q)
+    if not tokens:
+        return None
+    parts = [t.lower() for t in tokens]
+    if wants_prefix(q):
+        parts[-1] += ":*"
+    return " & ".join(parts)
+
+
+class PostgresTsvectorBackend(SearchBackend):
+    name = "postgres-tsvector"
+
+    def ensure_schema(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            for stmt in _DDL:
+                conn.exec_driver_sql(stmt)
+
+    def rebuild(self, engine: Engine) -> None:
+        # generovaný stĺpec netreba prepočítavať, stačí obnoviť index
+        with engine.begin() as conn:
+            conn.exec_driver_sql("REINDEX INDEX ix_study_materials_search_tsv")
+
+    def search(
+        self,
+        db: Session,
+        owner_id: int,
+        q: str,
+        *,
+        subject_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[SearchHit]:
+        tsquery = build_tsquery(q)
+        if tsquery is None:
+            return []
+        subject_filter = "AND m.subject_id = :subject_id" if subject_id is not None else ""
+        rows = db.execute(
+            text(f"""
+                WITH query AS (SELECT to_tsquery('{TS_CONFIG}', :tsquery) AS tsq),
+                ranked AS (
+                    SELECT m.id, m.subject_id, m.title, m.file_name, m.description, m.extracted_text,
+                           ts_rank_cd(m.search_tsv, query.tsq) AS score
+                    FROM study_materials AS m, query
+                    WHERE m.search_tsv @@ query.tsq
+                      AND m.owner_id = :owner_id
+                      {subject_filter}
+                    ORDER BY score DESC
+                    LIMIT :limit OFFSET :offset
+                )
+                SELECT ranked.id, ranked.subject_id, ranked.title, ranked.file_name, ranked.score,
+                       ts_headline('{TS_CONFIG}',
+                                   left(coalesce(ranked.extracted_text, ranked.description, ''), {MAX_INDEXED_CHARS}),
+                                   query.tsq, '{HEADLINE_OPTIONS}') AS snippet
+                FROM ranked, query
+                ORDER BY ranked.score DESC
+            """),
+            {"tsquery": tsquery, "owner_id": owner_id, "subject_id": subject_id, "limit": limit, "offset": offset},
+        ).all()
+        return [SearchHit(*row) for row in rows]
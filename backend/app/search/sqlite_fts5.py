@@ -0,0 +1,131 @@
+# backend/app/search/sqlite_fts5.py
+"""
+SQLite FTS5 backend.
+
+`study_materials_fts` je FTS5 tabuľka s externým obsahom (`content=study_materials`),
+takže text sa neukladá dvakrát – v indexe sú len tokeny. Triggre ju
+aktualizujú pri každom INSERT / DELETE a pri UPDATE indexovaných stĺpcov.
+Poradie výsledkov je podľa vstavanej BM25 funkcie.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.search.base import SearchBackend, SearchHit, tokenize_query, wants_prefix
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "study_materials_fts"
+# váhy stĺpcov pre bm25(): title, description, extracted_text
+BM25_WEIGHTS = "10.0, 4.0, 1.0"
+SNIPPET_TOKENS = 16
+
+_COLUMNS = "title, description, extracted_text"
+
+_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_COLUMNS},
+        content='study_materials', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON study_materials BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS})
+        VALUES (new.id, new.title, new.description, new.extracted_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON study_materials BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.description, old.extracted_text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, description, extracted_text ON study_materials BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.description, old.extracted_text);
+        INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS})
+        VALUES (new.id, new.title, new.description, new.extracted_text);
+    END
+    """,
+]
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Slová ako FTS5 frázy spojené AND (`foto*` → prefix posledného slova)."""
+    tokens = tokenize_query(q)
+    if not tokens:
+        return None
+    parts = [f'"{t}"' for t in tokens]
+    if wants_prefix(q):
+        parts[-1] += "*"
+    return " ".join(parts)
+
+
+class SqliteFts5Backend(SearchBackend):
+    name = "sqlite-fts5"
+
+    def ensure_schema(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+            ).first()
+            for stmt in _DDL:
+                conn.exec_driver_sql(stmt)
+            if not exists:
+                # nová tabuľka – naplníme ju z existujúcich materiálov
+                conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+                logger.info("Created %s and indexed existing materials", FTS_TABLE)
+
+    def rebuild(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    def search(
+        self,
+        db: Session,
+        owner_id: int,
+        q: str,
+        *,
+        subject_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[SearchHit]:
+        match = build_match_query(q)
+        if match is None:
+            return []
+        subject_filter = "AND m.subject_id = :subject_id" if subject_id is not None else ""
+        # snippet() je drahé – vnútorný dotaz najprv vyberie stranu výsledkov
+        # podľa BM25, úryvky sa potom počítajú len pre tieto riadky
+        rows = db.execute(
+            text(f"""
+                WITH top AS (
+                    SELECT {FTS_TABLE}.rowid AS id, -bm25({FTS_TABLE}, {BM25_WEIGHTS}) AS score
+                    FROM {FTS_TABLE}
+                    JOIN study_materials AS m ON m.id = {FTS_TABLE}.rowid
+                    WHERE {FTS_TABLE} MATCH :match
+                      AND m.owner_id = :owner_id
+                      {subject_filter}
+                    ORDER BY score DESC
+                    LIMIT :limit OFFSET :offset
+                )
+                SELECT m.id, m.subject_id, m.title, m.file_name, top.score,
+                       snippet({FTS_TABLE}, -1, '<b>', '</b>', '…', {SNIPPET_TOKENS}) AS snippet
+                FROM top
+                JOIN {FTS_TABLE} ON {FTS_TABLE}.rowid = top.id
+                JOIN study_materials AS m ON m.id = top.id
+                WHERE {FTS_TABLE} MATCH :match
+                ORDER BY top.score DESC
+            """),
+            {"match": match, "owner_id": owner_id, "subject_id": subject_id, "limit": limit, "offset": offset},
+        ).all()
+        return [SearchHit(*row) for row in rows]
@@ -65,8 +65,8 @@ def check_and_grant_achievements(db: Session, user: UserModel, specific_event_ty
     user_with_relations = db.query(UserModel).options(
         selectinload(UserModel.subjects).options(
             selectinload(SubjectModel.topics),
-            selectinload(SubjectModel.materials)
         )
+        # materiály sa nenačítavajú – stačia nám počty (viď bod 6)
         # Pridaj ďalšie potrebné vzťahy, napr. pre StudyPlan, ak ich potrebuješ priamo z user objektu
     ).filter(UserModel.id == user.id).first()
 
@@ -149,10 +149,11 @@ def check_and_grant_achievements(db: Session, user: UserModel, specific_event_ty
         if ach_def:
             achievement_orm = defined_achievements_in_db.get(ach_def["name"])
             if achievement_orm:
-                for subject_item in current_user_state.subjects:
-                    if len(subject_item.materials) >= achievement_orm.criteria_value:
-                        if grant_achievement_if_not_yet_achieved(db, current_user_state, achievement_orm): granted_new = True
-                        break 
+                max_materials_in_subject = db.query(func.count(StudyMaterial.id)).filter(
+                    StudyMaterial.owner_id == current_user_state.id
+                ).group_by(StudyMaterial.subject_id).order_by(func.count(StudyMaterial.id).desc()).limit(1).scalar() or 0
+                if max_materials_in_subject >= achievement_orm.criteria_value:
+                    if grant_achievement_if_not_yet_achieved(db, current_user_state, achievement_orm): granted_new = True
 
     # 7. TOPICS_IN_SUBJECT_COMPLETED_PERCENT ("Polčas Predmetu")
     if not specific_event_type or specific_event_type == AchievementCriteriaType.TOPICS_IN_SUBJECT_COMPLETED_PERCENT:
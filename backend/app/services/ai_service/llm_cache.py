@@ -0,0 +1,289 @@
+# backend/app/services/ai_service/llm_cache.py
+"""
+Cache odpovedí LLM pred všetkými volaniami chat completion.
+
+Kľúč = SHA-256 z (model, teplota, max_tokens, response_format, správy
+s normalizovanými bielymi znakmi). Dve vrstvy:
+  1. LRU v procese (`LLM_CACHE_MEMORY_ENTRIES`) – bez I/O,
+  2. tabuľka `llm_response_cache` – prežije reštart a zdieľajú ju workery;
+     TTL `LLM_CACHE_TTL_HOURS`, veľkosť obmedzuje `LLM_CACHE_MAX_BYTES`.
+Rovnaké súbežné požiadavky čakajú na jedno volanie OpenAI.
+Chyby OpenAI sa necachujú; chyba DB vrstvy sa len zaloguje (= miss).
+Necachujú sa ani odpovede orezané na `max_tokens` (finish_reason "length")
+a odpovede, ktoré neprejdú `validate` volajúceho (napr. nevalidný JSON) –
+inak by sa chybná odpoveď opakovala až do vypršania TTL.
+Volania OpenAI idú cez `resilience.openai_guard`; keď je OpenAI dočasne
+nedostupné, vráti sa aj záznam po TTL (ak v DB ešte je).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.ai_service.resilience import LLMUnavailableError, openai_guard
+
+logger = logging.getLogger(__name__)
+
+# eviction v DB spúšťame po každom N-tom uložení, nie pri každom
+EVICT_EVERY_STORES = 50
+JSON_OBJECT_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+Validator = Callable[[str], bool]
+
+
+def _normalize(text: Optional[str]) -> str:
+    return " ".join((text or "").split())
+
+
+def cache_key(
+    *,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: Optional[int] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+) -> str:
+    payload = {
+        "model": model,
+        "temperature": round(float(temperature), 3),
+        "max_tokens": max_tokens,
+        "response_format": response_format,
+        "messages": [{"role": m["role"], "content": _normalize(m.get("content"))} for m in messages],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def json_response_validator(schema: Type[BaseModel]) -> Validator:
+    """`validate` pre JSON mode – cachuje sa len odpoveď, ktorú `schema` prijme."""
+
+    def validate(response: str) -> bool:
+        match = JSON_OBJECT_PATTERN.search(response)
+        if not match:
+            return False
+        try:
+            schema.model_validate_json(match.group())
+        except ValidationError:
+            return False
+        return True
+
+    return validate
+
+
+class LlmResponseCache:
+    def __init__(self, memory_entries: int, ttl: timedelta, max_bytes: int, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()   # key → (uložené o, odpoveď)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stores_since_evict = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.coalesced = 0      # čakali na rovnaký prebiehajúci request
+        self.misses = 0
+        self.stale_hits = 0     # záznam po TTL, lebo OpenAI bolo nedostupné
+        self.stores = 0
+        self.not_stored = 0     # orezané alebo nevalidné odpovede
+        self.invalid_hits = 0   # záznam v DB neprešiel `validate` (= miss)
+        self.evictions = 0
+        self.errors = 0
+
+    # -- pamäťová vrstva ------------------------------------------------------
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            stored_at, response = item
+            if time.time() - stored_at > self.ttl.total_seconds():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return response
+
+    def _memory_put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._memory[key] = (time.time(), response)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    # -- DB vrstva (beží v threadpoole) ---------------------------------------
+    def _db_get(self, key: str, allow_stale: bool = False) -> Optional[str]:
+        # app.crud importuje AI služby (crud_topic) – import až pri použití
+        from app.crud import crud_llm_cache
+
+        db = SessionLocal()
+        try:
+            return crud_llm_cache.get_cached_response(db, key, None if allow_stale else self.ttl)
+        except SQLAlchemyError as exc:
+            self.errors += 1
+            logger.warning("LLM cache lookup failed: %s", exc)
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, model: str, response: str) -> None:
+        from app.crud import crud_llm_cache
+
+        db = SessionLocal()
+        try:
+            crud_llm_cache.store_response(db, key, model, response)
+            self._stores_since_evict += 1
+            if self._stores_since_evict >= EVICT_EVERY_STORES:
+                self._stores_since_evict = 0
+                self.evictions += crud_llm_cache.evict(db, self.ttl, self.max_bytes)
+        except SQLAlchemyError as exc:
+            self.errors += 1
+            logger.warning("LLM cache store failed: %s", exc)
+            db.rollback()
+        finally:
+            db.close()
+
+    # -- API ------------------------------------------------------------------
+    async def chat_completion(
+        self,
+        client,
+        *,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        validate: Optional[Validator] = None,
+    ) -> str:
+        """
+        Text odpovede (`choices[0].message.content`); z cache, ak je k dispozícii.
+        Ak `validate` vráti False, odpoveď sa vráti, ale neuloží (a taký
+        záznam z DB sa nepoužije).
+        """
+        request = {"model": model, "messages": messages, "temperature": temperature}
+        if max_tokens is not None:
+            request["max_tokens"] = max_tokens
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        if not self.enabled:
+            response, _ = await self._call(client, request)
+            return response
+
+        key = cache_key(
+            model=model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, response_format=response_format,
+        )
+        cached = self._memory_get(key)
+        if cached is not None:
+            self.memory_hits += 1
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # rovnaký prompt sa práve počíta – počkáme na jeho výsledok
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            cached = await run_in_threadpool(self._db_get, key)
+            if cached is not None and validate is not None and not validate(cached):
+                # uložené pred zavedením validácie – prepíše ho nová odpoveď
+                self.invalid_hits += 1
+                cached = None
+            if cached is not None:
+                self.db_hits += 1
+                self._memory_put(key, cached)
+                future.set_result(cached)
+                return cached
+
+            self.misses += 1
+            try:
+                response, finish_reason = await self._call(client, request)
+            except LLMUnavailableError:
+                stale = await run_in_threadpool(self._db_get, key, True)
+                if stale is None or (validate is not None and not validate(stale)):
+                    raise
+                self.stale_hits += 1
+                logger.info("OpenAI unavailable – serving stale cached response")
+                future.set_result(stale)
+                return stale
+            if self._cacheable(response, finish_reason, validate):
+                self._memory_put(key, response)
+                await run_in_threadpool(self._db_put, key, model, response)
+                self.stores += 1
+            elif response:
+                self.not_stored += 1
+                logger.info("LLM response not cached (finish_reason=%s)", finish_reason)
+            future.set_result(response)
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()   # čakajúci ju dostanú; tu ju označíme ako spracovanú
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _cacheable(response: str, finish_reason: Optional[str], validate: Optional[Validator]) -> bool:
+        if not response or finish_reason == "length":
+            return False
+        return validate is None or validate(response)
+
+    @staticmethod
+    async def _call(client, request: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """(text odpovede, finish_reason)"""
+        completion = await openai_guard.create(client, request)
+        choice = completion.choices[0]
+        return (choice.message.content or "").strip(), getattr(choice, "finish_reason", None)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.memory_hits + self.db_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "not_stored": self.not_stored,
+            "invalid_hits": self.invalid_hits,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+
+llm_cache = LlmResponseCache(
+    memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+    ttl=timedelta(hours=settings.LLM_CACHE_TTL_HOURS),
+    max_bytes=settings.LLM_CACHE_MAX_BYTES,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
@@ -1,88 +1,255 @@
 from __future__ import annotations
 
-import json, logging, re
+import asyncio, hashlib, logging, re
 from typing import Any, Dict, List
 
-from app.services.ai_service.openai_service import client as openai_client
+from pydantic import BaseModel, ValidationError
+
+from app.services.ai_service.llm_cache import json_response_validator, llm_cache
+from app.services.ai_service.openai_service import get_client
+from app.services.ai_service.prompt_budget import CHARS_PER_TOKEN, PromptBuilder, count_tokens
+from app.services.ai_service.resilience import LLMUnavailableError
 
 logger = logging.getLogger(__name__)
 
-MAX_TEXT_FOR_SUMMARY = 8_000
+# Dlhé texty sa sumarizujú hierarchicky (map-reduce):
+#   1. text sa rozdelí na úseky ~MAP_CHUNK_TOKENS tokenov,
+#   2. každý úsek sa zhrnie zvlášť (súbežne, najviac MAP_CONCURRENCY naraz),
+#   3. čiastkové zhrnutia sa zlúčia (pri veľkom počte najprv po skupinách)
+#      a posledné volanie v JSON mode vráti sumarizáciu, tagy aj pojmy naraz.
+# Hranice úsekov určuje obsah riadkov (nie pozícia), takže malá úprava textu
+# zmení len okolité úseky – ostatné čiastkové zhrnutia idú z `llm_cache`.
+# Tokeny počíta `prompt_budget` (tokenizer modelu, inak odhad).
+SUMMARY_MODEL = "gpt-3.5-turbo"
+SYSTEM_PROMPT = "Si AI asistent na sumarizáciu študijných textov."
+JSON_PARSE_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+MAP_CHUNK_TOKENS = 2_000
+MIN_CHUNK_TOKENS = MAP_CHUNK_TOKENS // 2
+BOUNDARY_MODULUS = 32               # ~každý 32. riadok nad minimom ukončí úsek
+MAP_CONCURRENCY = 4
+REDUCE_INPUT_TOKENS = 3_000         # koľko čiastkových zhrnutí zlúčime naraz
+MAP_MAX_TOKENS = 250
+ANALYSIS_MAX_TOKENS = 600
+
+
+def estimate_tokens(text: str) -> int:
+    return count_tokens(text, SUMMARY_MODEL)
+
+
+def _lines(text: str) -> List[str]:
+    """Neprázdne riadky; príliš dlhé (text bez zalomení) rozseká po ~MIN_CHUNK_TOKENS."""
+    max_chars = MIN_CHUNK_TOKENS * CHARS_PER_TOKEN
+    out: List[str] = []
+    for line in re.split(r"[\n\f]", text):
+        line = line.strip()
+        while len(line) > max_chars:
+            cut = line.rfind(" ", 0, max_chars)
+            cut = cut if cut > max_chars // 2 else max_chars
+            out.append(line[:cut])
+            line = line[cut:].strip()
+        if line:
+            out.append(line)
+    return out
+
+
+def split_into_chunks(text: str) -> List[str]:
+    """
+    Content-defined chunking: úsek končí po riadku, ktorého hash padne na
+    hranicu (a úsek má aspoň MIN_CHUNK_TOKENS), alebo pri MAP_CHUNK_TOKENS.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    tokens = 0
+    for line in _lines(text):
+        line_tokens = estimate_tokens(line)
+        if current and tokens + line_tokens > MAP_CHUNK_TOKENS:
+            chunks.append("\n".join(current))
+            current, tokens = [], 0
+        current.append(line)
+        tokens += line_tokens
+        boundary = int.from_bytes(hashlib.blake2b(line.encode("utf-8"), digest_size=4).digest(), "big")
+        if tokens >= MIN_CHUNK_TOKENS and boundary % BOUNDARY_MODULUS == 0:
+            chunks.append("\n".join(current))
+            current, tokens = [], 0
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class MaterialAnalysis(BaseModel):
+    """Štruktúra očakávanej LLM odpovede (JSON mode)."""
+
+    summary: str
+    bullets: List[str] = []
+    tags: List[str] = []
+    key_concepts: List[str] = []
+
+
+def _system_prompt(json_mode: bool) -> str:
+    return SYSTEM_PROMPT + (" Vráť výhradne JSON." if json_mode else "")
+
+
+def _analysis_prompt(text: str, max_length: int, *, from_partials: bool = False) -> str:
+    source = "Nasleduje text zo študijného materiálu." if not from_partials else (
+        "Nasledujú zhrnutia po sebe idúcich častí jedného študijného materiálu."
+    )
+    prompt = PromptBuilder(
+        SUMMARY_MODEL,
+        max_output_tokens=ANALYSIS_MAX_TOKENS,
+        system=_system_prompt(json_mode=True),
+        purpose="material_analysis",
+    )
+    prompt.add(f"""
+{source} Vráť čistý JSON s kľúčmi:
+"bullets" – 2 až 3 kľúčové myšlienky (list str),
+"summary" – stručná sumarizácia (~{max_length} slov, str),
+"tags" – 3 až 5 najrelevantnejších tagov v slovenčine, jednoslovné alebo krátke
+         viacslovné výrazy bez úvodných '#' (list str),
+"key_concepts" – 3 až 8 pojmov, ktoré sa treba naučiť (list str).
+
+--- TEXT ---""")
+    prompt.add(text, priority=1, truncate=True)
+    prompt.add("---")
+    return prompt.build()
+
+
+def format_summary(analysis: MaterialAnalysis) -> str:
+    """Text pre `ai_summary` v pôvodnom formáte (odrážky + Sumarizácia)."""
+    bullets = "\n".join(f"• {b.strip()}" for b in analysis.bullets if b.strip())
+    summary = f"Sumarizácia:\n{analysis.summary.strip()}"
+    return f"{bullets}\n\n{summary}" if bullets else summary
+
+
+def _clean_list(items: List[str], limit: int) -> List[str]:
+    seen: Dict[str, None] = {}
+    for item in items:
+        item = item.strip().lstrip("#").strip()
+        if item and item.lower() not in (k.lower() for k in seen):
+            seen[item] = None
+    return list(seen)[:limit]
+
+
+async def _complete(openai_client, prompt: str, max_tokens: int, *, json_mode: bool = False) -> str:
+    return await llm_cache.chat_completion(
+        openai_client,
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": _system_prompt(json_mode)},
+            {"role": "user",   "content": prompt},
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens,
+        response_format={"type": "json_object"} if json_mode else None,
+        validate=json_response_validator(MaterialAnalysis) if json_mode else None,
+    )
+
+
+async def _summarize_chunk(openai_client, chunk: str, limiter: asyncio.Semaphore) -> str:
+    prompt = PromptBuilder(
+        SUMMARY_MODEL,
+        max_output_tokens=MAP_MAX_TOKENS,
+        system=_system_prompt(json_mode=False),
+        purpose="material_chunk",
+    )
+    prompt.add("""
+Stručne zhrň nasledujúcu časť študijného materiálu (najviac 120 slov).
+Zachovaj pojmy, definície a vzťahy, ktoré sú dôležité na učenie.
+
+--- ČASŤ ---""")
+    prompt.add(chunk, priority=1, truncate=True)
+    prompt.add("---")
+    async with limiter:
+        return await _complete(openai_client, prompt.build(), MAP_MAX_TOKENS)
+
+
+async def _reduce(openai_client, partials: List[str], limiter: asyncio.Semaphore) -> List[str]:
+    """Zlúči čiastkové zhrnutia po skupinách, kým sa nezmestia do jedného promptu."""
+    while estimate_tokens("\n\n".join(partials)) > REDUCE_INPUT_TOKENS and len(partials) > 1:
+        groups: List[List[str]] = [[]]
+        size = 0
+        for part in partials:
+            part_tokens = estimate_tokens(part)
+            if groups[-1] and size + part_tokens > REDUCE_INPUT_TOKENS:
+                groups.append([])
+                size = 0
+            groups[-1].append(part)
+            size += part_tokens
+        if len(groups) == len(partials):
+            break   # každé zhrnutie je samo o sebe príliš dlhé – nezmenšíme to
+        partials = list(await asyncio.gather(*[
+            _summarize_chunk(openai_client, "\n\n".join(group), limiter) for group in groups
+        ]))
+    return partials
 
 
 # ───────────────────────────────
-#        SUMMARY + BULLETS
+#   SUMMARY + BULLETS + TAGS + POJMY
 # ───────────────────────────────
-def summarize_text_with_openai(text_content: str, max_length: int = 150) -> Dict[str, Any]:
+def _empty_analysis(error: str, *, summary: str | None = None, retryable: bool = False) -> Dict[str, Any]:
+    return {"summary": summary, "tags": [], "key_concepts": [], "error": error, "retryable": retryable}
+
+
+def local_summary(text: str, max_words: int) -> str:
+    """Náhradné zhrnutie bez AI – úvodné vety textu (najviac ~max_words slov)."""
+    words: List[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", " ".join(text.split())):
+        if words and len(words) + len(sentence.split()) > max_words:
+            break
+        words += sentence.split()
+    return " ".join(words[:max_words])
+
+
+async def analyze_material_with_openai(text_content: str, max_length: int = 150) -> Dict[str, Any]:
+    """
+    Jedno volanie (JSON mode) pre sumarizáciu, tagy aj kľúčové pojmy.
+    Vráti {"summary" (formát pre `ai_summary`), "tags", "key_concepts", "error",
+    "retryable"}. Pri dočasnej nedostupnosti OpenAI je `retryable` True
+    a `summary` je lokálne `local_summary` – také výsledky sa neukladajú.
+    """
+    openai_client = get_client()
     if not openai_client:
-        return {"summary": None, "error": "OpenAI client not initialized."}
+        return _empty_analysis("OpenAI client not initialized.")
 
     if not text_content.strip():
-        return {"summary": None, "error": "No content provided."}
-
-    prompt = f"""
-Nasleduje text zo študijného materiálu. Najprv vypíš 2 až 3 kľúčové myšlienky
-ako odrážky, potom stručnú sumarizáciu (~{max_length} slov). Vráť presne v
-tomto formáte:
-
-• myšlienka 1
-• myšlienka 2
-• myšlienka 3 (ak treba)
-
-Sumarizácia:
-<odstavce>
-
---- TEXT ---
-{text_content[:MAX_TEXT_FOR_SUMMARY]}
----
-"""
-    try:
-        completion = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Si AI asistent na sumarizáciu študijných textov."},
-                {"role": "user",   "content": prompt},
-            ],
-            temperature=0.3,
-            max_tokens=400,
-        )
-        return {"summary": completion.choices[0].message.content.strip(), "error": None}
-
-    except Exception as e:  # pylint: disable=broad-except
-        logger.error("OpenAI summarization failed: %s", e, exc_info=True)
-        return {"summary": None, "error": str(e)}
-
-
-# ───────────────────────────────
-#              TAGS
-# ───────────────────────────────
-def extract_tags_from_text(text_content: str) -> List[str]:
-    if not openai_client:
-        return []
+        return _empty_analysis("No content provided.")
 
-    prompt = f"""
-Zo študijného textu vyber 3-5 najrelevantnejších tagov (jednoslovné alebo
-krátke viacslovné výrazy) v slovenčine. Vráť ich ako čiarkou alebo
-novým riadkom oddelený zoznam bez úvodných '#'.
-
---- TEXT ---
-{text_content[:5_000]}
----
-"""
     try:
-        completion = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Si AI na kategorizovanie textov."},
-                {"role": "user",   "content": prompt},
-            ],
-            temperature=0.4,
-            max_tokens=120,
+        # tokenizácia celého textu je CPU práca – nie na event loope
+        chunks = await asyncio.to_thread(split_into_chunks, text_content)
+        if len(chunks) <= 1:
+            prompt = _analysis_prompt(text_content.strip(), max_length)
+        else:
+            limiter = asyncio.Semaphore(MAP_CONCURRENCY)
+            partials = list(await asyncio.gather(*[
+                _summarize_chunk(openai_client, chunk, limiter) for chunk in chunks
+            ]))
+            partials = await _reduce(openai_client, partials, limiter)
+            logger.info("Map-reduce summary: %d chunks → %d partial summaries", len(chunks), len(partials))
+            prompt = _analysis_prompt("\n\n".join(partials), max_length, from_partials=True)
+
+        raw = await _complete(openai_client, prompt, ANALYSIS_MAX_TOKENS, json_mode=True)
+        match = JSON_PARSE_PATTERN.search(raw or "")
+        if not match:
+            raise ValueError("LLM nevrátil JSON objekt")
+        analysis = MaterialAnalysis.model_validate_json(match.group())
+        return {
+            "summary": format_summary(analysis),
+            "tags": _clean_list(analysis.tags, 5),
+            "key_concepts": _clean_list(analysis.key_concepts, 8),
+            "error": None,
+            "retryable": False,
+        }
+
+    except LLMUnavailableError as e:
+        logger.warning("OpenAI unavailable, using local summary: %s", e)
+        return _empty_analysis(
+            "AI is temporarily unavailable – showing the beginning of the text instead.",
+            summary=await asyncio.to_thread(local_summary, text_content, max_length),
+            retryable=True,
         )
-        raw = completion.choices[0].message.content.strip()
-        tags = [t.strip().lstrip("#") for t in re.split(r"[,\n]+", raw) if t.strip()]
-        return tags[:5]
-
+    except (ValidationError, ValueError) as e:
+        logger.error("Material analysis returned invalid JSON: %s", e)
+        return _empty_analysis(f"Parsing error: {e}")
     except Exception as e:  # pylint: disable=broad-except
-        logger.error("Tag extraction failed: %s", e, exc_info=True)
-        return []
+        logger.error("OpenAI material analysis failed: %s", e, exc_info=True)
+        return _empty_analysis(str(e))
@@ -1,15 +1,58 @@
-# Napríklad v backend/app/services/openai_service.py (nový súbor)
+# backend/app/services/ai_service/openai_service.py
+"""
+Zdieľaný asynchrónny OpenAI klient.
+
+Jeden `AsyncOpenAI` s jedným poolom HTTP spojení (httpx) pre celú
+aplikáciu – čakanie na completion nedrží vlákno z threadpoolu, takže
+stovky rozpracovaných requestov nezablokujú ostatné endpointy.
+Klient sa vytvára lenivo (v bežiacom event loope) a zatvára pri shutdowne.
+Vlastné retry SDK sú vypnuté – opakovanie a limity rieši `resilience`.
+"""
+
+from __future__ import annotations
+
+import logging
 from typing import Optional
-from openai import OpenAI
+
+import httpx
+from openai import AsyncOpenAI
+
 from app.config import settings
 
-client: Optional[OpenAI] = None
-if settings.OPENAI_API_KEY:
-    try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        print("OpenAI client initialized successfully.")
-    except Exception as e:
-        print(f"Error initializing OpenAI client: {e}")
-        client = None # Zabezpeč, že client je None, ak inicializácia zlyhá
-else:
-    print("OPENAI_API_KEY not found. OpenAI features will be disabled.")
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncOpenAI] = None
+
+if not settings.OPENAI_API_KEY:
+    print("OPENAI_API_KEY not found. OpenAI features will be disabled.")
+
+
+def get_client() -> Optional[AsyncOpenAI]:
+    """Zdieľaný klient; None ak OpenAI nie je nakonfigurované."""
+    global _client
+    if _client is None and settings.OPENAI_API_KEY:
+        try:
+            _client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                timeout=settings.OPENAI_TIMEOUT_SECONDS,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    ),
+                    timeout=settings.OPENAI_TIMEOUT_SECONDS,
+                ),
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("Error initializing OpenAI client: %s", exc)
+            return None
+    return _client
+
+
+async def close_client() -> None:
+    """Zavrie pool spojení (shutdown aplikácie)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,206 @@
+# backend/app/services/ai_service/prompt_budget.py
+"""
+Skladanie promptov podľa tokenového rozpočtu modelu.
+
+Tokeny počíta lokálny tokenizer (`tiktoken`, voliteľná závislosť). Ak nie je
+nainštalovaný alebo nevie načítať kódovanie (offline bez TIKTOKEN_CACHE_DIR),
+použije sa odhad ~CHARS_PER_TOKEN znakov na token. tiktoken pri prvom použití
+sťahuje BPE súbor (do TIKTOKEN_CACHE_DIR) – `warm_up` ho preto načíta pri
+štarte mimo event loopu; Docker image ho má stiahnutý už pri builde.
+
+Rozpočet vstupu = kontextové okno modelu − rezerva na odpoveď (`max_tokens`)
+− réžia správ, najviac však `LLM_PROMPT_MAX_TOKENS` (latencia a cena).
+`PromptBuilder` plní rozpočet časťami podľa priority; časti s `truncate=True`
+sa pri nedostatku miesta skrátia, ostatné sa vynechajú. Počty tokenov
+odoslaných promptov sa zbierajú v `prompt_metrics` (GET /ai/prompt-stats).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4                 # odhad, keď nie je k dispozícii tokenizer
+DEFAULT_CONTEXT_TOKENS = 8_192
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+# réžia chat formátu: ~4 tokeny na správu + 3 na začiatok odpovede
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+# kratší zvyšok už nemá zmysel posielať – časť sa radšej vynechá
+MIN_TRUNCATED_TOKENS = 50
+TRUNCATION_MARK = " …"
+
+
+# --------------------------------------------------------------------------- #
+# Počítanie tokenov                                                           #
+# --------------------------------------------------------------------------- #
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken kódovanie pre model; None ak tokenizer nie je k dispozícii."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed – estimating tokens as chars/%d", CHARS_PER_TOKEN)
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:  # pylint: disable=broad-except
+        # kódovanie sa pri prvom použití sťahuje – offline to zlyhá
+        logger.warning("Could not load tiktoken encoding for %s (%s) – estimating tokens", model, exc)
+        return None
+
+
+def warm_up(models: Iterable[str]) -> None:
+    """Načíta kódovania vopred (blokujúce – volaj vo vlákne)."""
+    for model in set(models):
+        logger.info("Tokenizer for %s: %s", model, tokenizer_name(model))
+
+
+def tokenizer_name(model: str) -> str:
+    encoding = _encoding(model)
+    return f"tiktoken:{encoding.name}" if encoding is not None else "estimate"
+
+
+def count_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: str) -> int:
+    """Tokeny celého requestu chat completion (obsah + réžia správ)."""
+    return TOKENS_PER_REPLY + sum(
+        TOKENS_PER_MESSAGE + count_tokens(m.get("content") or "", model) for m in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Začiatok textu, ktorý má najviac `max_tokens` tokenov."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        cut = text.rfind(" ", 0, max_chars)
+        return text[:cut if cut > max_chars // 2 else max_chars]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def context_window(model: str) -> int:
+    return MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+
+
+def input_budget(model: str, max_output_tokens: int) -> int:
+    """Koľko tokenov smú mať správy requestu (bez rezervy na odpoveď)."""
+    return max(0, min(context_window(model) - max_output_tokens, settings.LLM_PROMPT_MAX_TOKENS))
+
+# --------------------------------------------------------------------------- #
+# Metriky                                                                     #
+# --------------------------------------------------------------------------- #
+class PromptMetrics:
+    """Počítadlá veľkosti promptov podľa účelu (pre tento proces)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_purpose: Dict[str, Dict[str, int]] = {}
+
+    def record(self, purpose: str, prompt_tokens: int, *, truncated: int = 0, dropped: int = 0) -> None:
+        with self._lock:
+            m = self._by_purpose.setdefault(
+                purpose, {"prompts": 0, "prompt_tokens": 0, "max_prompt_tokens": 0, "truncated": 0, "dropped": 0}
+            )
+            m["prompts"] += 1
+            m["prompt_tokens"] += prompt_tokens
+            m["max_prompt_tokens"] = max(m["max_prompt_tokens"], prompt_tokens)
+            m["truncated"] += truncated
+            m["dropped"] += dropped
+        logger.debug("Prompt %s: %d tokens (truncated %d, dropped %d)", purpose, prompt_tokens, truncated, dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                purpose: {**m, "avg_prompt_tokens": round(m["prompt_tokens"] / m["prompts"], 1)}
+                for purpose, m in self._by_purpose.items()
+            }
+
+
+prompt_metrics = PromptMetrics()
+
+# --------------------------------------------------------------------------- #
+# Skladanie promptu                                                           #
+# --------------------------------------------------------------------------- #
+class _Section(NamedTuple):
+    text: str
+    priority: int
+    truncate: bool
+
+
+class PromptBuilder:
+    """
+    Poskladá user prompt z častí tak, aby request (so system správou) neprekročil
+    `input_budget`. Miesto dostávajú časti podľa `priority` (0 = najdôležitejšia,
+    pri zhode v poradí pridania); vo výsledku ostáva pôvodné poradie.
+    Časti s prioritou 0 (inštrukcie) sa nikdy neskracujú ani nevynechávajú.
+    """
+
+    def __init__(self, model: str, *, max_output_tokens: int, system: str = "", purpose: str = "prompt") -> None:
+        self.model = model
+        self.system = system
+        self.purpose = purpose
+        self.budget = input_budget(model, max_output_tokens)
+        self._sections: List[_Section] = []
+
+    def add(self, text: Optional[str], *, priority: int = 0, truncate: bool = False) -> "PromptBuilder":
+        if text:
+            self._sections.append(_Section(text, priority, truncate))
+        return self
+
+    def build(self) -> str:
+        overhead = TOKENS_PER_REPLY + 2 * TOKENS_PER_MESSAGE + count_tokens(self.system, self.model)
+        remaining = self.budget - overhead
+        kept: Dict[int, str] = {}
+        truncated = dropped = 0
+
+        order = sorted(range(len(self._sections)), key=lambda i: self._sections[i].priority)
+        for i in order:
+            section = self._sections[i]
+            tokens = count_tokens(section.text, self.model) + 1   # +1 za oddeľovač
+            if tokens <= remaining or section.priority == 0:
+                kept[i] = section.text
+                remaining -= tokens
+            elif section.truncate and remaining >= MIN_TRUNCATED_TOKENS:
+                room = remaining - 1 - count_tokens(TRUNCATION_MARK, self.model)
+                kept[i] = truncate_to_tokens(section.text, room, self.model).rstrip() + TRUNCATION_MARK
+                remaining = 0
+                truncated += 1
+            else:
+                dropped += 1
+
+        prompt = "\n".join(kept[i] for i in sorted(kept))
+        prompt_metrics.record(
+            self.purpose, overhead + count_tokens(prompt, self.model), truncated=truncated, dropped=dropped
+        )
+        return prompt
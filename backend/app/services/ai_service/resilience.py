@@ -0,0 +1,307 @@
+# backend/app/services/ai_service/resilience.py
+"""
+Ochrana volaní OpenAI (používa ju `llm_cache` pri každom miss-e).
+
+  1. token bucket na requesty aj tokeny za minútu (`OPENAI_REQUESTS_PER_MINUTE`,
+     `OPENAI_TOKENS_PER_MINUTE`) – pri špičke sa čaká v poradí príchodu,
+     namiesto aby sme API zahltili a dostali ďalšie 429,
+  2. retry s exponenciálnym backoffom a jitterom pri 429, timeoutoch,
+     chybách spojenia a 5xx (rešpektuje Retry-After),
+  3. circuit breaker – po `OPENAI_CIRCUIT_FAILURES` zlyhaniach po sebe
+     odmieta volania `OPENAI_CIRCUIT_RESET_SECONDS` sekúnd, potom pustí
+     jeden skúšobný request.
+Dočasná nedostupnosť sa hlási ako `LLMUnavailableError` – volajúci ju
+nemajú ukladať do DB, ale ponúknuť cache alebo lokálny fallback.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, Optional
+
+import openai
+
+from app.config import settings
+from app.services.ai_service.prompt_budget import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+# ak request neobmedzuje max_tokens, počítame s takouto odpoveďou
+DEFAULT_COMPLETION_TOKENS = 1_000
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI je dočasne nedostupné (throttling, timeouty, otvorený circuit breaker)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.RateLimitError):
+        # vyčerpaný kredit sa opakovaním nezlepší
+        return getattr(exc, "code", None) != "insufficient_quota"
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+# --------------------------------------------------------------------------- #
+# Token bucket                                                                #
+# --------------------------------------------------------------------------- #
+class TokenBucket:
+    """
+    Limit `per_minute` jednotiek za minútu (plynulo dopĺňaný, špička najviac
+    `per_minute`). `reserve` jednotky hneď odpočíta – zostatok môže ísť do
+    mínusu a deficit určuje, ako dlho musí volajúci počkať (teda aj na tých,
+    čo sú v poradí pred ním). Ak by čakanie trvalo dlhšie ako `max_wait`,
+    nič neodpočíta a vyhodí LLMUnavailableError. 0 = bez limitu.
+    """
+
+    def __init__(self, per_minute: int, name: str) -> None:
+        self.name = name
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self.waited_seconds = 0.0
+        self.rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, max_wait: float) -> float:
+        """Rezervuje `amount` jednotiek a vráti sekundy, ktoré treba počkať."""
+        if self.capacity <= 0:
+            return 0.0
+        amount = min(float(amount), self.capacity)
+        self._refill()
+        wait = max(0.0, (amount - self._tokens) / self.rate)
+        if wait > max_wait:
+            self.rejected += 1
+            raise LLMUnavailableError(f"OpenAI {self.name} limit reached", retry_after=wait)
+        self._tokens -= amount
+        self.waited_seconds += wait
+        return wait
+
+    def release(self, amount: float) -> None:
+        """Vráti rezerváciu, ktorá sa nakoniec nepoužila."""
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + min(float(amount), self.capacity))
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "per_minute": int(self.capacity),
+            "available": int(self._tokens),
+            "waited_seconds": round(self.waited_seconds, 2),
+            "rejected": self.rejected,
+        }
+
+# --------------------------------------------------------------------------- #
+# Circuit breaker                                                             #
+# --------------------------------------------------------------------------- #
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0           # zlyhania po sebe
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Sekundy do skúšobného requestu (0, ak breaker nie je otvorený)."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def before_call(self) -> bool:
+        """
+        Vyhodí LLMUnavailableError, ak sa volanie nemá skúšať. Vráti True, ak je
+        volanie skúšobné – volajúci ho potom musí uzavrieť (record_* / release_probe).
+        """
+        if self.state == self.OPEN and self.retry_after() <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.CLOSED:
+            return False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True     # jeden skúšobný request
+            return True
+        self.rejected += 1
+        raise LLMUnavailableError("OpenAI is temporarily unavailable", retry_after=self.retry_after() or None)
+
+    def release_probe(self) -> None:
+        """Skúšobný request sa nakoniec neposlal (limit, zrušenie) – pustí ďalší."""
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("OpenAI circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(
+                    "OpenAI circuit breaker opened after %d failures (for %.0f s)", self.failures, self.reset_seconds
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 1) if self.state == self.OPEN else None,
+        }
+
+# --------------------------------------------------------------------------- #
+# Guard                                                                       #
+# --------------------------------------------------------------------------- #
+class OpenAIGuard:
+    def __init__(
+        self,
+        *,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        max_wait: float,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute, "requests per minute")
+        self.tokens = TokenBucket(tokens_per_minute, "tokens per minute")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self.breaker = breaker
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        # „full jitter“ – súbežné requesty sa po 429 nevrátia naraz
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def create(self, client, request: Dict[str, Any]):
+        """`client.chat.completions.create(**request)` s limitmi, retry a circuit breakerom."""
+        probe = self.breaker.before_call()
+        try:
+            return await self._create(client, request)
+        finally:
+            # aj pri CancelledError (klient sa odpojil) – inak by breaker
+            # v HALF_OPEN navždy čakal na skúšobný request, ktorý neskončí;
+            # po record_success/record_failure je to no-op
+            if probe:
+                self.breaker.release_probe()
+
+    async def _wait_for_capacity(self, cost: int) -> None:
+        """Rezervuje request aj tokeny naraz a počká na dlhšiu z dvoch rezervácií."""
+        wait = self.requests.reserve(1, self.max_wait)
+        try:
+            wait = max(wait, self.tokens.reserve(cost, self.max_wait))
+        except LLMUnavailableError:
+            self.requests.release(1)
+            raise
+        if wait <= 0:
+            return
+        try:
+            await asyncio.sleep(wait)
+        except BaseException:
+            self.requests.release(1)
+            self.tokens.release(cost)
+            raise
+
+    async def _create(self, client, request: Dict[str, Any]):
+        cost = count_message_tokens(request["messages"], request["model"]) + (
+            request.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+        )
+        attempt = 0
+        while True:
+            await self._wait_for_capacity(cost)
+            self.calls += 1
+            try:
+                completion = await client.chat.completions.create(**request)
+            except Exception as exc:  # pylint: disable=broad-except
+                if not is_retryable(exc):
+                    self.breaker.record_success()   # API odpovedalo (napr. 400) – je zdravé
+                    raise
+                if attempt >= self.max_retries:
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    logger.warning("OpenAI call failed after %d attempts: %s", attempt + 1, exc)
+                    raise LLMUnavailableError(
+                        f"OpenAI is temporarily unavailable: {exc}", retry_after=_retry_after_seconds(exc)
+                    ) from exc
+                delay = self._backoff(attempt, exc)
+                attempt += 1
+                self.retries += 1
+                logger.info("OpenAI call failed (%s), retry %d in %.1f s", type(exc).__name__, attempt, delay)
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return completion
+
+    def retry_after_seconds(self) -> int:
+        """Odporúčaná hodnota hlavičky Retry-After pre klienta API."""
+        return max(1, math.ceil(self.breaker.retry_after()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "circuit": self.breaker.stats(),
+            "requests_bucket": self.requests.stats(),
+            "tokens_bucket": self.tokens.stats(),
+        }
+
+
+openai_guard = OpenAIGuard(
+    requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+    max_retries=settings.OPENAI_MAX_RETRIES,
+    backoff_base=settings.OPENAI_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.OPENAI_BACKOFF_MAX_SECONDS,
+    max_wait=settings.OPENAI_MAX_QUEUE_SECONDS,
+    breaker=CircuitBreaker(settings.OPENAI_CIRCUIT_FAILURES, settings.OPENAI_CIRCUIT_RESET_SECONDS),
+)
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import re
@@ -14,7 +15,10 @@ from pydantic import BaseModel, ValidationError
 
 from app.db.models.topic import Topic as TopicModel
 from app.db.models.study_material import StudyMaterial as StudyMaterialModel
-from app.services.ai_service.openai_service import client as openai_client
+from app.services.ai_service.llm_cache import json_response_validator, llm_cache
+from app.services.ai_service.openai_service import get_client
+from app.services.ai_service.prompt_budget import PromptBuilder
+from app.services.ai_service.resilience import LLMUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +26,13 @@ logger = logging.getLogger(__name__)
 OPENAI_MODEL_NAME = "gpt-3.5-turbo"  # Jediný riadok, kde meníš použitý model
 USER_AI_BLEND_RATIO = 0.5          # 50 % váha pre používateľa, 50 % pre AI
 JSON_PARSE_PATTERN = re.compile(r"\{.*\}", re.DOTALL)  # Regex fallback
+TOPIC_MAX_TOKENS = 400             # rezerva na odpoveď pre jednu tému
+SYSTEM_PROMPT = (
+    "Si expert na analýzu študijných tém a tvorbu edukatívneho obsahu. "
+    "Vráť výhradne JSON."
+)
+TOPIC_ANALYSIS_CONCURRENCY = 5     # súbežné volania pri analýze celého predmetu
+MAX_TOPICS_PER_PROMPT = 10
 
 # -- Dátové štruktúry ---------------------------------------------------------
 class AIAnalysis(BaseModel):
@@ -33,6 +44,16 @@ class AIAnalysis(BaseModel):
     practice_questions: List[str]
 
 
+class AIBatchTopic(AIAnalysis):
+    index: int
+
+
+class AIBatchAnalysis(BaseModel):
+    """Odpoveď pre viac tém v jednom prompte."""
+
+    topics: List[AIBatchTopic]
+
+
 # -- Pomocné funkcie ----------------------------------------------------------
 
 def extract_text_from_material(material: StudyMaterialModel) -> Optional[str]:
@@ -63,32 +84,34 @@ def _build_prompt(
     user_estimated_difficulty: Optional[float],
     material_summaries: Optional[str],
 ) -> str:
-    """Zostrojí prompt v slovenčine pre OpenAI."""
+    """
+    Zostrojí prompt v slovenčine pre OpenAI. Obsah materiálov dostane, čo
+    ostane z tokenového rozpočtu modelu (v prípade potreby sa skráti).
+    """
 
-    parts: List[str] = [f"Analyzuj nasledujúcu študijnú tému: „{topic_name}”."]
+    prompt = PromptBuilder(
+        OPENAI_MODEL_NAME, max_output_tokens=TOPIC_MAX_TOKENS, system=SYSTEM_PROMPT, purpose="topic"
+    )
+    prompt.add(f"Analyzuj nasledujúcu študijnú tému: „{topic_name}”.")
 
     if user_strengths:
-        parts.append(f"Silné stránky používateľa: {user_strengths}.")
+        prompt.add(f"Silné stránky používateľa: {user_strengths}.", priority=1)
     if user_weaknesses:
-        parts.append(f"Slabé stránky používateľa: {user_weaknesses}.")
+        prompt.add(f"Slabé stránky používateľa: {user_weaknesses}.", priority=1)
     if user_estimated_difficulty is not None:
-        parts.append(
-            f"Používateľ odhaduje náročnosť na {user_estimated_difficulty:.2f} (škála 0–1)."
-        )
+        prompt.add(f"Používateľ odhaduje náročnosť na {user_estimated_difficulty:.2f} (škála 0–1).", priority=1)
 
     if material_summaries:
-        parts.append("\nTrimnutý obsah priradených materiálov (do 2000 znak.):")
-        parts.append(material_summaries[:2000])
+        prompt.add("\nObsah priradených materiálov:\n" + material_summaries, priority=2, truncate=True)
 
-    parts += [
+    prompt.add("\n".join([
         "\nNa základe uvedeného vráť čistý JSON s kľúčmi:",
         "difficulty_score – float 0‑1",
         "estimated_duration_minutes – int",
         "key_concepts – list str",
         "practice_questions – list str",
-    ]
-
-    return "\n".join(parts)
+    ]))
+    return prompt.build()
 
 
 def _blend_difficulty(ai_score: float, user_score: Optional[float]) -> float:
@@ -99,9 +122,22 @@ def _blend_difficulty(ai_score: float, user_score: Optional[float]) -> float:
     return (ai_score * (1 - USER_AI_BLEND_RATIO)) + (user_score * USER_AI_BLEND_RATIO)
 
 
+def _default_result(error: str, *, retryable: bool = False) -> Dict[str, Any]:
+    """Predvolené hodnoty pri chybe; `retryable` = OpenAI bolo len dočasne nedostupné."""
+
+    return {
+        "ai_difficulty_score": 0.5,
+        "ai_estimated_duration": 60,
+        "key_concepts": [],
+        "practice_questions": [],
+        "error": error,
+        "retryable": retryable,
+    }
+
+
 # -- Verejná API --------------------------------------------------------------
 
-def analyze_topic_with_openai(
+async def analyze_topic_with_openai(
     *,
     topic_name: str,
     user_strengths: Optional[str] = None,
@@ -111,15 +147,10 @@ def analyze_topic_with_openai(
 ) -> Dict[str, Any]:
     """Zavolá OpenAI a vráti normalizovaný slovník s výsledkami."""
 
+    openai_client = get_client()
     if openai_client is None:
         logger.error("OpenAI client missing – returning defaults")
-        return {
-            "ai_difficulty_score": 0.5,
-            "ai_estimated_duration": 60,
-            "key_concepts": [],
-            "practice_questions": [],
-            "error": "OpenAI client not initialised",
-        }
+        return _default_result("OpenAI client not initialised")
 
     prompt = _build_prompt(
         topic_name=topic_name,
@@ -130,24 +161,19 @@ def analyze_topic_with_openai(
     )
 
     try:
-        completion = openai_client.chat.completions.create(
+        raw = await llm_cache.chat_completion(
+            openai_client,
             model=OPENAI_MODEL_NAME,
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Si expert na analýzu študijných tém a tvorbu edukatívneho obsahu. "
-                        "Vráť výhradne JSON."
-                    ),
-                },
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt},
             ],
             temperature=0.2,
-            max_tokens=400,
+            max_tokens=TOPIC_MAX_TOKENS,
             response_format={"type": "json_object"},
+            validate=json_response_validator(AIAnalysis),
         )
 
-        raw = completion.choices[0].message.content
         logger.debug("Raw LLM response: %s", raw)
 
         # --- Robustné parsovanie ------------------------------------------------
@@ -163,47 +189,178 @@ def analyze_topic_with_openai(
             "key_concepts": parsed.key_concepts,
             "practice_questions": parsed.practice_questions,
             "error": None,
+            "retryable": False,
         }
 
+    except LLMUnavailableError as exc:
+        logger.warning("OpenAI unavailable: %s", exc)
+        return _default_result(str(exc), retryable=True)
     except (ValidationError, ValueError, json.JSONDecodeError) as exc:
         logger.exception("Parsing error: %s", exc)
-        return {
-            "ai_difficulty_score": 0.5,
-            "ai_estimated_duration": 60,
-            "key_concepts": [],
-            "practice_questions": [],
-            "error": f"Parsing error: {exc}",
-        }
+        return _default_result(f"Parsing error: {exc}")
     except Exception as exc:  # pylint: disable=broad-except
         logger.exception("LLM call failed: %s", exc)
-        return {
-            "ai_difficulty_score": 0.5,
-            "ai_estimated_duration": 60,
-            "key_concepts": [],
-            "practice_questions": [],
-            "error": str(exc),
-        }
+        return _default_result(str(exc))
 
 
-def update_topic_with_ai_analysis(
-    db_topic: TopicModel,
-    db_materials: Optional[List[StudyMaterialModel]] = None,
-) -> None:
-    """Aktualizuje ORM objekt *pred* commitom."""
-
-    material_texts = [
+def material_texts_for(db_materials: Optional[List[StudyMaterialModel]]) -> List[str]:
+    return [
         preview
         for m in db_materials or []
         if (preview := extract_text_from_material(m))
     ]
 
-    ai = analyze_topic_with_openai(
-        topic_name=db_topic.name,
-        user_strengths=getattr(db_topic, "user_strengths", None),
-        user_weaknesses=getattr(db_topic, "user_weaknesses", None),
-        user_estimated_difficulty=getattr(db_topic, "user_estimated_difficulty", None),
-        material_texts=material_texts or None,
+
+def topic_analysis_input(
+    db_topic: TopicModel,
+    db_materials: Optional[List[StudyMaterialModel]] = None,
+    material_texts: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Argumenty pre `analyze_topic_with_openai` (číta ORM objekty – volaj mimo
+    event loopu). Pri viacerých témach predmetu podaj už hotové `material_texts`.
+    """
+
+    if material_texts is None:
+        material_texts = material_texts_for(db_materials)
+    return {
+        "topic_name": db_topic.name,
+        "user_strengths": getattr(db_topic, "user_strengths", None),
+        "user_weaknesses": getattr(db_topic, "user_weaknesses", None),
+        "user_estimated_difficulty": getattr(db_topic, "user_estimated_difficulty", None),
+        "material_texts": material_texts or None,
+    }
+
+
+# -- Analýza všetkých tém predmetu ---------------------------------------------
+
+def _batch_max_tokens(topic_count: int) -> int:
+    return min(4000, TOPIC_MAX_TOKENS * topic_count)
+
+
+def _build_batch_prompt(topics: List[Dict[str, Any]], material_summaries: str) -> str:
+    """Jeden prompt pre viac tém; témy sú očíslované podľa `index`."""
+
+    prompt = PromptBuilder(
+        OPENAI_MODEL_NAME,
+        max_output_tokens=_batch_max_tokens(len(topics)),
+        system=SYSTEM_PROMPT,
+        purpose="topic_batch",
+    )
+    lines: List[str] = ["Analyzuj nasledujúce študijné témy jedného predmetu:"]
+    for index, t in enumerate(topics):
+        line = f"{index}. „{t['topic_name']}”"
+        if t.get("user_strengths"):
+            line += f" – silné stránky: {t['user_strengths']}"
+        if t.get("user_weaknesses"):
+            line += f" – slabé stránky: {t['user_weaknesses']}"
+        if t.get("user_estimated_difficulty") is not None:
+            line += f" – odhad používateľa: {t['user_estimated_difficulty']:.2f}"
+        lines.append(line)
+    prompt.add("\n".join(lines))
+
+    if material_summaries:
+        prompt.add("\nObsah priradených materiálov:\n" + material_summaries, priority=2, truncate=True)
+
+    prompt.add("\n".join([
+        "\nVráť čistý JSON {\"topics\": [...]} – pre každú tému objekt s kľúčmi:",
+        "index – int (číslo témy zo zoznamu)",
+        "difficulty_score – float 0‑1",
+        "estimated_duration_minutes – int",
+        "key_concepts – list str",
+        "practice_questions – list str",
+    ]))
+    return prompt.build()
+
+
+async def _analyze_topic_group(openai_client, topics: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Viac tém v jednom volaní; téma, ktorá v odpovedi chýba, má None."""
+
+    prompt = _build_batch_prompt(topics, "\n\n".join(topics[0].get("material_texts") or []).strip())
+    raw = await llm_cache.chat_completion(
+        openai_client,
+        model=OPENAI_MODEL_NAME,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.2,
+        max_tokens=_batch_max_tokens(len(topics)),
+        response_format={"type": "json_object"},
+        validate=json_response_validator(AIBatchAnalysis),
     )
+    match = JSON_PARSE_PATTERN.search(raw or "")
+    if not match:
+        raise ValueError("LLM nevrátil JSON objekt")
+    parsed = AIBatchAnalysis.model_validate_json(match.group())
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(topics)
+    for item in parsed.topics:
+        if 0 <= item.index < len(topics):
+            results[item.index] = {
+                "ai_difficulty_score": item.difficulty_score,
+                "ai_estimated_duration": item.estimated_duration_minutes,
+                "key_concepts": item.key_concepts,
+                "practice_questions": item.practice_questions,
+                "error": None,
+                "retryable": False,
+            }
+    return results
+
+
+async def analyze_topics_with_openai(
+    topics: List[Dict[str, Any]],
+    *,
+    topics_per_prompt: int = 1,
+    concurrency: int = TOPIC_ANALYSIS_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    Analyzuje viac tém súbežne (najviac `concurrency` volaní naraz).
+    `topics` sú argumenty z `topic_analysis_input`; pri `topics_per_prompt` > 1
+    sa témy balia po skupinách do jedného promptu a čo v odpovedi chýba,
+    sa doanalyzuje samostatne. Výsledky sú v poradí vstupu; témy s
+    `retryable` neprešli pre dočasnú nedostupnosť OpenAI.
+    """
+
+    openai_client = get_client()
+    if openai_client is None:
+        logger.error("OpenAI client missing – returning defaults")
+        return [_default_result("OpenAI client not initialised") for _ in topics]
+
+    limiter = asyncio.Semaphore(max(1, concurrency))
+    per_prompt = max(1, min(topics_per_prompt, MAX_TOPICS_PER_PROMPT))
+
+    async def single(topic: Dict[str, Any]) -> Dict[str, Any]:
+        async with limiter:
+            return await analyze_topic_with_openai(**topic)
+
+    async def group(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            async with limiter:
+                results = await _analyze_topic_group(openai_client, chunk)
+        except LLMUnavailableError as exc:
+            # jednotlivo by to teraz tiež neprešlo
+            return [_default_result(str(exc), retryable=True) for _ in chunk]
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Batch topic analysis failed, analyzing one by one: %s", exc)
+            results = [None] * len(chunk)
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            retried = await asyncio.gather(*[single(chunk[i]) for i in missing])
+            for i, result in zip(missing, retried):
+                results[i] = result
+        return results
+
+    if per_prompt == 1:
+        return list(await asyncio.gather(*[single(t) for t in topics]))
+
+    chunks = [topics[i:i + per_prompt] for i in range(0, len(topics), per_prompt)]
+    grouped = await asyncio.gather(*[group(chunk) for chunk in chunks])
+    return [result for chunk_results in grouped for result in chunk_results]
+
+
+def apply_ai_analysis(db_topic: TopicModel, ai: Dict[str, Any]) -> None:
+    """Zapíše výsledok `analyze_topic_with_openai` do ORM objektu *pred* commitom."""
 
     # --- Ukladáme výsledky ------------------------------------------------------
     db_topic.ai_difficulty_score = ai["ai_difficulty_score"]
@@ -220,4 +377,3 @@ def update_topic_with_ai_analysis(
 
     if ai["error"]:
         logger.warning("AI analysis returned error for topic %s: %s", db_topic.id or "NEW", ai["error"])
-
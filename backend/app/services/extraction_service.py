@@ -0,0 +1,212 @@
+# backend/app/services/extraction_service.py
+"""
+Extrakcia textu mimo event loopu.
+
+Upload iba uloží súbor a `ExtractionJob` v stave PENDING; samotné
+parsovanie (PyPDF2 …) beží v ohraničenom `ProcessPoolExecutor`-e.
+Worker si otvára vlastnú DB session, strany zapisuje po dávkach do
+`material_pages` a priebeh je čitateľný cez `GET /materials/{id}/extraction`.
+`extracted_text` sa nakoniec poskladá zo strán priamo v DB a výsledok
+sa uloží do `extraction_cache`, takže rovnaký obsah sa extrahuje len raz.
+Worker si job najprv atomicky prevezme (podmienený UPDATE na PROCESSING),
+takže ani pri viacerých API procesoch alebo opakovanom zaradení nebeží
+ten istý job dvakrát; znovu sa dá prevziať len PROCESSING job starší ako
+`EXTRACTION_STALE_MINUTES`.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+from app.config import settings
+from app.crud import crud_extraction_cache, crud_material_page
+from app.database import SessionLocal
+from app.db.enums import ExtractionStatus
+from app.db.models.extraction_job import ExtractionJob
+from app.db.models.study_material import StudyMaterial
+from app.services.text_extraction import TextStats, iter_text_pages
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# strany sa zapisujú (a priebeh commituje) po dávkach tejto veľkosti
+PAGE_BATCH_SIZE = 20
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+# --------------------------------------------------------------------------- #
+# Worker (beží v child procese)                                               #
+# --------------------------------------------------------------------------- #
+def _claimable():
+    """Joby, ktoré môže worker prevziať: čakajúce a opustené rozpracované."""
+    stale_before = datetime.utcnow() - timedelta(minutes=settings.EXTRACTION_STALE_MINUTES)
+    return or_(
+        ExtractionJob.status == ExtractionStatus.PENDING,
+        and_(
+            ExtractionJob.status == ExtractionStatus.PROCESSING,
+            or_(ExtractionJob.started_at.is_(None), ExtractionJob.started_at < stale_before),
+        ),
+    )
+
+
+def _claim_job(db, material_id: int) -> bool:
+    """Prepne job na PROCESSING jedným podmieneným UPDATE; False = má ho už iný worker."""
+    claimed = (
+        db.query(ExtractionJob)
+        .filter(ExtractionJob.material_id == material_id, _claimable())
+        .update(
+            {
+                ExtractionJob.status: ExtractionStatus.PROCESSING,
+                ExtractionJob.started_at: datetime.utcnow(),
+                ExtractionJob.attempts: ExtractionJob.attempts + 1,
+                ExtractionJob.pages_done: 0,
+                ExtractionJob.error: None,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return bool(claimed)
+
+
+def run_extraction_job(material_id: int) -> Optional[ExtractionStatus]:
+    """Spracuje job pre jeden materiál. Volané v procese z poolu."""
+    db = SessionLocal()
+    try:
+        if not _claim_job(db, material_id):
+            logger.info("Extraction job for material %s is not claimable (running, done or gone)", material_id)
+            return None
+        job = db.query(ExtractionJob).filter(ExtractionJob.material_id == material_id).first()
+        material = db.get(StudyMaterial, material_id)
+        if not job or not material:
+            logger.warning("Extraction job for material %s vanished", material_id)
+            return None
+
+        # obsah mohol medzitým extrahovať iný job
+        if crud_extraction_cache.restore_from_cache(db, material, job, PAGE_BATCH_SIZE):
+            db.commit()
+            return job.status
+
+        # pri S3 sa súbor stiahne do dočasného súboru len na čas extrakcie
+        with get_storage().open_local(material.file_path) as local_path:
+            pages = iter_text_pages(local_path, material.file_type, material.file_name)
+
+            # pri opakovanom pokuse začíname odznova
+            crud_material_page.delete_material_pages(db, material_id)
+            cache_writer = crud_extraction_cache.CompressedPagesWriter()
+            stats = TextStats()
+            batch: list[dict] = []
+            if pages is not None:
+                for chunk in pages:
+                    cache_writer.add(chunk.text)
+                    stats.add(chunk.text)
+                    batch.append({
+                        "material_id": material_id,
+                        "page_no": chunk.page_no,
+                        "text": chunk.text,
+                        "char_count": len(chunk.text),
+                    })
+                    job.pages_done = chunk.page_no
+                    job.pages_total = chunk.total
+                    if len(batch) >= PAGE_BATCH_SIZE:
+                        crud_material_page.insert_material_pages(db, batch)
+                        db.commit()
+                        batch = []
+        crud_material_page.insert_material_pages(db, batch)
+        if job.pages_total is None:
+            job.pages_total = job.pages_done
+
+        crud_material_page.concat_pages_into_extracted_text(db, material_id)
+        stats.apply_to(material)
+        job.status = ExtractionStatus.COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+        if pages is not None and material.blob_sha256:
+            crud_extraction_cache.store_cache_entry(db, material.blob_sha256, cache_writer)
+        return job.status
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.exception("Extraction of material %s failed: %s", material_id, exc)
+        db.rollback()
+        job = db.query(ExtractionJob).filter(ExtractionJob.material_id == material_id).first()
+        if job:
+            job.status = ExtractionStatus.FAILED
+            job.error = str(exc)[:1000]
+            job.finished_at = datetime.utcnow()
+            db.commit()
+        return ExtractionStatus.FAILED
+    finally:
+        db.close()
+
+
+# --------------------------------------------------------------------------- #
+# Pool (beží v API procese)                                                   #
+# --------------------------------------------------------------------------- #
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: child nededí DB spojenia ani vlákna Uvicornu
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _log_result(material_id: int, future: Future) -> None:
+    if future.cancelled():
+        return      # shutdown – job ostal PENDING a pri štarte sa zaradí znovu
+    exc = future.exception()
+    if exc:
+        logger.error("Extraction worker crashed for material %s: %s", material_id, exc)
+    else:
+        logger.info("Extraction of material %s finished: %s", material_id, future.result())
+
+
+def submit_extraction_job(material_id: int) -> None:
+    """Zaradí extrakciu materiálu do poolu (neblokuje)."""
+    global _executor
+    try:
+        future = _get_executor().submit(run_extraction_job, material_id)
+    except BrokenProcessPool:
+        logger.warning("Extraction pool broken, recreating it")
+        with _executor_lock:
+            _executor = None
+        future = _get_executor().submit(run_extraction_job, material_id)
+    future.add_done_callback(lambda f: _log_result(material_id, f))
+
+
+def resume_pending_jobs() -> int:
+    """
+    Po reštarte znovu zaradí joby, ktoré nedobehli – PENDING a PROCESSING
+    staršie ako `EXTRACTION_STALE_MINUTES` (čerstvé môže spracúvať iný proces).
+    """
+    db = SessionLocal()
+    try:
+        ids = [row.material_id for row in db.query(ExtractionJob.material_id).filter(_claimable())]
+    finally:
+        db.close()
+    for material_id in ids:
+        submit_extraction_job(material_id)
+    if ids:
+        logger.info("Resumed %d pending extraction jobs", len(ids))
+    return len(ids)
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,124 @@
+# backend/app/services/material_archive.py
+"""
+ZIP export materiálov predmetu, skladaný za behu.
+
+Archív sa zapisuje do malého bufferu, ktorý sa po každom bloku vyprázdni
+do odpovede – žiadny dočasný súbor a pamäť nezávisí od veľkosti archívu.
+`zipfile` pri zápise do prúdu bez `seek` použije data descriptory (CRC
+a veľkosti za dátami), takže netreba vopred čítať súbory dvakrát.
+Už komprimované formáty (PDF, obrázky, OOXML …) sa ukladajú bez kompresie.
+"""
+
+from __future__ import annotations
+
+import logging
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Iterable, Iterator, List, Optional, Set
+
+from app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 256 * 1024
+
+# komprimovať ich znova len míňa CPU
+_STORED_MIME_PREFIXES = ("image/", "audio/", "video/")
+_STORED_MIME_TYPES = {
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.oasis.opendocument.text",
+}
+_STORED_SUFFIXES = {
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".zip", ".gz", ".7z",
+    ".docx", ".pptx", ".xlsx", ".odt", ".mp3", ".mp4",
+}
+
+
+class _StreamBuffer:
+    """Zapisovateľný objekt pre ZipFile; `drain()` vráti a zahodí zapísané bajty."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _is_compressed(file_type: Optional[str], file_name: str) -> bool:
+    mime = (file_type or "").split(";")[0].strip().lower()
+    if mime in _STORED_MIME_TYPES or mime.startswith(_STORED_MIME_PREFIXES):
+        return True
+    return PurePosixPath(file_name).suffix.lower() in _STORED_SUFFIXES
+
+
+def _unique_name(file_name: str, used: Set[str]) -> str:
+    """Rovnaké názvy súborov v predmete → `nazov (2).pdf`."""
+    name = PurePosixPath(file_name.replace("\\", "/")).name or "file"
+    candidate, n = name, 1
+    stem, suffix = PurePosixPath(name).stem, PurePosixPath(name).suffix
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{stem} ({n}){suffix}"
+    used.add(candidate.lower())
+    return candidate
+
+
+def _zip_info(arcname: str, uploaded_at: Optional[datetime], size: Optional[int], stored: bool) -> zipfile.ZipInfo:
+    ts = uploaded_at or datetime.utcnow()
+    info = zipfile.ZipInfo(arcname, date_time=(max(ts.year, 1980), ts.month, ts.day, ts.hour, ts.minute, ts.second))
+    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    info.external_attr = 0o644 << 16
+    # podľa odhadu veľkosti sa rozhodne o ZIP64 hlavičke
+    info.file_size = size or 0
+    return info
+
+
+def iter_subject_archive(materials: Iterable) -> Iterator[bytes]:
+    """
+    Generátor blokov ZIP archívu. `materials` sú riadky s file_name,
+    file_path, file_type, file_size a uploaded_at (bez DB session –
+    generátor beží až po skončení requestu). Chýbajúci súbor sa preskočí.
+    """
+    storage = get_storage()
+    buffer = _StreamBuffer()
+    used_names: Set[str] = set()
+    with zipfile.ZipFile(buffer, "w", compresslevel=6, allowZip64=True) as archive:
+        for mat in materials:
+            try:
+                source = storage.open(mat.file_path)
+            except FileNotFoundError:
+                logger.warning("Archive: file of material %s is missing (%s)", mat.id, mat.file_path)
+                continue
+            info = _zip_info(
+                _unique_name(mat.file_name, used_names),
+                mat.uploaded_at,
+                mat.file_size,
+                _is_compressed(mat.file_type, mat.file_name),
+            )
+            with source, archive.open(info, "w") as dest:
+                while chunk := source.read(READ_CHUNK_SIZE):
+                    dest.write(chunk)
+                    if data := buffer.drain():
+                        yield data
+            # data descriptor za súborom
+            if data := buffer.drain():
+                yield data
+    # central directory (zapíše sa pri zatvorení archívu)
+    if data := buffer.drain():
+        yield data
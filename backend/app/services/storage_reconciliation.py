@@ -0,0 +1,392 @@
+# backend/app/services/storage_reconciliation.py
+"""
+Zosúladenie úložiska súborov s databázou (sweeper sirôt).
+
+1. Strom médií sa prejde paralelne (`os.scandir`, jeden podstrom na vlákno).
+   Pri objektovom úložisku (S3) sa lokálne prechádza len MEDIA_ROOT/tmp
+   a objekty sa čítajú cez `StorageBackend.iter_objects` (listing po stránkach).
+2. Referencie z DB (`study_materials.file_path`, `media_blobs.file_path`,
+   neexpirované `upload_sessions`) sa čítajú po dávkach (keyset pagination)
+   a porovnajú so zoznamom nájdených súborov. Expirované upload session
+   sa pri `delete=True` najprv zmažú; ich .part súbory sú potom siroty.
+3. Výsledok:
+     • orphans – súbory, na ktoré nič neukazuje (aj staré .tmp / .part),
+     • missing – záznamy v DB, ktorých súbor chýba (len report).
+Predvolene beží ako dry-run; mazanie len s `delete=True`. Súbory mladšie
+ako `grace_seconds` sa nikdy nemažú (môže ísť o práve bežiaci upload).
+
+Spustenie:  python -m app.services.storage_reconciliation [--delete]
+            python -m app.services.storage_reconciliation --rebuild-usage   (oprava kvót)
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import file_utils
+from app.crud import crud_media_blob, crud_storage_usage, crud_upload_session
+from app.config import settings
+from app.database import SessionLocal
+from app.db.models.media_blob import MediaBlob
+from app.db.models.study_material import StudyMaterial
+from app.db.models.upload_session import UploadSession
+from app.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+DB_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 8
+# súbory mladšie ako toto sa považujú za rozpracované
+DEFAULT_GRACE_SECONDS = 6 * 3600
+
+
+@dataclass
+class ReconciliationReport:
+    dry_run: bool
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    db_rows_checked: int = 0
+    orphans: List[Tuple[str, int]] = field(default_factory=list)      # (relatívna cesta, veľkosť)
+    missing: List[Tuple[str, str]] = field(default_factory=list)      # (záznam, relatívna cesta)
+    skipped_recent: int = 0
+    reused: int = 0  # siroty, na ktoré pred zmazaním začal ukazovať upload
+    deleted_files: int = 0
+    deleted_bytes: int = 0
+    errors: List[str] = field(default_factory=list)
+    scan_seconds: float = 0.0
+    db_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def orphan_bytes(self) -> int:
+        return sum(size for _, size in self.orphans)
+
+    def metrics(self) -> Dict[str, float]:
+        scan = self.scan_seconds or 1e-9
+        return {
+            "files_scanned": self.files_scanned,
+            "files_per_second": round(self.files_scanned / scan, 1),
+            "mb_scanned": round(self.bytes_scanned / 2**20, 2),
+            "db_rows_checked": self.db_rows_checked,
+            "db_rows_per_second": round(self.db_rows_checked / (self.db_seconds or 1e-9), 1),
+            "orphans": len(self.orphans),
+            "orphan_mb": round(self.orphan_bytes / 2**20, 2),
+            "missing": len(self.missing),
+            "skipped_recent": self.skipped_recent,
+            "reused": self.reused,
+            "deleted_files": self.deleted_files,
+            "deleted_mb": round(self.deleted_bytes / 2**20, 2),
+            "errors": len(self.errors),
+            "scan_seconds": round(self.scan_seconds, 3),
+            "db_seconds": round(self.db_seconds, 3),
+            "total_seconds": round(self.total_seconds, 3),
+        }
+
+# --------------------------------------------------------------------------- #
+# Disk                                                                        #
+# --------------------------------------------------------------------------- #
+FileInfo = Tuple[int, float]   # (veľkosť, mtime)
+
+
+def _walk_tree(top: str, root: str, errors: List[str]) -> Dict[str, FileInfo]:
+    """Rekurzívne prejde `top` cez os.scandir; kľúče sú cesty relatívne k `root` (posix)."""
+    found: Dict[str, FileInfo] = {}
+    stack = [top]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        rel = Path(os.path.relpath(entry.path, root)).as_posix()
+                        found[rel] = (st.st_size, st.st_mtime)
+        except OSError as exc:
+            errors.append(f"scan {directory}: {exc}")
+    return found
+
+
+def _split_top_level(root: str, errors: List[str]) -> Tuple[List[str], Dict[str, FileInfo]]:
+    """
+    Rozdelí strom na podstromy pre vlákna – priečinky na 2. úrovni
+    (user_X/subject_Y, blobs/aa, tmp/uploads …); súbory vyššie vráti hneď.
+    """
+    tasks: List[str] = []
+    loose: Dict[str, FileInfo] = {}
+    try:
+        level1 = list(os.scandir(root))
+    except OSError as exc:
+        errors.append(f"scan {root}: {exc}")
+        return tasks, loose
+    for entry in level1:
+        if entry.is_file(follow_symlinks=False):
+            st = entry.stat(follow_symlinks=False)
+            loose[entry.name] = (st.st_size, st.st_mtime)
+        elif entry.is_dir(follow_symlinks=False):
+            try:
+                with os.scandir(entry.path) as it:
+                    for child in it:
+                        if child.is_dir(follow_symlinks=False):
+                            tasks.append(child.path)
+                        elif child.is_file(follow_symlinks=False):
+                            st = child.stat(follow_symlinks=False)
+                            loose[f"{entry.name}/{child.name}"] = (st.st_size, st.st_mtime)
+            except OSError as exc:
+                errors.append(f"scan {entry.path}: {exc}")
+    return tasks, loose
+
+
+def scan_media_tree(root: Path, workers: int, errors: List[str]) -> Dict[str, FileInfo]:
+    root_str = str(root)
+    if not root.is_dir():
+        return {}
+    tasks, found = _split_top_level(root_str, errors)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media-scan") as pool:
+        for part in pool.map(lambda top: _walk_tree(top, root_str, errors), tasks):
+            found.update(part)
+    return found
+
+
+def scan_storage(storage: StorageBackend, workers: int, errors: List[str]) -> Tuple[Dict[str, FileInfo], set[str]]:
+    """
+    Všetky súbory na kontrolu; druhá hodnota sú kľúče, ktoré nie sú na
+    lokálnom disku (mažú sa cez `storage.delete`).
+    """
+    root = file_utils.MEDIA_ROOT
+    if storage.local_path("") is not None:
+        return scan_media_tree(root, workers, errors), set()
+
+    # dočasné uploady sú vždy lokálne
+    found = {
+        f"{file_utils.TMP_DIR}/{rel}": info
+        for rel, info in scan_media_tree(root / file_utils.TMP_DIR, workers, errors).items()
+    }
+    remote: set[str] = set()
+    try:
+        for obj in storage.iter_objects():
+            found[obj.key] = (obj.size, obj.modified.timestamp())
+            remote.add(obj.key)
+    except Exception as exc:  # pylint: disable=broad-except
+        errors.append(f"list {storage.name}: {exc}")
+    return found, remote
+
+# --------------------------------------------------------------------------- #
+# DB                                                                          #
+# --------------------------------------------------------------------------- #
+def _iter_material_paths(db, batch_size: int) -> Iterator[List[Tuple[int, str]]]:
+    last_id = 0
+    while True:
+        rows = (
+            db.query(StudyMaterial.id, StudyMaterial.file_path)
+            .filter(StudyMaterial.id > last_id)
+            .order_by(StudyMaterial.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def _iter_blob_paths(db, batch_size: int) -> Iterator[List[Tuple[str, str]]]:
+    last_sha = ""
+    while True:
+        rows = (
+            db.query(MediaBlob.sha256, MediaBlob.file_path)
+            .filter(MediaBlob.sha256 > last_sha)
+            .order_by(MediaBlob.sha256)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        last_sha = rows[-1].sha256
+
+
+def _still_referenced(db, rel: str) -> bool:
+    """Čerstvá kontrola jedného kľúča tesne pred zmazaním; chyba DB = nemazať."""
+    try:
+        db.rollback()
+        return crud_media_blob.is_object_referenced(db, rel)
+    except SQLAlchemyError as exc:
+        logger.warning("Could not re-check %s before delete: %s", rel, exc)
+        return True
+
+
+def _upload_part_path(upload_id: str) -> str:
+    return Path(file_utils.get_chunked_upload_path(upload_id)).relative_to(file_utils.MEDIA_ROOT).as_posix()
+
+# --------------------------------------------------------------------------- #
+# Reconcile                                                                   #
+# --------------------------------------------------------------------------- #
+def reconcile_storage(
+    *,
+    delete: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    grace_seconds: int = DEFAULT_GRACE_SECONDS,
+    batch_size: int = DB_BATCH_SIZE,
+) -> ReconciliationReport:
+    """Porovná disk s DB; s `delete=True` zmaže siroty staršie ako `grace_seconds`."""
+    report = ReconciliationReport(dry_run=not delete)
+    started = time.monotonic()
+    storage = get_storage()
+
+    found, remote = scan_storage(storage, workers, report.errors)
+    report.scan_seconds = time.monotonic() - started
+    report.files_scanned = len(found)
+    report.bytes_scanned = sum(size for size, _ in found.values())
+
+    db_started = time.monotonic()
+    referenced: set[str] = set()
+    db = SessionLocal()
+    try:
+        if delete:
+            crud_upload_session.purge_expired_upload_sessions(db)
+        for rows in _iter_material_paths(db, batch_size):
+            report.db_rows_checked += len(rows)
+            for material_id, file_path in rows:
+                rel = Path(file_path).as_posix()
+                if rel in found:
+                    referenced.add(rel)
+                else:
+                    report.missing.append((f"study_material:{material_id}", rel))
+        for rows in _iter_blob_paths(db, batch_size):
+            report.db_rows_checked += len(rows)
+            for sha256, file_path in rows:
+                rel = Path(file_path).as_posix()
+                if rel in found:
+                    referenced.add(rel)
+                else:
+                    report.missing.append((f"media_blob:{sha256}", rel))
+        fresh_uploads = db.query(UploadSession.id).filter(
+            UploadSession.updated_at >= crud_upload_session.expiry_cutoff()
+        )
+        for (upload_id,) in fresh_uploads.yield_per(batch_size):
+            report.db_rows_checked += 1
+            referenced.add(_upload_part_path(upload_id))
+    finally:
+        db.close()
+    report.db_seconds = time.monotonic() - db_started
+
+    # blob, na ktorý ukazuje aj záznam v study_materials, je zapísaný dvakrát – nevadí (set)
+    cutoff = time.time() - grace_seconds
+    for rel, (size, mtime) in found.items():
+        if rel in referenced:
+            continue
+        if mtime > cutoff:
+            report.skipped_recent += 1
+            continue
+        report.orphans.append((rel, size))
+
+    if delete:
+        db = SessionLocal()
+        try:
+            for rel, size in report.orphans:
+                # medzi čítaním DB a mazaním mohol rovnaký obsah nahrať upload
+                # (existujúci súbor len prepíše, mtime starý blob nepomladí)
+                if _still_referenced(db, rel):
+                    report.reused += 1
+                    continue
+                if rel in remote:
+                    removed = storage.delete(rel)
+                else:
+                    removed = file_utils.remove_file_from_disk(file_utils.MEDIA_ROOT / rel)
+                if removed:
+                    report.deleted_files += 1
+                    report.deleted_bytes += size
+                else:
+                    report.errors.append(f"delete {rel}")
+        finally:
+            db.close()
+
+    report.total_seconds = time.monotonic() - started
+    logger.info("Storage reconciliation (%s): %s", "dry-run" if report.dry_run else "delete", report.metrics())
+    return report
+
+# --------------------------------------------------------------------------- #
+# Periodický sweeper (voliteľný, pozri STORAGE_SWEEP_INTERVAL_MINUTES)        #
+# --------------------------------------------------------------------------- #
+_sweeper_stop = threading.Event()
+_sweeper_thread: Optional[threading.Thread] = None
+
+
+def _sweeper_loop(interval_seconds: int, delete: bool) -> None:
+    while not _sweeper_stop.wait(interval_seconds):
+        try:
+            reconcile_storage(delete=delete)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Storage sweep failed: %s", exc)
+
+
+def start_sweeper() -> bool:
+    """Spustí sweeper vo vlákne, ak je zapnutý v konfigurácii."""
+    global _sweeper_thread
+    interval = settings.STORAGE_SWEEP_INTERVAL_MINUTES
+    if interval <= 0 or _sweeper_thread is not None:
+        return False
+    _sweeper_stop.clear()
+    _sweeper_thread = threading.Thread(
+        target=_sweeper_loop,
+        args=(interval * 60, settings.STORAGE_SWEEP_DELETE),
+        name="storage-sweeper",
+        daemon=True,
+    )
+    _sweeper_thread.start()
+    return True
+
+
+def stop_sweeper() -> None:
+    global _sweeper_thread
+    _sweeper_stop.set()
+    _sweeper_thread = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile file storage with the database.")
+    parser.add_argument("--delete", action="store_true", help="delete orphans (default: dry-run)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--grace-seconds", type=int, default=DEFAULT_GRACE_SECONDS)
+    parser.add_argument("--verbose", "-v", action="store_true", help="list orphans and missing files")
+    parser.add_argument(
+        "--rebuild-usage", action="store_true",
+        help="only rebuild user_storage_usage counters from study_materials",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.rebuild_usage:
+        db = SessionLocal()
+        try:
+            print(f"users: {crud_storage_usage.rebuild_storage_usage(db)}")
+        finally:
+            db.close()
+        return 0
+    report = reconcile_storage(delete=args.delete, workers=args.workers, grace_seconds=args.grace_seconds)
+    if args.verbose:
+        for rel, size in report.orphans:
+            print(f"orphan  {size:>12}  {rel}")
+        for record, rel in report.missing:
+            print(f"missing {record}  {rel}")
+        for err in report.errors:
+            print(f"error   {err}")
+    for key, value in report.metrics().items():
+        print(f"{key}: {value}")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+# backend/app/services/text_extraction.py
+"""
+Extrakcia textu zo súborov materiálov.
+
+Extraktory sú generátory – vracajú text po stranách (`PageChunk`), takže
+volajúci drží v pamäti vždy len jednu stranu. Registrujú sa dekorátorom
+`register_extractor` podľa MIME typu a koncovky (PDF, TXT, DOCX, PPTX). Funkcie sú synchrónne a
+bez prístupu k DB – volá ich `extraction_service` v samostatnom procese.
+Chyby čítania súboru sa propagujú volajúcemu (job ich uloží).
+"""
+
+from __future__ import annotations
+
+import logging
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Zvýš pri každej zmene extraktorov – staré záznamy v extraction_cache
+# sa tým prestanú používať.
+EXTRACTOR_VERSION = "1"
+
+# TXT nemá strany – delíme ho na úseky približne tejto dĺžky (po riadkoch)
+TXT_PAGE_CHARS = 4_000
+
+# priemerná rýchlosť čítania študijného textu (slov za minútu)
+WORDS_PER_MINUTE = 200
+
+
+class PageChunk(NamedTuple):
+    page_no: int            # od 1
+    text: str
+    total: Optional[int]    # celkový počet strán, ak je vopred známy
+
+
+class TextStats:
+    """Štatistiky textu počítané priebežne po stranách (bez držania celého textu)."""
+
+    def __init__(self) -> None:
+        self.page_count = 0
+        self.word_count = 0
+        self.char_count = 0
+
+    def add(self, text: str) -> None:
+        self.page_count += 1
+        self.word_count += len(text.split())
+        self.char_count += len(text)
+
+    @property
+    def reading_time_minutes(self) -> int:
+        if not self.word_count:
+            return 0
+        return max(1, round(self.word_count / WORDS_PER_MINUTE))
+
+    def apply_to(self, material) -> None:
+        """Zapíše štatistiky do stĺpcov `StudyMaterial`."""
+        material.page_count = self.page_count
+        material.word_count = self.word_count
+        material.char_count = self.char_count
+        material.reading_time_minutes = self.reading_time_minutes
+
+
+# --------------------------------------------------------------------------- #
+# Registry                                                                    #
+# --------------------------------------------------------------------------- #
+Extractor = Callable[[Path], Iterator[PageChunk]]
+
+_EXTRACTORS_BY_MIME: Dict[str, Extractor] = {}
+_EXTRACTORS_BY_SUFFIX: Dict[str, Extractor] = {}
+
+
+def register_extractor(
+    mime_types: Iterable[str] = (),
+    extensions: Iterable[str] = (),
+) -> Callable[[Extractor], Extractor]:
+    """
+    Dekorátor – zaregistruje extraktor pre dané MIME typy a koncovky.
+    Extraktor je generátor `Path -> Iterator[PageChunk]`.
+    """
+    def decorator(fn: Extractor) -> Extractor:
+        for mime in mime_types:
+            _EXTRACTORS_BY_MIME[mime.lower()] = fn
+        for ext in extensions:
+            _EXTRACTORS_BY_SUFFIX[ext.lower()] = fn
+        return fn
+    return decorator
+
+
+def get_extractor(mime_type: Optional[str], file_name: Optional[str]) -> Optional[Extractor]:
+    """Najprv podľa MIME typu, potom podľa koncovky (prehliadače často pošlú octet-stream)."""
+    if mime_type:
+        extractor = _EXTRACTORS_BY_MIME.get(mime_type.split(";")[0].strip().lower())
+        if extractor:
+            return extractor
+    if file_name:
+        return _EXTRACTORS_BY_SUFFIX.get(Path(file_name).suffix.lower())
+    return None
+
+# --------------------------------------------------------------------------- #
+# PDF / TXT                                                                   #
+# --------------------------------------------------------------------------- #
+@register_extractor(mime_types=("application/pdf",), extensions=(".pdf",))
+def _iter_pdf_pages(file_path_on_disk: Path) -> Iterator[PageChunk]:
+    """Text z PDF súboru po stranách."""
+    with file_path_on_disk.open("rb") as pdf_file_obj:
+        pdf_reader = PyPDF2.PdfReader(pdf_file_obj)
+        total = len(pdf_reader.pages)
+        for page_no, page_obj in enumerate(pdf_reader.pages, start=1):
+            # extract_text môže vrátiť None
+            yield PageChunk(page_no, (page_obj.extract_text() or "").strip(), total)
+    logger.info("Successfully extracted text from PDF: %s", file_path_on_disk.name)
+
+
+@register_extractor(mime_types=("text/plain", "text/markdown"), extensions=(".txt", ".md"))
+def _iter_txt_pages(file_path_on_disk: Path) -> Iterator[PageChunk]:
+    """Text z TXT súboru po úsekoch ~TXT_PAGE_CHARS znakov."""
+    with file_path_on_disk.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from _chunk_lines(f)
+    logger.info("Successfully extracted text from TXT: %s", file_path_on_disk.name)
+
+
+# značka v prúde riadkov pre _chunk_lines – „tu končí strana“
+_PAGE_BREAK = object()
+
+
+def _chunk_lines(lines: Iterable) -> Iterator[PageChunk]:
+    """
+    Zlúči riadky (odseky) do strán ~TXT_PAGE_CHARS znakov; `_PAGE_BREAK`
+    v prúde stranu ukončí hneď. Prázdne strany sa nevracajú;
+    `PageChunk.total` je None (počet strán vopred nevieme).
+    """
+    page_no = 0
+    buf: List[str] = []
+    size = 0
+    for line in lines:
+        if line is _PAGE_BREAK:
+            if buf:
+                page_no += 1
+                yield PageChunk(page_no, "".join(buf).strip(), None)
+                buf, size = [], 0
+            continue
+        buf.append(line)
+        size += len(line)
+        if size >= TXT_PAGE_CHARS:
+            page_no += 1
+            yield PageChunk(page_no, "".join(buf).strip(), None)
+            buf, size = [], 0
+    if buf:
+        page_no += 1
+        yield PageChunk(page_no, "".join(buf).strip(), None)
+
+# --------------------------------------------------------------------------- #
+# DOCX / PPTX (Office Open XML)                                               #
+# --------------------------------------------------------------------------- #
+# Súbory sú ZIP s XML časťami; čítame ich cez iterparse a spracované elementy
+# hneď uvoľňujeme, takže pamäť nerastie s veľkosťou dokumentu (python-docx by
+# si najprv postavil celý strom).
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _iter_docx_paragraphs(docx: zipfile.ZipFile) -> Iterator[str]:
+    """Odseky z word/document.xml; pri zalomení strany vloží _PAGE_BREAK."""
+    with docx.open("word/document.xml") as xml:
+        parts: List[str] = []
+        page_break = False
+        for _event, elem in ET.iterparse(xml, events=("end",)):
+            tag = elem.tag
+            if tag == _W + "t":
+                parts.append(elem.text or "")
+            elif tag == _W + "tab":
+                parts.append("\t")
+            elif tag == _W + "br":
+                if elem.get(_W + "type") == "page":
+                    page_break = True
+                else:
+                    parts.append("\n")
+            elif tag == _W + "lastRenderedPageBreak":
+                # Word si pri uložení poznačí, kde zalomil stranu
+                page_break = True
+            elif tag == _W + "p":
+                yield "".join(parts) + "\n"
+                if page_break:
+                    yield _PAGE_BREAK
+                parts, page_break = [], False
+                elem.clear()
+            elif tag == _W + "tbl":
+                elem.clear()
+
+
+@register_extractor(
+    mime_types=("application/vnd.openxmlformats-officedocument.wordprocessingml.document",),
+    extensions=(".docx",),
+)
+def _iter_docx_pages(file_path_on_disk: Path) -> Iterator[PageChunk]:
+    """
+    Text z DOCX po stranách podľa zalomení uložených Wordom; dlhé úseky
+    bez zalomenia sa delia ako TXT (~TXT_PAGE_CHARS znakov).
+    """
+    with zipfile.ZipFile(file_path_on_disk) as docx:
+        yield from _chunk_lines(_iter_docx_paragraphs(docx))
+    logger.info("Successfully extracted text from DOCX: %s", file_path_on_disk.name)
+
+
+def _pptx_slide_parts(pptx: zipfile.ZipFile) -> List[str]:
+    """Cesty k XML slajdov v poradí prezentácie (nie podľa názvu súboru)."""
+    rels = ET.fromstring(pptx.read("ppt/_rels/presentation.xml.rels"))
+    targets = {
+        rel.get("Id"): rel.get("Target")
+        for rel in rels.iter(_PKG_REL + "Relationship")
+    }
+    presentation = ET.fromstring(pptx.read("ppt/presentation.xml"))
+    parts = []
+    for sld_id in presentation.iter(_P + "sldId"):
+        target = targets.get(sld_id.get(_R + "id"))
+        if target:
+            parts.append(target.lstrip("/") if target.startswith("/") else f"ppt/{target}")
+    return parts
+
+
+def _slide_text(pptx: zipfile.ZipFile, part: str) -> str:
+    lines: List[str] = []
+    runs: List[str] = []
+    with pptx.open(part) as xml:
+        for _event, elem in ET.iterparse(xml, events=("end",)):
+            if elem.tag == _A + "t":
+                runs.append(elem.text or "")
+            elif elem.tag == _A + "br":
+                runs.append("\n")
+            elif elem.tag == _A + "p":
+                line = "".join(runs).strip()
+                if line:
+                    lines.append(line)
+                runs = []
+                elem.clear()
+    return "\n".join(lines)
+
+
+@register_extractor(
+    mime_types=("application/vnd.openxmlformats-officedocument.presentationml.presentation",),
+    extensions=(".pptx",),
+)
+def _iter_pptx_pages(file_path_on_disk: Path) -> Iterator[PageChunk]:
+    """Text z PPTX – jedna strana = jeden slajd."""
+    with zipfile.ZipFile(file_path_on_disk) as pptx:
+        parts = _pptx_slide_parts(pptx)
+        for page_no, part in enumerate(parts, start=1):
+            yield PageChunk(page_no, _slide_text(pptx, part), len(parts))
+    logger.info("Successfully extracted text from PPTX: %s", file_path_on_disk.name)
+
+# --------------------------------------------------------------------------- #
+# Public API                                                                  #
+# --------------------------------------------------------------------------- #
+def iter_text_pages(
+    file_path_on_disk: Path,
+    mime_type: Optional[str],
+    file_name: Optional[str] = None,
+) -> Optional[Iterator[PageChunk]]:
+    """
+    Zvolí extraktor z registra podľa MIME typu alebo koncovky.
+    Bloby nemajú koncovku, preto sa berie z pôvodného `file_name`.
+    Pre nepodporovaný typ vráti None.
+    """
+    extractor = get_extractor(mime_type, file_name or file_path_on_disk.name)
+    if extractor is None:
+        logger.warning(
+            "Unsupported file for text extraction: %s (%s)", file_name or file_path_on_disk.name, mime_type
+        )
+        return None
+    return extractor(file_path_on_disk)
@@ -0,0 +1,31 @@
+# backend/app/storage/__init__.py
+"""
+Úložisko súborov materiálov.
+
+Kľúč objektu je relatívna cesta uložená v `StudyMaterial.file_path`
+(napr. `blobs/aa/bb/<sha256>`). Driver sa volí cez `STORAGE_BACKEND`:
+  • local – adresár MEDIA_FILES_BASE_DIR (predvolené),
+  • s3    – S3-kompatibilné úložisko (AWS, MinIO …); sťahovanie ide
+            presmerovaním na presigned URL, nie cez Uvicorn.
+Dočasné súbory (uploady, chunked .part) sú vždy lokálne v MEDIA_ROOT/tmp.
+"""
+
+from functools import lru_cache
+
+from app.config import settings
+from app.storage.base import StorageBackend, StoredObject
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "local":
+        from app.storage.local import LocalStorage
+        return LocalStorage(settings.MEDIA_FILES_BASE_DIR)
+    if backend == "s3":
+        from app.storage.s3 import S3Storage
+        return S3Storage.from_settings(settings)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{settings.STORAGE_BACKEND}'")
+
+
+__all__ = ["StorageBackend", "StoredObject", "get_storage"]
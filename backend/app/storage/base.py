@@ -0,0 +1,62 @@
+# backend/app/storage/base.py
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, ContextManager, Iterator, NamedTuple, Optional
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    modified: datetime   # UTC
+
+
+class StorageBackend(ABC):
+    """Spoločné rozhranie driverov (pozri `app.storage`)."""
+
+    name = "base"
+
+    @abstractmethod
+    def put_file(self, local_path: Path, key: str) -> bool:
+        """
+        Presunie lokálny súbor pod `key` (lokálny súbor potom neexistuje).
+        Existujúci objekt (rovnaký obsah) sa prepíše – nespoliehame sa naň,
+        lebo ho môže práve mazať súbežné zmazanie. Vráti True, ak objekt
+        predtým neexistoval.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Zmaže objekt; neexistujúci objekt nie je chyba. Chybu zaloguje a vráti False."""
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Veľkosť a čas zmeny objektu; None ak neexistuje."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Prúd na čítanie obsahu objektu (volajúci ho zatvorí); FileNotFoundError ak chýba."""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Cesta na lokálnom disku, ak ju driver má (inak None)."""
+        return None
+
+    @abstractmethod
+    def open_local(self, key: str) -> ContextManager[Path]:
+        """Lokálna cesta k obsahu objektu na čas bloku `with` (S3: dočasná kópia)."""
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        """Časovo obmedzená URL na priame stiahnutie; None ak driver nepodporuje."""
+        return None
+
+    @abstractmethod
+    def iter_objects(self, prefix: str = "") -> Iterator[StoredObject]:
+        """Všetky objekty (pre zosúladenie s DB)."""
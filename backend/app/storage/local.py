@@ -0,0 +1,63 @@
+# backend/app/storage/local.py
+"""Lokálny disk – správanie zhodné s pôvodným MEDIA_FILES_BASE_DIR."""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app import file_utils
+from app.storage.base import StorageBackend, StoredObject
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / Path(key)
+
+    def put_file(self, local_path: Path, key: str) -> bool:
+        final_path = self._path(key)
+        existed = final_path.is_file()
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        # aj keď súbor existuje – súbežné mazanie ho môže práve odstraňovať
+        os.replace(local_path, final_path)
+        return not existed
+
+    def delete(self, key: str) -> bool:
+        return file_utils.remove_file_from_disk(self._path(key))
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            st = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, st.st_size, datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def open(self, key: str) -> BinaryIO:
+        return self._path(key).open("rb")
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+    @contextmanager
+    def open_local(self, key: str) -> Iterator[Path]:
+        yield self._path(key)
+
+    def iter_objects(self, prefix: str = "") -> Iterator[StoredObject]:
+        base = self._path(prefix) if prefix else self.root
+        for dirpath, _dirnames, filenames in os.walk(base):
+            for name in filenames:
+                path = Path(dirpath) / name
+                st = path.stat()
+                yield StoredObject(
+                    path.relative_to(self.root).as_posix(),
+                    st.st_size,
+                    datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                )
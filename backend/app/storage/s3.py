@@ -0,0 +1,140 @@
+# backend/app/storage/s3.py
+"""
+S3-kompatibilné úložisko (AWS S3, MinIO, …) cez boto3.
+
+boto3 je voliteľná závislosť – importuje sa až pri použití driveru.
+Kľúče majú voliteľný prefix (`S3_PREFIX`), takže jeden bucket môže
+zdieľať viac prostredí.
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import quote
+
+from app import file_utils
+from app.storage.base import StorageBackend, StoredObject
+
+logger = logging.getLogger(__name__)
+
+
+class S3Storage(StorageBackend):
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        presign_expires: int = 300,
+        client=None,
+    ) -> None:
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError as exc:  # pragma: no cover
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package") from exc
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_expires = presign_expires
+        self.client = client or boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+
+    @classmethod
+    def from_settings(cls, settings) -> "S3Storage":
+        if not settings.S3_BUCKET:
+            raise ValueError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return cls(
+            settings.S3_BUCKET,
+            prefix=settings.S3_PREFIX,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            presign_expires=settings.STORAGE_PRESIGN_EXPIRES,
+        )
+
+    def _key(self, key: str) -> str:
+        key = Path(key).as_posix()
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _is_not_found(self, exc) -> bool:
+        return exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def put_file(self, local_path: Path, key: str) -> bool:
+        existed = self.stat(key) is not None
+        # nahrá sa vždy – existujúci objekt môže práve mazať súbežné zmazanie materiálu;
+        # upload_file robí pri veľkých súboroch multipart upload sám
+        self.client.upload_file(str(local_path), self.bucket, self._key(key))
+        local_path.unlink(missing_ok=True)
+        return not existed
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except self._client_error as exc:
+            logger.warning("Could not delete s3://%s/%s: %s", self.bucket, self._key(key), exc)
+            return False
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as exc:
+            if self._is_not_found(exc):
+                return None
+            raise
+        return StoredObject(key, head["ContentLength"], head["LastModified"])
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except self._client_error as exc:
+            if self._is_not_found(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    @contextmanager
+    def open_local(self, key: str) -> Iterator[Path]:
+        tmp_path = file_utils.get_tmp_upload_path()
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.client.download_file(self.bucket, self._key(key), str(tmp_path))
+            yield tmp_path
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def presigned_url(
+        self,
+        key: str,
+        *,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=self.presign_expires)
+
+    def iter_objects(self, prefix: str = "") -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        full_prefix = self._key(prefix) if prefix else (f"{self.prefix}/" if self.prefix else "")
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=full_prefix):
+            for obj in page.get("Contents", []):
+                yield StoredObject(obj["Key"][strip:], obj["Size"], obj["LastModified"])